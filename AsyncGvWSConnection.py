@@ -0,0 +1,214 @@
+import asyncio
+import base64
+
+import aiohttp
+
+from GvWSConnection import (GvWSConnection, GvException, QuoteFields, TimeSeriesFields, ForwardCurveValueType,
+                            FillMethod, FillFrequency, _TableStream)
+
+_RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class AsyncGvWSConnection(GvWSConnection):
+    """
+    asyncio variant of GvWSConnection.
+
+    Exposes the same API (get_daily, get_daily_range, get_weekly, ..., get_intraday, get_curve, get_quote),
+    but every call is a coroutine and has to be awaited, and iter_daily / iter_intraday are async iterators.
+    Queries are built by the same code as in GvWSConnection (_prepare_query, TsEnum, ConvertedSymbol, request
+    splitting), only the I/O runs on a pooled aiohttp session. At most max_concurrency requests are in flight
+    at any time, so hundreds of calls can be gathered in one event loop.
+
+        async with AsyncGvWSConnection(user, password) as conn:
+            bars = await asyncio.gather(*(conn.get_daily(s, start_date=start) for s in symbols))
+
+    The session and the concurrency limit belong to the event loop they are first used in; a connection used
+    from another loop (e.g. a second asyncio.run) gets a new session and limit there.
+    """
+
+    def __init__(self, username, password, *, max_concurrency=8, **kwargs):
+        """
+        :param username: GvWS user name
+        :param password: GvWS password
+        :param max_concurrency: max number of requests in flight at the same time (int)
+        :param kwargs: connection options, see GvWSConnection
+        """
+        if kwargs.get('cache') is not None:
+            raise ValueError("DailyBarCache is not supported by the async client")
+
+        super().__init__(username, password, **kwargs)
+        self.max_concurrency = max_concurrency
+        credentials = base64.b64encode(f"{username}:{password}".encode('utf-8')).decode('ascii')
+        self._headers = {'Authorization': f"Basic {credentials}"}
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    def _get_client(self):
+        # aiohttp sessions and asyncio semaphores are bound to the loop they are used in, so both are created
+        # on first use in the running loop
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.closed or self._loop is not loop:
+            if isinstance(self.timeout, tuple):
+                timeout = aiohttp.ClientTimeout(sock_connect=self.timeout[0], sock_read=self.timeout[1])
+            else:
+                timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+            connector = aiohttp.TCPConnector(limit=self.pool_size, force_close=not self.keep_alive)
+            self._client = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self._headers)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    def _request_slot(self):
+        """ The running loop's limit of max_concurrency requests in flight. """
+        self._get_client()
+        return self._semaphore
+
+    async def aclose(self):
+        """ Close all pooled connections. """
+        if self._client is not None:
+            if self._loop is asyncio.get_running_loop():
+                await self._client.close()
+            self._client = None
+            self._semaphore = None
+            self._loop = None
+
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def _backoff(self, attempt):
+        return self.backoff_factor * (2 ** attempt)
+
+    async def _open(self, url):
+        """ GET url, retrying connection errors and 5xx responses. The caller releases the response. """
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = await self._get_client().get(url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+
+                raise GvException("Request failed: {}".format(e), e)
+
+            if result.status in _RETRY_STATUSES and attempt < self.max_retries:
+                result.release()
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            return result
+
+    @staticmethod
+    async def _raise_for_status(result):
+        if result.status != 200:
+            error_text = await result.text()
+            if error_text is None or len(error_text) == 0:
+                error_text = "HTTP error, code: {}".format(result.status)
+
+            raise GvException(error_text)
+
+    async def _fetch_text(self, url):
+        async with self._request_slot():
+            async with await self._open(url) as result:
+                try:
+                    await self._raise_for_status(result)
+                    return await result.text()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    raise GvException("Request failed: {}".format(e), e)
+
+    async def _iter_table(self, url, convert_to_local_time=False, as_frame=False, chunk_size=10000):
+        """ Async counterpart of GvWSConnection._iter_table: rows are parsed while the body is received. """
+        async with self._request_slot():
+            async with await self._open(url) as result:
+                stream = _TableStream(convert_to_local_time, as_frame, chunk_size)
+                try:
+                    await self._raise_for_status(result)
+                    encoding = result.get_encoding()
+                    async for line in result.content:
+                        for item in stream.feed(line.decode(encoding).rstrip('\r\n')):
+                            yield item
+
+                    for item in stream.finish():
+                        yield item
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    raise GvException("Request failed: {}".format(e), e)
+
+    async def _fetch_data(self, url):
+        txt = await self._fetch_text(url)
+        return txt.splitlines()
+
+    async def _get_timeseries(self, bar_interval, symbols, fields, grouped, *, as_frame=False, **query_args):
+        queries, process_times, dates_split = self._timeseries_queries(bar_interval, symbols, fields, grouped,
+                                                                       **query_args)
+
+        async def fetch(query):
+            txt = await self._fetch_text(query)
+            if as_frame:
+                return self._process_table_frame(txt, process_times)
+
+            return self._process_table_data(txt.splitlines(), process_times)
+
+        parts = await asyncio.gather(*(fetch(query) for query in queries))
+        return self._finish_timeseries(list(parts), grouped, as_frame, dates_split)
+
+    async def _iter_timeseries(self, bar_interval, symbols, fields, *, as_frame=False, chunk_size=None, **query_args):
+        queries, process_times, _ = self._timeseries_queries(bar_interval, symbols, fields, False,
+                                                             split_dates=False, **query_args)
+        for query in queries:
+            async for item in self._iter_table(query, process_times, as_frame=as_frame, chunk_size=chunk_size or 10000):
+                yield item
+
+    def iter_daily(self, symbols, fields=TimeSeriesFields.ALL, *,
+                   start_date=None, end_date=None, num_of_bars=None,
+                   fill_method=FillMethod.NoFill, fill_frequency=FillFrequency.SevenDays,
+                   lead_lag_options=None, iso_hour_selection=None, as_frame=False, chunk_size=None):
+        """ Stream daily prices, as an async iterator (async for). See GvWSConnection.iter_daily. """
+
+        return self._iter_timeseries(self.TsEnum.days, symbols, fields,
+                                     start_date=start_date, end_date=end_date, num_of_bars=num_of_bars,
+                                     fill_method=fill_method, fill_frequency=fill_frequency,
+                                     lead_lag_options=lead_lag_options, iso_hour_selection=iso_hour_selection,
+                                     as_frame=as_frame, chunk_size=chunk_size)
+
+    def iter_intraday(self, symbols, fields=TimeSeriesFields.INTRADAY, bar_interval=5, *,
+                      start_date=None, end_date=None, days_back=None, use_local_time=False,
+                      fill_method=FillMethod.NoFill, fill_frequency=FillFrequency.SevenDays,
+                      lead_lag_options=None, iso_hour_selection=None, as_frame=False, chunk_size=None):
+        """ Stream intraday prices, as an async iterator (async for). See GvWSConnection.iter_intraday. """
+
+        return self._iter_timeseries(self.TsEnum.intraday, symbols, fields,
+                                     start_date=start_date, end_date=end_date, num_of_bars=days_back,
+                                     fill_method=fill_method, fill_frequency=fill_frequency,
+                                     lead_lag_options=lead_lag_options, iso_hour_selection=iso_hour_selection,
+                                     intraday_interval=bar_interval, intraday_local_time=use_local_time,
+                                     as_frame=as_frame, chunk_size=chunk_size)
+
+    async def get_quote(self, symbols, fields=QuoteFields.STANDARD, as_frame=False):
+        """ Get quotes. See GvWSConnection.get_quote. """
+
+        query = self._prepare_query(self._quote_rq, symbols, fields)
+        txt = await self._fetch_text(query)
+        if as_frame:
+            return self._process_table_frame(txt)
+
+        return self._process_table_data(txt.splitlines())
+
+    async def get_curve(self, roots, fields=TimeSeriesFields.ALL, curve_date=None,
+                        curve_type=ForwardCurveValueType.Price, grouped=False, as_frame=False):
+        """ Get forward curve. See GvWSConnection.get_curve. """
+
+        query_string = self._curve_query(roots, fields, curve_date, curve_type)
+        txt = await self._fetch_text(query_string)
+
+        if as_frame:
+            frame = self._process_table_frame(txt)
+            return self._group_frame(frame) if grouped else frame
+
+        lines = self._process_table_data(txt.splitlines())
+        return self._group_rows(lines) if grouped else lines
@@ -1,8 +1,16 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import datetime
 import time
 import urllib
+import io
+import csv
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from dateutil import tz
 
 
 class GvException(Exception):
@@ -285,6 +293,10 @@ _fields_names_helper = {
 }
 
 
+def _as_date(value):
+    return value.date() if isinstance(value, datetime.datetime) else value
+
+
 def _time_to_local_time(utc_datetime):
     epoch = time.mktime(utc_datetime.timetuple())
     offset = datetime.datetime.fromtimestamp(epoch) - datetime.datetime.utcfromtimestamp(epoch)
@@ -342,6 +354,99 @@ class GviResult(OrderedDict):
                 self[header_name] = field_value
 
 
+def _frame_date_column(values, convert_to_local_time=False):
+    dates = pd.to_datetime(values, format="%m/%d/%Y %I:%M:%S %p", errors="coerce")
+    missing = dates.isna() & (values != "")
+    if missing.any():
+        dates[missing] = pd.to_datetime(values[missing], format="%m/%d/%Y", errors="coerce")
+
+    if convert_to_local_time:
+        dates = dates.dt.tz_localize("UTC").dt.tz_convert(tz.tzlocal()).dt.tz_localize(None)
+
+    return dates
+
+
+def _frame_int_column(values):
+    nums = pd.to_numeric(values, errors="coerce")
+    return nums.where(nums == nums.round()).astype("Int64")
+
+
+def _table_frame(header_fields, body, convert_to_local_time=False):
+    """
+    Vectorized counterpart of building GviResult rows: parses TSV body lines into a DataFrame with
+    typed columns (float64 for prices, Int64 for counts, datetime64 for dates).
+    """
+    names = [h.lower() for h in header_fields]
+    if len(body.strip()) == 0:
+        frame = pd.DataFrame({name: pd.Series(dtype=str) for name in names})
+    else:
+        frame = pd.read_csv(io.StringIO(body), sep="\t", header=None, names=names, dtype=str,
+                            keep_default_na=False, na_filter=False, quoting=csv.QUOTE_NONE,
+                            on_bad_lines="skip")
+
+    for name in names:
+        fn = _fields_conversion.get(name, None)
+        if fn is _parse_float:
+            frame[name] = pd.to_numeric(frame[name], errors="coerce").astype("float64")
+        elif fn is _parse_int:
+            frame[name] = _frame_int_column(frame[name])
+        elif fn is _parse_date:
+            frame[name] = _frame_date_column(frame[name], convert_to_local_time)
+
+    return frame
+
+
+class _TableStream:
+    """
+    Parses a table response line by line while it is being received: the header line once, then the rows
+    either one by one as GviResult objects, or in DataFrame chunks of chunk_size rows. feed() and finish()
+    return the items that are complete, so the sync and the async iterators share the parsing.
+    """
+
+    def __init__(self, convert_to_local_time=False, as_frame=False, chunk_size=10000):
+        self.convert_to_local_time = convert_to_local_time
+        self.as_frame = as_frame
+        self.chunk_size = chunk_size
+        self.header_line = None
+        self.header_fields = None
+        self.row_count = 0
+        self._batch = []
+
+    def _flush(self):
+        frame = _table_frame(self.header_fields, '\n'.join(self._batch), self.convert_to_local_time)
+        self._batch = []
+        return frame
+
+    def feed(self, line):
+        if self.header_fields is None:
+            self.header_line = line
+            self.header_fields = line.split('\t')
+            return ()
+
+        if len(line) == 0:
+            return ()
+
+        self.row_count += 1
+        if self.as_frame:
+            self._batch.append(line)
+            return (self._flush(),) if len(self._batch) >= self.chunk_size else ()
+
+        result_fields = line.split('\t')
+        if len(result_fields) != len(self.header_fields):
+            return ()
+
+        return (GviResult(self.header_fields, result_fields, self.convert_to_local_time),)
+
+    def finish(self):
+        if self.header_fields is None:
+            raise GvException("Invalid server response")
+
+        if self.row_count == 0 and len(self.header_fields) < 2:
+            raise GvException("Invalid server response: " + self.header_line)
+
+        return (self._flush(),) if self.as_frame and len(self._batch) > 0 else ()
+
+
 class Units:
     BBL = "BBL"  # Barrels
     LTR = "LTR"  # Liters
@@ -493,9 +598,36 @@ class GvWSConnection:
     Encapsulates web service calls
     """
 
-    def __init__(self, username, password):
+    def __init__(self, username, password, *, pool_size=10, keep_alive=True, timeout=(10, 120),
+                 max_retries=3, backoff_factor=0.5, max_symbols_per_request=10, max_days_per_request=5 * 365,
+                 max_workers=4, cache=None):
+        """
+        :param username: GvWS user name
+        :param password: GvWS password
+        :param pool_size: max number of pooled connections kept open to the web service (int)
+        :param keep_alive: reuse connections between requests (bool)
+        :param timeout: per-request timeout in seconds, either a number or (connect, read) tuple
+        :param max_retries: how many times a request is retried on 5xx responses and connection resets (int)
+        :param backoff_factor: retry backoff, n-th retry waits backoff_factor * 2 ** (n - 1) seconds (float)
+        :param max_symbols_per_request: time series requests for more symbols are split into several
+                                        sub-requests (int, None disables splitting)
+        :param max_days_per_request: start_date - end_date ranges longer than this are split into several
+                                     sub-requests (int, None disables splitting)
+        :param max_workers: max number of sub-requests running concurrently (int)
+        :param cache: optional DailyBarCache; plain start_date - end_date get_daily requests are then served from
+                      the local cache and only missing bars are downloaded
+        """
         self.username = username
         self.password = password
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_symbols_per_request = max_symbols_per_request
+        self.max_days_per_request = max_days_per_request
+        self.max_workers = max_workers
+        self.cache = cache
 
         self._url_base = 'http://webservice.gvsi.com/gvsi/query/htsv/'
         self._quote_rq = 'GetQuotes/{}?{}'
@@ -503,9 +635,35 @@ class GvWSConnection:
         self._intraday_rq = 'GetIntraday/{}?{}'
         self._curve_rq = 'GetForwardCurve/{}?{}'
 
-    def _fetch_data(self, url):
+        retry = Retry(total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+                      backoff_factor=backoff_factor, status_forcelist=(500, 502, 503, 504),
+                      allowed_methods=frozenset(['GET']), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self._session = requests.Session()
+        self._session.auth = (self.username, self.password)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        if not keep_alive:
+            self._session.headers['Connection'] = 'close'
+
+    def close(self):
+        """ Close all pooled connections. """
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _fetch_text(self, url):
         # query_string = self._url_base + url
-        result = requests.get(url, auth=(self.username, self.password))
+        try:
+            result = self._session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise GvException("Request failed: {}".format(e), e)
+
         txt = result.text
 
         if result.status_code != 200:
@@ -515,9 +673,43 @@ class GvWSConnection:
 
             raise GvException(error_text)
 
-        lines = txt.splitlines()
+        return txt
+
+    def _fetch_data(self, url):
+        lines = self._fetch_text(url).splitlines()
         return lines
 
+    def _iter_table(self, url, convert_to_local_time=False, as_frame=False, chunk_size=10000):
+        """
+        Streams the response body and parses it while it is being received (see _TableStream). Rows are
+        yielded either one by one as GviResult objects, or in DataFrame chunks of chunk_size rows.
+        Only the current chunk is kept in memory.
+        """
+        try:
+            result = self._session.get(url, timeout=self.timeout, stream=True)
+        except requests.RequestException as e:
+            raise GvException("Request failed: {}".format(e), e)
+
+        with result:
+            if result.status_code != 200:
+                error_text = result.text
+                if error_text is None or len(error_text) == 0:
+                    error_text = "HTTP error, code: {}".format(result.status_code)
+
+                raise GvException(error_text)
+
+            if result.encoding is None:
+                result.encoding = 'utf-8'
+
+            stream = _TableStream(convert_to_local_time, as_frame, chunk_size)
+            try:
+                for line in result.iter_lines(chunk_size=64 * 1024, decode_unicode=True):
+                    yield from stream.feed(line)
+
+                yield from stream.finish()
+            except requests.RequestException as e:
+                raise GvException("Request failed: {}".format(e), e)
+
     @staticmethod
     def _process_table_data(lines, convert_to_local_time=False):
         if len(lines) == 1:
@@ -549,6 +741,38 @@ class GvWSConnection:
 
         return ret_array
 
+    @staticmethod
+    def _process_table_frame(txt, convert_to_local_time=False):
+        header_line, _, body = txt.partition('\n')
+        header_fields = header_line.rstrip('\r').split('\t')
+
+        if len(body.strip()) == 0 and len(header_fields) < 2:
+            msg = "Invalid server response"
+            if len(header_line) > 0:
+                msg += ": " + header_line
+
+            raise GvException(msg)
+
+        return _table_frame(header_fields, body, convert_to_local_time)
+
+    @staticmethod
+    def _group_rows(lines):
+        groups = {}
+        for row in lines:
+            symbol = row.symbol
+            group = groups.get(symbol, None)
+            if group is None:
+                group = []
+                groups[symbol] = group
+            group.append(row)
+
+        return groups
+
+    @staticmethod
+    def _group_frame(frame):
+        return {symbol: group.reset_index(drop=True)
+                for symbol, group in frame.groupby(TimeSeriesFields.symbol, sort=False)}
+
     def _prepare_query(self, query_preffix, symbols, fields, symbol_field_name='pricesymbol', check_for_symbol=None):
         if symbols is None: 
             raise ValueError("Symbol(s) missing")
@@ -591,11 +815,11 @@ class GvWSConnection:
 
         ALL = [days, weeks, months, contract_months, quarters, years, intraday]
 
-    def _get_timeseries(self, bar_interval, symbols, fields, grouped, *,
-                        start_date=None, end_date=None, num_of_bars=None,
-                        fill_method=FillMethod.NoFill, fill_frequency=FillFrequency.SevenDays,
-                        lead_lag_options=None, iso_hour_selection=None,
-                        intraday_interval=None, intraday_local_time=False):
+    def _timeseries_query(self, bar_interval, symbols, fields, grouped, *,
+                          start_date=None, end_date=None, num_of_bars=None,
+                          fill_method=FillMethod.NoFill, fill_frequency=FillFrequency.SevenDays,
+                          lead_lag_options=None, iso_hour_selection=None,
+                          intraday_interval=None, intraday_local_time=False):
 
         if symbols is None: 
             raise ValueError("Symbol(s) missing")
@@ -663,33 +887,213 @@ class GvWSConnection:
             h = '&normalizemethod="1"&aggregatetype="{}"'.format(iso_hour_selection)
             query_string += h
 
-        ret = self._fetch_data(query_string)
-        lines = self._process_table_data(ret, process_times)
+        return query_string, process_times
+
+    def _split_request(self, symbols, start_date=None, end_date=None, num_of_bars=None, split_dates=True):
+        """
+        Splits one request into bounded sub-requests: the symbol list into chunks of max_symbols_per_request,
+        and a start_date - end_date range into consecutive windows of max_days_per_request days.
+        Returns (symbols, start_date, end_date) tuples in merge order (symbol chunk first, then date window).
+        """
+        if isinstance(symbols, str) or isinstance(symbols, ConvertedSymbol):
+            symbols_list = [symbols]
+        else:
+            symbols_list = list(symbols)
+
+        size = self.max_symbols_per_request or len(symbols_list) or 1
+        symbol_chunks = [symbols_list[i:i + size] for i in range(0, len(symbols_list), size)] or [symbols_list]
+
+        windows = [(start_date, end_date)]
+        days = self.max_days_per_request
+        if split_dates and days and start_date is not None and num_of_bars is None:
+            last = _as_date(end_date) if end_date is not None else datetime.date.today()
+            window_start = _as_date(start_date)
+            windows = []
+            while window_start + datetime.timedelta(days=days) <= last:
+                window_end = window_start + datetime.timedelta(days=days - 1)
+                windows.append((window_start, window_end))
+                window_start = window_end + datetime.timedelta(days=1)
+
+            windows.append((window_start, end_date))
+            windows[0] = (start_date, windows[0][1])
+
+        return [(chunk, start, end) for chunk in symbol_chunks for start, end in windows]
+
+    def _timeseries_queries(self, bar_interval, symbols, fields, grouped, *, split_dates=True, **query_args):
+        # filled or lead/lag shifted series depend on bars outside of the window, so only plain ranges are split
+        split_dates = split_dates and query_args.get('lead_lag_options') is None and \
+            query_args.get('fill_method', FillMethod.NoFill) in (None, FillMethod.NoFill)
+
+        parts = self._split_request(symbols, query_args.get('start_date'), query_args.get('end_date'),
+                                    query_args.get('num_of_bars'), split_dates)
+        dates_split = len(set(start for _, start, _ in parts)) > 1
+
+        # the merge regroups the rows of split date windows by symbol, so every part must have the symbol column
+        fields = list(fields)
+        if dates_split and TimeSeriesFields.symbol not in [f.lower() for f in fields]:
+            fields.insert(0, TimeSeriesFields.symbol)
+
+        queries = []
+        process_times = False
+        for chunk, start, end in parts:
+            args = dict(query_args, start_date=start, end_date=end)
+            query_string, process_times = self._timeseries_query(bar_interval, chunk, fields, grouped, **args)
+            queries.append(query_string)
+
+        return queries, process_times, dates_split
+
+    def _fetch_parallel(self, fn, queries):
+        if len(queries) == 1 or not self.max_workers or self.max_workers <= 1:
+            return [fn(query) for query in queries]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(queries))) as executor:
+            return list(executor.map(fn, queries))
+
+    @staticmethod
+    def _merge_table_parts(parts, as_frame, regroup=False):
+        """
+        Merges sub-request results in request order. If the date range was split, rows are regrouped
+        (stable) by symbol, so every symbol's bars stay contiguous and in date order as in a single request.
+        """
+        if len(parts) == 1:
+            return parts[0]
+
+        if as_frame:
+            frames = [part for part in parts if len(part) > 0] or parts[:1]
+            frame = pd.concat(frames, ignore_index=True)
+            if regroup and TimeSeriesFields.symbol in frame.columns:
+                codes, _ = pd.factorize(frame[TimeSeriesFields.symbol])
+                frame = frame.iloc[codes.argsort(kind='stable')].reset_index(drop=True)
+
+            return frame
+
+        # empty responses come back as a single row of None values - drop those unless nothing else is left
+        rows = [row for part in parts for row in part if any(v is not None for v in row.values())]
+        if len(rows) == 0:
+            return parts[0]
+
+        if regroup:
+            groups = OrderedDict()
+            for row in rows:
+                groups.setdefault(row.get(TimeSeriesFields.symbol), []).append(row)
+
+            rows = [row for group in groups.values() for row in group]
+
+        return rows
+
+    def _get_timeseries(self, bar_interval, symbols, fields, grouped, *, as_frame=False, **query_args):
+        queries, process_times, dates_split = self._timeseries_queries(bar_interval, symbols, fields, grouped,
+                                                                       **query_args)
+
+        if as_frame:
+            def fetch(query):
+                return self._process_table_frame(self._fetch_text(query), process_times)
+        else:
+            def fetch(query):
+                return self._process_table_data(self._fetch_data(query), process_times)
+
+        parts = self._fetch_parallel(fetch, queries)
+        return self._finish_timeseries(parts, grouped, as_frame, dates_split)
+
+    def _finish_timeseries(self, parts, grouped, as_frame, dates_split):
+        data = self._merge_table_parts(parts, as_frame, regroup=dates_split)
 
         if not grouped:
-            return lines
+            return data
 
-        groups = {}
-        for row in lines:
-            symbol = row.symbol
-            group = groups.get(symbol, None)
-            if group is None:
-                group = []
-                groups[symbol] = group
-            group.append(row)
+        return self._group_frame(data) if as_frame else self._group_rows(data)
 
-        return groups
+    def _iter_timeseries(self, bar_interval, symbols, fields, *, as_frame=False, chunk_size=None, **query_args):
+        # only the symbol list is split here, so rows keep coming in the same order as from a single request
+        queries, process_times, _ = self._timeseries_queries(bar_interval, symbols, fields, False,
+                                                             split_dates=False, **query_args)
+
+        def iterate():
+            for query in queries:
+                yield from self._iter_table(query, process_times, as_frame=as_frame, chunk_size=chunk_size or 10000)
+
+        return iterate()
+
+    def _fetch_daily_lines(self, symbol, from_date, to_date):
+        query_string, _ = self._timeseries_query(self.TsEnum.days, symbol, list(TimeSeriesFields.ALL), False,
+                                                 start_date=from_date, end_date=to_date)
+        lines = self._fetch_data(query_string)
+        if len(lines) == 0 or (len(lines) == 1 and len(lines[0].split('\t')) < 2):
+            msg = "Invalid server response"
+            if len(lines) == 1:
+                msg += ": " + lines[0]
+
+            raise GvException(msg)
+
+        header_fields = [h.lower() for h in lines[0].split('\t')]
+        date_index = header_fields.index(TimeSeriesFields.trade_date)
+
+        rows = []
+        for line in lines[1:]:
+            result_fields = line.split('\t')
+            if len(result_fields) != len(header_fields):
+                continue
+
+            bar_date = _parse_date(result_fields[date_index])
+            if bar_date is not None:
+                rows.append((bar_date.date().isoformat(), line))
+
+        return lines[0], rows
+
+    def _get_daily_cached(self, symbols, fields, grouped, start_date, end_date, as_frame):
+        if isinstance(symbols, str) or isinstance(symbols, ConvertedSymbol):
+            symbols_list = [symbols]
+        else:
+            symbols_list = list(symbols)
 
-    def get_quote(self, symbols, fields=QuoteFields.STANDARD):
+        fields = [f.lower() for f in fields]
+        if grouped and TimeSeriesFields.symbol not in fields:
+            fields.insert(0, TimeSeriesFields.symbol)
+
+        def load(symbol):
+            return self.cache.get('gvws', str(symbol), start_date, end_date,
+                                  lambda from_date, to_date: self._fetch_daily_lines(symbol, from_date, to_date))
+
+        if not symbols_list:
+            data = _table_frame(fields, '') if as_frame else []
+            return (self._group_frame(data) if as_frame else self._group_rows(data)) if grouped else data
+
+        parts = self._fetch_parallel(load, symbols_list)
+
+        # project cached rows (all TimeSeriesFields) on the requested fields, then decode as usual
+        header_fields = [h.lower() for h in parts[0][0].split('\t')]
+        indexes = [header_fields.index(f) for f in fields]
+        header = '\t'.join(parts[0][0].split('\t')[i] for i in indexes)
+        lines = []
+        for _, part_lines in parts:
+            for line in part_lines:
+                result_fields = line.split('\t')
+                lines.append('\t'.join(result_fields[i] for i in indexes))
+
+        if as_frame:
+            data = _table_frame(header.split('\t'), '\n'.join(lines))
+        else:
+            data = self._process_table_data([header] + lines)
+
+        if not grouped:
+            return data
+
+        return self._group_frame(data) if as_frame else self._group_rows(data)
+
+    def get_quote(self, symbols, fields=QuoteFields.STANDARD, as_frame=False):
         """ Get quotes.
         
         :param symbols: individual symbol name or list of symbol names. Symbol name can be either a string,
                         or instance of ConvertedSymbol class, if conversion is needed
         :param fields: list of field names. See QuoteFields class.
+        :param as_frame: return a typed pandas DataFrame (one row per symbol) instead of GviResult objects
         :return: list of GviResult objects, each representing quote data for one symbol
         """
 
         query = self._prepare_query(self._quote_rq, symbols, fields)
+        if as_frame:
+            return self._process_table_frame(self._fetch_text(query))
+
         data = self._fetch_data(query)
         ret_list = self._process_table_data(data)
         return ret_list
@@ -697,7 +1101,7 @@ class GvWSConnection:
     def get_daily(self, symbols, fields=TimeSeriesFields.ALL, *, grouped=False,
                   start_date=None, end_date=None, num_of_bars=None,
                   fill_method=FillMethod.NoFill, fill_frequency=FillFrequency.SevenDays,
-                  lead_lag_options=None, iso_hour_selection=None):
+                  lead_lag_options=None, iso_hour_selection=None, as_frame=False):
 
         """ Get daily prices.
         
@@ -717,14 +1121,53 @@ class GvWSConnection:
         :param fill_frequency: how missing days should be filled. See FillFrequency class. 
         :param lead_lag_options: object of LeadLagOptions class
         :param iso_hour_selection: ISO hour selection. See AggregateType class for available options
+        :param as_frame: return typed pandas DataFrame(s) decoded in one vectorized pass instead of GviResult lists
         :return: depends of grouped param - either list of GviResult objects, each representing one bar,
                            or dictionary of symbol names to GviResult bars lists
+                           (DataFrame / dictionary of DataFrames if as_frame is set)
         """
 
+        cacheable = start_date is not None and num_of_bars is None and lead_lag_options is None and \
+            iso_hour_selection is None and fill_method in (None, FillMethod.NoFill) and \
+            all(f.lower() in TimeSeriesFields.ALL for f in fields)
+        if self.cache is not None and cacheable:
+            return self._get_daily_cached(symbols, fields, grouped, start_date, end_date, as_frame)
+
         return self._get_timeseries(self.TsEnum.days, symbols, fields, grouped,
                                     start_date=start_date, end_date=end_date, num_of_bars=num_of_bars,
                                     fill_method=fill_method, fill_frequency=fill_frequency,
-                                    lead_lag_options=lead_lag_options, iso_hour_selection=iso_hour_selection)
+                                    lead_lag_options=lead_lag_options, iso_hour_selection=iso_hour_selection,
+                                    as_frame=as_frame)
+
+    def iter_daily(self, symbols, fields=TimeSeriesFields.ALL, *,
+                   start_date=None, end_date=None, num_of_bars=None,
+                   fill_method=FillMethod.NoFill, fill_frequency=FillFrequency.SevenDays,
+                   lead_lag_options=None, iso_hour_selection=None, as_frame=False, chunk_size=None):
+
+        """ Stream daily prices. Same request as get_daily, but the response is parsed while it is received,
+        so memory use is bounded by chunk_size rather than by the size of the whole response.
+
+        :param symbols: individual symbol name or list of symbol names. Symbol name can be either a string,
+                        or instance of ConvertedSymbol class, if conversion is needed
+        :param fields: list of field names. See TimeSeriesFields class.
+        :param start_date: optional start date of the period (date)
+        :param end_date:  optional end date of the period (date)
+        :param num_of_bars: optional number of bars should be returned,
+                          counting from end_date or today if end_date is None. (date)
+        :param fill_method: how to fill missing bars. See FillMethod class, and fill_frequency param.
+        :param fill_frequency: how missing days should be filled. See FillFrequency class.
+        :param lead_lag_options: object of LeadLagOptions class
+        :param iso_hour_selection: ISO hour selection. See AggregateType class for available options
+        :param as_frame: yield typed DataFrame chunks instead of individual GviResult rows
+        :param chunk_size: number of rows per DataFrame chunk (int, default 10000)
+        :return: generator of GviResult objects, each representing one bar, or of DataFrame chunks
+        """
+
+        return self._iter_timeseries(self.TsEnum.days, symbols, fields,
+                                     start_date=start_date, end_date=end_date, num_of_bars=num_of_bars,
+                                     fill_method=fill_method, fill_frequency=fill_frequency,
+                                     lead_lag_options=lead_lag_options, iso_hour_selection=iso_hour_selection,
+                                     as_frame=as_frame, chunk_size=chunk_size)
 
     def get_daily_tail(self, symbol, bars, lead_lag_options=None, currency=None, currency_source=None, conversion=None,
                        fill_method=FillMethod.NoFill, fill_frequency=FillFrequency.SevenDays,
@@ -1172,7 +1615,7 @@ class GvWSConnection:
     def get_intraday(self, symbols, fields=TimeSeriesFields.INTRADAY, bar_interval=5, *, grouped=False,
                      start_date=None, end_date=None, days_back=None, use_local_time=False,
                      fill_method=FillMethod.NoFill, fill_frequency=FillFrequency.SevenDays,
-                     lead_lag_options=None, iso_hour_selection=None):
+                     lead_lag_options=None, iso_hour_selection=None, as_frame=False):
 
         """ Get intraday prices.
         
@@ -1194,15 +1637,50 @@ class GvWSConnection:
         :param fill_frequency: how missing days should be filled. See FillFrequency class. 
         :param lead_lag_options: object of LeadLagOptions class
         :param iso_hour_selection: ISO hour selection. See AggregateType class for available options
+        :param as_frame: return typed pandas DataFrame(s) decoded in one vectorized pass instead of GviResult lists
         :return: depends of grouped param - either list of GviResult objects, each representing one bar,
                            or dictionary of symbol names to GviResult bars lists
+                           (DataFrame / dictionary of DataFrames if as_frame is set)
         """
         
         return self._get_timeseries(self.TsEnum.intraday, symbols, fields, grouped,
                                     start_date=start_date, end_date=end_date, num_of_bars=days_back,
                                     fill_method=fill_method, fill_frequency=fill_frequency,
                                     lead_lag_options=lead_lag_options, iso_hour_selection=iso_hour_selection,
-                                    intraday_interval=bar_interval, intraday_local_time=use_local_time)
+                                    intraday_interval=bar_interval, intraday_local_time=use_local_time,
+                                    as_frame=as_frame)
+
+    def iter_intraday(self, symbols, fields=TimeSeriesFields.INTRADAY, bar_interval=5, *,
+                      start_date=None, end_date=None, days_back=None, use_local_time=False,
+                      fill_method=FillMethod.NoFill, fill_frequency=FillFrequency.SevenDays,
+                      lead_lag_options=None, iso_hour_selection=None, as_frame=False, chunk_size=None):
+
+        """ Stream intraday prices. Same request as get_intraday, parsed while it is received.
+
+        :param symbols: individual symbol name or list of symbol names. Symbol name can be either a string,
+                        or instance of ConvertedSymbol class, if conversion is needed
+        :param fields: list of field names. See TimeSeriesFields class.
+        :param bar_interval: intraday bar interval (int).
+        :param start_date: optional start date of the period (date)
+        :param end_date:  optional end date of the period (date)
+        :param days_back: optional number of days back should be returned,
+                          counting from end_date or today if end_date is None. (date)
+        :param use_local_time: convert bar time to local time (bool)
+        :param fill_method: how to fill missing bars. See FillMethod class, and fill_frequency param.
+        :param fill_frequency: how missing days should be filled. See FillFrequency class.
+        :param lead_lag_options: object of LeadLagOptions class
+        :param iso_hour_selection: ISO hour selection. See AggregateType class for available options
+        :param as_frame: yield typed DataFrame chunks instead of individual GviResult rows
+        :param chunk_size: number of rows per DataFrame chunk (int, default 10000)
+        :return: generator of GviResult objects, each representing one bar, or of DataFrame chunks
+        """
+
+        return self._iter_timeseries(self.TsEnum.intraday, symbols, fields,
+                                     start_date=start_date, end_date=end_date, num_of_bars=days_back,
+                                     fill_method=fill_method, fill_frequency=fill_frequency,
+                                     lead_lag_options=lead_lag_options, iso_hour_selection=iso_hour_selection,
+                                     intraday_interval=bar_interval, intraday_local_time=use_local_time,
+                                     as_frame=as_frame, chunk_size=chunk_size)
 
     def get_intraday_tail(self, symbol, days, minutes, use_local_time=False, fields=TimeSeriesFields.INTRADAY,
                           currency=None, currency_source=None, conversion=None, iso_hour_selection=None):
@@ -1265,7 +1743,7 @@ class GvWSConnection:
                                     iso_hour_selection=iso_hour_selection)
 
     def get_curve(self, roots, fields=TimeSeriesFields.ALL, curve_date=None, curve_type=ForwardCurveValueType.Price,
-                  grouped=False):
+                  grouped=False, as_frame=False):
 
         """ Get forward curve
         
@@ -1276,10 +1754,27 @@ class GvWSConnection:
         :param curve_type: See ForwardCurveValueType class for list of valid types
         :param grouped: should the function return flat list of results (grouped=False) or dictionary of symbol names
                         to list of results for particular symbol.
+        :param as_frame: return typed pandas DataFrame(s) decoded in one vectorized pass instead of GviResult lists
         :return: depends of grouped param - either list of GviResult objects, each representing one symbol,
                            or dictionary of symbol names to GviResult lists
+                           (DataFrame / dictionary of DataFrames if as_frame is set)
         """
 
+        query_string = self._curve_query(roots, fields, curve_date, curve_type)
+
+        if as_frame:
+            frame = self._process_table_frame(self._fetch_text(query_string))
+            return self._group_frame(frame) if grouped else frame
+
+        ret = self._fetch_data(query_string)
+        lines = self._process_table_data(ret)
+
+        if not grouped:
+            return lines
+
+        return self._group_rows(lines)
+
+    def _curve_query(self, roots, fields, curve_date, curve_type):
         if roots is None:
             raise ValueError("Root(s) missing")
 
@@ -1297,23 +1792,7 @@ class GvWSConnection:
             query_string += "&curvedate2=" + dt
 
         query_string += "&curvevaluetype={}".format(curve_type)
-
-        ret = self._fetch_data(query_string)
-        lines = self._process_table_data(ret)
-
-        if not grouped:
-            return lines
-
-        groups = {}
-        for row in lines:
-            symbol = row.symbol
-            group = groups.get(symbol, None)
-            if group is None:
-                group = []
-                groups[symbol] = group
-            group.append(row)
-
-        return groups
+        return query_string
 
     def get_forward_curve(self, symbol, curve_date=None, curve_type=ForwardCurveValueType.Price,
                           currency=None, currency_source=None, conversion=None):
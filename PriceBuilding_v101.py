@@ -1,161 +1,191 @@
 from seasonalFunctions import *
-from itertools import product
+import numpy as np
 import pandas as pd 
-from datetime import datetime, timedelta
 import ast
-from sqlalchemy import create_engine, text
-from urllib import parse
+import argparse
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from cache_keys import canonical_key
+from contract_margins_writer import (get_writer, CONTRACT_MARGINS_COLUMNS, SEASONAL_COLUMNS, STATS_COLUMNS,
+                                     DEFINITION_COLUMNS, BUILD_COLUMNS, PRESET_COLUMNS)
+from preset_store import write_snapshot, update_snapshot, snapshot_build_id
+from sqlalchemy import inspect, MetaData, Table, select, func, and_, or_
+from db_engine import create_db_engine
 from dotenv import load_dotenv
 import os
 
+parser = argparse.ArgumentParser(description="Build preset spreads into the contractMargins table.")
+parser.add_argument("--full", action="store_true",
+                    help="recompute every preset and replace the whole table (default: only new bars, "
+                         "and presets added or edited in PriceAnalyzerIn.csv)")
+parser.add_argument("--workers", type=int, default=1,
+                    help="number of presets built in parallel (default: 1)")
+args = parser.parse_args()
+
 # Load environment variables from .env file
 load_dotenv("credential.env")
 
 reference_schemaName = os.getenv("reference_schemaName")
 future_expiry_table_Name = os.getenv("future_expiry_table_Name")
 
-# Get connection parameters from environment variables
-connection_params = {
-    "server": os.getenv("DB_SERVER"),
-    "database": os.getenv("DB_NAME"),
-    "username": os.getenv("DB_USERNAME"),
-    "password": os.getenv("DB_PASSWORD"),
-}
-
-connecting_string = (
-    f"Driver={{ODBC Driver 18 for SQL Server}};"
-    f"Server={connection_params['server']};"
-    f"Database={connection_params['database']};"
-    f"Uid={connection_params['username']};"
-    f"Pwd={connection_params['password']};"
-    f"Encrypt=yes;"
-    f"TrustServerCertificate=no;"
-    f"Connection Timeout=30;"
-)
-
-params = parse.quote_plus(connecting_string)
-engine = create_engine(f"mssql+pyodbc:///?odbc_connect={params}", fast_executemany=True)
-
 futuresContractDict= {'F':{'abr':'Jan','num':1},'G':{'abr':'Feb','num':2},'H':{'abr':'Mar','num':3},'J':{'abr':'Apr','num':4},
                       'K':{'abr':'May','num':5},'M':{'abr':'Jun','num':6},'N':{'abr':'Jul','num':7},'Q':{'abr':'Aug','num':8},
                       'U':{'abr':'Sep','num':9},'V':{'abr':'Oct','num':10},'X':{'abr':'Nov','num':11},'Z':{'abr':'Dec','num':12}}
 
+OUTPUT_SCHEMA = 'TradePriceAnalyzer'
+OUTPUT_TABLE = 'contractMargins'
+SEASONAL_TABLE = 'contractMarginsSeasonal'
+STATS_TABLE = 'contractMarginsStats'
+DEFINITIONS_TABLE = 'contractMarginsPresets'
+BUILD_TABLE = 'contractMarginsBuild'
+
+# Arrow snapshot of the three tables, memory-mapped by the dashboards
+SNAPSHOT_DIR = os.getenv("PRESET_SNAPSHOT_DIR", "preset_snapshot")
+
+# Expired contract-years are not recomputed once their LastTrade is this many days in the past
+SETTLED_AFTER_DAYS = 7
+
+# SQL Server from credential.env, or DB_URL (e.g. sqlite:///offline.sqlite) to run without it
+engine = create_db_engine([reference_schemaName, OUTPUT_SCHEMA])
+
 query = f"SELECT * FROM {reference_schemaName}.{future_expiry_table_Name}" 
 
 expire = pd.read_sql(query,con=engine)
 
-df_out = pd.DataFrame({})
+# Construct full ticker-month-year strings
+expire['TickerMonthYear'] = expire['Ticker'] + expire['MonthCode'] + expire['LastTrade'].str.slice(-2)
 
-# Load the CSV using the first row as column headers
-curvesIn = pd.read_csv("PriceAnalyzerIn.csv", header=0)
 
-# Loop through each row in the DataFrame
-for index, row in curvesIn.iterrows():
-    variables = {}
-    for name in curvesIn.columns:
-        value = row[name]
-        try:
-            # Try to convert string representations of lists/dicts into Python objects
-            parsed_value = ast.literal_eval(value)
-        except (ValueError, SyntaxError):
-            parsed_value = value
-        variables[name] = parsed_value
+def load_build_state():
+    """
+    Last stored Date, LastTrade and spread on that Date per preset and spread year, read back from the output
+    table. Returns None if the table does not exist yet (first run needs a full build).
+    """
+    if not inspect(engine).has_table(OUTPUT_TABLE, schema=OUTPUT_SCHEMA):
+        return None
+
+    table = Table(OUTPUT_TABLE, MetaData(), schema=OUTPUT_SCHEMA, autoload_with=engine)
+    key_cols = [table.c.InstrumentName, table.c.Group, table.c.Region, table.c.Month, table.c.Year]
+    last = select(*key_cols, func.max(table.c.Date).label('LastDate'),
+                  func.max(table.c.LastTrade).label('LastTrade')).group_by(*key_cols).subquery()
+    state_query = select(last, table.c.spread).join(
+        table, and_(*[last.c[col.name] == col for col in key_cols], last.c.LastDate == table.c.Date))
+
+    state = pd.read_sql(state_query, con=engine)
+    state['LastDate'] = pd.to_datetime(state['LastDate'])
+    state['LastTrade'] = pd.to_datetime(state['LastTrade'])
+    return {(r.InstrumentName, r.Group, r.Region, r.Month, str(r.Year)): (r.LastDate, r.LastTrade, r.spread)
+            for r in state.itertuples(index=False)}
+
+
+def load_stored_presets():
+    """Keys of the preset series stored in the output table."""
+    if not inspect(engine).has_table(OUTPUT_TABLE, schema=OUTPUT_SCHEMA):
+        return set()
+    table = Table(OUTPUT_TABLE, MetaData(), schema=OUTPUT_SCHEMA, autoload_with=engine)
+    stored = pd.read_sql(select(*[table.c[col] for col in PRESET_COLUMNS]).distinct(), con=engine)
+    return set(stored.itertuples(index=False, name=None))
+
 
+def load_presets(keys, batch_size=100):
+    """All stored rows of the preset series with the given keys, in one query per batch_size presets."""
+    table = Table(OUTPUT_TABLE, MetaData(), schema=OUTPUT_SCHEMA, autoload_with=engine)
+    keys = sorted(keys)
+    frames = []
+    for start in range(0, len(keys), batch_size):
+        query = select(table).where(or_(*[and_(*[table.c[col] == value for col, value in zip(PRESET_COLUMNS, key)])
+                                          for key in keys[start:start + batch_size]]))
+        frames.append(pd.read_sql(query, con=engine))
+
+    stored = (pd.concat(frames, ignore_index=True) if frames
+              else pd.DataFrame(columns=[col for col, _ in CONTRACT_MARGINS_COLUMNS]))
+    stored['Date'] = pd.to_datetime(stored['Date'])
+    stored['LastTrade'] = pd.to_datetime(stored['LastTrade'])
+    stored['Year'] = stored['Year'].astype(str)
+    return stored
+
+
+def read_table(name):
+    """Whole output table, with Date/LastTrade/AsOf as datetimes."""
+    if not inspect(engine).has_table(name, schema=OUTPUT_SCHEMA):
+        return pd.DataFrame()
+    table = Table(name, MetaData(), schema=OUTPUT_SCHEMA, autoload_with=engine)
+    frame = pd.read_sql(select(table), con=engine)
+    for col in ('Date', 'LastTrade', 'AsOf'):
+        if col in frame.columns:
+            frame[col] = pd.to_datetime(frame[col])
+    return frame
+
+
+def preset_key(variables):
+    """(InstrumentName, Group, Region, Month) of a preset, as stored in the output tables."""
+    return tuple(str(variables[name]) for name in ('Name', 'group', 'region', 'months'))
+
+
+def preset_frame(keys):
+    return pd.DataFrame(sorted(keys), columns=PRESET_COLUMNS)
+
+
+def preset_rows(df, keys):
+    """Boolean mask of the rows of df that belong to one of the preset keys."""
+    if df.empty:
+        return np.zeros(len(df), dtype=bool)
+    return np.array([key in keys for key in zip(*(df[col].astype(str) for col in PRESET_COLUMNS))], dtype=bool)
+
+
+def changed_presets(df, build_state):
+    """
+    Keys of the presets in df (rows of an incremental build) whose stored rows change: a new Date or spread
+    year, or a last stored bar recomputed to a different spread. Every incremental build re-upserts the last
+    stored bar of each year, so a preset with no new prices has nothing else in df.
+    """
+    changed = set()
+    keys = zip(*(df[col].astype(str) for col in PRESET_COLUMNS))
+    for key, year, date, spread in zip(keys, df['Year'].astype(str), df['Date'], df['spread']):
+        last_date, _, last_spread = build_state.get(key + (year,), (None, None, None))
+        if last_date is None or date > last_date or spread != last_spread:
+            changed.add(key)
+    return changed
+
+
+def build_preset(variables, build_state=None):
+    """
+    Compute the spread rows of one preset. With build_state (incremental mode), contract-years that expired
+    and are already stored are skipped, and only rows on or after the last stored Date of each year are kept.
+    """
     yearList = generateYearList(variables['contractMonthsList'], variables['yearOffsetList'])
-    pricesDict,expireList = generate_contract_data(variables['tickerList'], variables['contractMonthsList'], yearList, variables['weightsList'], variables['convList'], variables['yearsBack'], conn)
+    pricesDict,expireList = generate_contract_data(variables['tickerList'], variables['contractMonthsList'], yearList, variables['weightsList'], variables['convList'], variables['yearsBack'], gvws_provider)
     validate_contract_data(pricesDict)
     
     # Construct combined list to filter valid contracts
     combined_list = [variables['rollFlag'] + exp for exp in expireList]
-
-    # Construct full ticker-month-year strings
-    expire['TickerMonthYear'] = expire['Ticker'] + expire['MonthCode'] + expire['LastTrade'].str.slice(-2)
     
     # Filter expire matrix to only contracts in our target list
-    expireMatrix = expire[expire['TickerMonthYear'].isin(combined_list)]
+    expireMatrix = expire[expire['TickerMonthYear'].isin(combined_list)].copy()
 
     
     # Construct front ticker label
     expireMatrix['frontTicker'] = variables['tickerList'][0] + expire['MonthCode'] + expire['LastTrade'].str.slice(-2)
-    # Initialize a dictionary to store spreads keyed by year
-    spread_dict = {}
-    
-    # Assume all product lists are same length
-    num_contracts = len(next(iter(pricesDict.values()))["ContractList"])
-    
-    # Iterate over each contract index
-    for i in range(num_contracts):
-        combined_df = pd.DataFrame()
-        first_contracts = []
-    
-        for ticker, data in pricesDict.items():
-            if i < len(data["ContractList"]):
-                first_contract = data["ContractList"][i]
-                first_contracts.append(first_contract)
-    
-                temp_df = data["Prices df"][data["Prices df"]['symbol'] == first_contract][["Date", "WeightedPrice"]].copy()
-                temp_df["Date"] = pd.to_datetime(temp_df["Date"])
-                temp_df.set_index("Date", inplace=True)
-                temp_df.rename(columns={"WeightedPrice": first_contract}, inplace=True)
-    
-                if combined_df.empty:
-                    combined_df = temp_df
-                else:
-                    combined_df = combined_df.join(temp_df, how="outer")
-    
-        # Drop rows with missing values across the instruments
-        combined_df.dropna(inplace=True)
-        combined_df["spread"] = combined_df.sum(axis=1, skipna=True)
 
-        # Extract year from contract suffix (e.g., Z25 → 2025)
-        year_suffix = first_contracts[0][-2:]  # Last two characters
-        spread_year = 2000 + int(year_suffix) if int(year_suffix) < 50 else 1900 + int(year_suffix)
-    
-        spread_dict[spread_year] = combined_df
+    # Years already stored whose contracts expired - nothing new can arrive for them
+    today = pd.Timestamp.today()
+    settled_years = set()
+    if build_state is not None:
+        for (name, group, region, month, year), (last_date, last_trade, _) in build_state.items():
+            if (name, group, region, month) == preset_key(variables) and \
+                    last_trade < today - pd.Timedelta(days=SETTLED_AFTER_DAYS):
+                settled_years.add(int(year))
 
-   
     expireMatrix["LastTrade"] = pd.to_datetime(expireMatrix["LastTrade"])
-    rows_to_drop = 0#5
-    today = pd.Timestamp.today()
-    current_month = today.month
     expireMatrix["Year"] = expireMatrix["LastTrade"].dt.year 
     year_to_last_trade = expireMatrix.set_index("Year")["LastTrade"].to_dict()
-    
-    # New dictionary to hold filtered spread data
-    filtered_spread_dict = {}
-    
-    for year_key, df in spread_dict.items():
-        if year_key in year_to_last_trade:
-            last_trade_date = year_to_last_trade[year_key]
-    
-            # Keep rows up to and including LastTrade - redundant?
-            #df = df[df.index <= last_trade_date]
-            # Only drop last N rows if LastTrade is in the past
-            # if last_trade_date < today and len(df) > rows_to_drop:
-            #     df = df.iloc[:-rows_to_drop]
-    
-            df['LastTrade'] = last_trade_date
-            filtered_spread_dict[year_key] = df
-    
-    # Prepare spread-only DataFrame for database export
-    combined_spread_list = []
-    #filtered_spread_dict = spread_dict
-    for year, df in filtered_spread_dict.items():
-        if not df.empty and 'spread' in df.columns:
-            first__contract_col = df.columns[0]
-            GroupYear = 2000 + int(first__contract_col[-2:])
-            df['GroupYear'] = GroupYear
-            df_copy = df[['spread', 'LastTrade','GroupYear']].copy() 
-            #df_copy = df[['spread','GroupYear']].copy() 
-            df_copy["Year"] = str(year)  # Use year as RollTicker
-            df_copy["Date"] = df_copy.index
-            combined_spread_list.append(df_copy.reset_index(drop=True))
-
-    # Concatenate all into one DataFrame
-    final_spread_df = pd.concat(combined_spread_list, ignore_index=True)
-    
-    # Reorder columns
-    final_spread_df = final_spread_df[['Date', 'Year', 'spread', 'LastTrade','GroupYear']]
+    for year in settled_years:
+        year_to_last_trade.pop(year, None)
+
+    # Spreads of all contract years, one row per Date and Year
+    final_spread_df = build_spreads(pricesDict, year_to_last_trade)
+    final_spread_df['GroupYear'] = 2000 + final_spread_df['Year'].astype(int) % 100
 
     # Add metadata fields
     final_spread_df['InstrumentName'] = variables['Name']
@@ -165,10 +195,159 @@ for index, row in curvesIn.iterrows():
     final_spread_df['RollFlag'] = variables['rollFlag']
     final_spread_df['Desc'] = variables['desc']
 
-    df_out = pd.concat([df_out,final_spread_df],axis = 0)
+    if build_state is not None:
+        # Keep only rows from the last stored bar on (it is recomputed in case it was not settled yet)
+        since = final_spread_df['Year'].map(
+            lambda y: build_state.get(preset_key(variables) + (y,), (pd.Timestamp.min, None))[0])
+        final_spread_df = final_spread_df[final_spread_df['Date'] >= since]
+
+    return final_spread_df
+
+
+build_state = None if args.full else load_build_state()
+if build_state is None:
+    print("Full rebuild of all presets")
+
+# Load the CSV using the first row as column headers
+curvesIn = pd.read_csv("PriceAnalyzerIn.csv", header=0)
+
+
+def parse_preset(row):
+    variables = {}
+    for name in curvesIn.columns:
+        value = row[name]
+        try:
+            # Try to convert string representations of lists/dicts into Python objects
+            parsed_value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            parsed_value = value
+        variables[name] = parsed_value
+    return variables
+
+
+rows = [row for index, row in curvesIn.iterrows()]
+
+# Every preset's definition (all columns of its CSV row) is hashed and stored with its rows. Presets that are
+# new or were edited since they were stored are rebuilt from scratch, and presets that were removed from the
+# CSV are deleted, so an incremental build never mixes rows of an old definition with the new one.
+definitions = {}
+for row in rows:
+    variables = parse_preset(row)
+    definitions[preset_key(variables)] = canonical_key(variables)
+
+stored_definitions = dict(
+    ((r.InstrumentName, r.Group, r.Region, r.Month), r.Definition)
+    for r in read_table(DEFINITIONS_TABLE).itertuples(index=False))
+if build_state is None:
+    rebuilt = set(definitions)
+else:
+    rebuilt = {key for key, definition in definitions.items() if stored_definitions.get(key) != definition}
+    if rebuilt:
+        print(f"Rebuilding {len(rebuilt)} new or edited presets")
+removed = load_stored_presets() - set(definitions)
+if removed:
+    print(f"Deleting {len(removed)} presets no longer in PriceAnalyzerIn.csv")
+
+
+def run_preset(row):
+    """Build one preset; errors are returned instead of raised so one bad preset does not stop the batch."""
+    try:
+        variables = parse_preset(row)
+        return build_preset(variables, None if preset_key(variables) in rebuilt else build_state), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+# Presets are mostly waiting on the price backend, so threads are enough to overlap them.
+# map() keeps the results in preset file order whatever order they finish in.
+with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+    results = list(executor.map(run_preset, rows))
+
+frames = []
+failed = []
+built = set()
+for row, (final_spread_df, error) in zip(rows, results):
+    if error is not None:
+        failed.append(row['Name'])
+        print(f"Preset {row['Name']} failed:\n{error}")
+        continue
+    frames.append(final_spread_df)
+    built.add(preset_key(parse_preset(row)))
     # print("====================")
-    # print(df_out.sort_values(by='Date', ascending=False))
+    # print(final_spread_df.sort_values(by='Date', ascending=False))
     # print("====================")
 
-with engine.begin() as connection:
-   df_out.to_sql(name='contractMargins', schema='TradePriceAnalyzer', con=connection, if_exists='replace', index=False, chunksize=10000)
\ No newline at end of file
+# with every preset failed, the rebuilt and removed presets are still deleted from a frame with the table's columns
+df_out = pd.concat(frames, axis=0) if frames else pd.DataFrame(columns=[col for col, _ in CONTRACT_MARGINS_COLUMNS])
+
+# A full build replaces the whole tables only if every preset was rebuilt. Otherwise the stored rows of the
+# rebuilt and removed presets are swapped out and the other presets get their new bars, so failed presets keep
+# their stored rows instead of disappearing until the next build.
+replace_all = build_state is None and not failed
+replaced = (rebuilt & built) | removed
+rebuilt_rows = preset_rows(df_out, rebuilt)
+
+# Presets whose stored rows change; the seasonal/stats tables and the snapshot are only updated for these
+updated = set() if build_state is None else changed_presets(df_out[~rebuilt_rows], build_state)
+changed = replaced | updated
+
+# Bulk load stage - staging table on SQL Server, generic inserts on other databases (e.g. SQLite)
+writer = get_writer(engine, OUTPUT_TABLE, OUTPUT_SCHEMA)
+if replace_all:
+    writer.replace(df_out)
+else:
+    if replaced:
+        writer.replace_presets(df_out[rebuilt_rows], presets=preset_frame(replaced))
+    if updated:
+        writer.upsert(df_out[preset_rows(df_out, updated)])
+    if not changed:
+        print(f"No new rows for {OUTPUT_SCHEMA}.{OUTPUT_TABLE}")
+
+# Seasonal curves and summary statistics of the changed presets, so the dashboard only has to look them up
+seasonal_writer = get_writer(engine, SEASONAL_TABLE, OUTPUT_SCHEMA, columns=SEASONAL_COLUMNS)
+stats_writer = get_writer(engine, STATS_TABLE, OUTPUT_SCHEMA, columns=STATS_COLUMNS)
+if replace_all:
+    series_df = df_out
+    seasonal_df, stats_df = build_seasonal_tables(series_df)
+    seasonal_writer.replace(seasonal_df)
+    stats_writer.replace(stats_df)
+elif changed:
+    # rebuilt presets are complete in df_out, the updated ones only have their new bars and are read back
+    series_df = pd.concat([df_out[rebuilt_rows], load_presets(updated)], ignore_index=True)
+    seasonal_df, stats_df = build_seasonal_tables(series_df)
+    seasonal_writer.replace_presets(seasonal_df, presets=preset_frame(changed))
+    stats_writer.replace_presets(stats_df, presets=preset_frame(changed))
+
+# Definitions the stored rows were built from; the other presets were stored with their current definition
+definitions_writer = get_writer(engine, DEFINITIONS_TABLE, OUTPUT_SCHEMA, columns=DEFINITION_COLUMNS)
+definitions_df = preset_frame(built if replace_all else rebuilt & built)
+definitions_df['Definition'] = [definitions[key] for key in definitions_df[PRESET_COLUMNS].itertuples(index=False, name=None)]
+if replace_all:
+    definitions_writer.replace(definitions_df)
+elif replaced:
+    definitions_writer.replace_presets(definitions_df, presets=preset_frame(replaced))
+
+# Dashboards memory-map this snapshot instead of each process reading the tables from SQL. An incremental
+# build copies the unchanged presets from the current snapshot and only adds the rows of the changed ones.
+build_id = None
+if replace_all:
+    build_id = write_snapshot({OUTPUT_TABLE: series_df, SEASONAL_TABLE: seasonal_df, STATS_TABLE: stats_df},
+                              SNAPSHOT_DIR)
+elif changed:
+    build_id = update_snapshot({OUTPUT_TABLE: series_df, SEASONAL_TABLE: seasonal_df, STATS_TABLE: stats_df},
+                               SNAPSHOT_DIR, presets=preset_frame(changed))
+if build_id is None and (changed or snapshot_build_id(SNAPSHOT_DIR) is None):
+    # no snapshot to update yet
+    build_id = write_snapshot({name: read_table(name) for name in (OUTPUT_TABLE, SEASONAL_TABLE, STATS_TABLE)},
+                              SNAPSHOT_DIR)
+if build_id is not None:
+    print(f"Preset snapshot {build_id} written to {SNAPSHOT_DIR}")
+    # Dashboards reading the tables directly poll this id, as the snapshot ones poll the CURRENT pointer
+    get_writer(engine, BUILD_TABLE, OUTPUT_SCHEMA, columns=BUILD_COLUMNS).replace(pd.DataFrame({'BuildId': [build_id]}))
+
+conn.close()
+print(f"Daily bar cache: {daily_cache.stats}")
+
+if failed:
+    print(f"{len(failed)} of {len(rows)} presets failed: {', '.join(map(str, failed))}")
+    sys.exit(1)
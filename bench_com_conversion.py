@@ -0,0 +1,129 @@
+#bench_com_conversion.py
+
+"""
+Benchmark of the COM-to-DataFrame conversion in gcc_sparta_library against the previous row-by-row
+implementation, on synthetic objects shaped like the MV COM results (no COM server needed):
+
+    python bench_com_conversion.py --rows 5000 --strikes 2000 --repeat 5
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from gcc_sparta_library import OPTION_VALUE_ATTRIBUTES, daily_data_to_dataframe, option_chain_to_dataframe
+
+
+class FakeComObject:
+    """Stand-in for a win32com dispatch object: plain attributes, missing ones raise AttributeError."""
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+def fake_daily_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime(2000, 1, 3)
+    close = 80 + rng.standard_normal(n).cumsum()
+    return [FakeComObject(StringDateTime=(start + timedelta(days=k)).strftime("%m/%d/%Y %H:%M:%S"),
+                          Open=float(close[k] - 0.2), High=float(close[k] + 1), Low=float(close[k] - 1),
+                          Close=float(close[k]), Volume=int(rng.integers(0, 10000)),
+                          OpenInterest=int(rng.integers(0, 50000)))
+            for k in range(n)]
+
+
+def fake_option_value(rng, strike, expiration, put):
+    values = {attr: float(rng.random()) for attr in OPTION_VALUE_ATTRIBUTES}
+    values.update(PriceSymbol=f"/GCLZ25{'P' if put else 'C'}{strike}", TradeTime="10:15:00",
+                  ContractDate="Z25", ExpirationDate=expiration, Volume=int(rng.integers(0, 500)),
+                  OpenInterest=int(rng.integers(0, 5000)))
+    # like the server, DTE is often left empty and then computed from ExpirationDate
+    values["DTE"] = None if rng.random() < 0.5 else int(rng.integers(1, 400))
+    return FakeComObject(**values)
+
+
+def fake_option_chain(n, seed=0):
+    rng = np.random.default_rng(seed)
+    expiration = datetime(2026, 11, 16)
+    rows = []
+    for k in range(n):
+        strike = 50 + k * 0.5
+        rows.append(FakeComObject(Price=strike, AtmIndex=n // 2,
+                                  Call=fake_option_value(rng, strike, expiration, put=False),
+                                  Put=None if k % 10 == 0 else fake_option_value(rng, strike, expiration, put=True)))
+    return rows
+
+
+def legacy_daily_data_to_dataframe(daily_data):
+    """The previous implementation: getattr per field and pd.to_datetime per row."""
+    data = []
+    for day in daily_data:
+        data.append({
+            "Date": pd.to_datetime(getattr(day, "StringDateTime", None)),
+            "Open": getattr(day, "Open", None),
+            "High": getattr(day, "High", None),
+            "Low": getattr(day, "Low", None),
+            "Close": getattr(day, "Close", None),
+            "Volume": getattr(day, "Volume", None),
+            "OpenInterest": getattr(day, "OpenInterest", None),
+        })
+    return pd.DataFrame(data)
+
+
+def legacy_option_chain_rows(option_chain_data):
+    """The row-building loop of the previous option_chain_to_dataframe (the column reordering is shared)."""
+    data = []
+    for opt_row in option_chain_data:
+        row = {"Strike": getattr(opt_row, "Price", None), "ATM_Index": getattr(opt_row, "AtmIndex", None)}
+        for side in ("Call", "Put"):
+            side_data = getattr(opt_row, side, None)
+            for attr in OPTION_VALUE_ATTRIBUTES:
+                value = getattr(side_data, attr, None) if side_data else None
+                if side_data and attr == "DTE" and value is None:
+                    exp_date_com = getattr(side_data, "ExpirationDate", None)
+                    if exp_date_com:
+                        value = (pd.to_datetime(exp_date_com) - datetime.now()).days
+                row[f"{side}_{attr}"] = value
+        data.append(row)
+    return pd.DataFrame(data)
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def report(name, legacy_time, new_time):
+    print(f"{name:<14} legacy {legacy_time * 1000:9.1f} ms   new {new_time * 1000:9.1f} ms   "
+          f"speedup {legacy_time / new_time:5.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark COM-to-DataFrame conversion on fake COM objects.")
+    parser.add_argument("--rows", type=int, default=5000, help="daily bars")
+    parser.add_argument("--strikes", type=int, default=2000, help="option chain rows")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per implementation, the best is reported")
+    args = parser.parse_args()
+
+    bars = fake_daily_bars(args.rows)
+    legacy_time, expected = best_of(lambda: legacy_daily_data_to_dataframe(bars), args.repeat)
+    new_time, actual = best_of(lambda: daily_data_to_dataframe(bars), args.repeat)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    report(f"daily x{args.rows}", legacy_time, new_time)
+
+    chain = fake_option_chain(args.strikes)
+    legacy_time, expected = best_of(lambda: legacy_option_chain_rows(chain), args.repeat)
+    new_time, actual = best_of(lambda: option_chain_to_dataframe(chain), args.repeat)
+    pd.testing.assert_frame_equal(actual[expected.columns], expected, check_dtype=False)
+    report(f"options x{args.strikes}", legacy_time, new_time)
+
+
+if __name__ == "__main__":
+    main()
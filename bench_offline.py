@@ -0,0 +1,150 @@
+#bench_offline.py
+
+"""
+Runs the nightly preset build and both dashboards' calculations without GvWS, the MV COM server or
+SQL Server, and reports how long each stage takes:
+
+    python bench_offline.py                       # synthetic curves
+    python bench_offline.py --mode replay         # prices recorded earlier with MARKET_DATA_MODE=record
+    python bench_offline.py --latency-ms 200 --symbol-latency-ms 20
+
+Prices come from market_replay (MARKET_DATA_MODE), the database is a SQLite file (DB_URL) seeded with a
+synthetic future expiry table, and the daily bar cache, database and preset snapshot are kept in --workdir.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import pandas as pd
+
+REFERENCE_SCHEMA = "Reference"
+EXPIRY_TABLE = "FutureExpiry"
+OUTPUT_SCHEMA = "TradePriceAnalyzer"
+OUTPUT_TABLE = "contractMargins"
+
+timings = []
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    yield
+    timings.append((stage, time.perf_counter() - start))
+    print(f"{stage}: {timings[-1][1]:.2f} s")
+
+
+def configure_environment(args):
+    """Everything the scripts read from the environment, set before any of them is imported or started."""
+    workdir = os.path.abspath(args.workdir)
+    os.makedirs(workdir, exist_ok=True)
+    os.environ.update({
+        "MARKET_DATA_MODE": args.mode,
+        "MARKET_DATA_LATENCY_MS": str(args.latency_ms),
+        "MARKET_DATA_SYMBOL_LATENCY_MS": str(args.symbol_latency_ms),
+        "DB_URL": f"sqlite:///{os.path.join(workdir, 'offline.sqlite')}",
+        "DAILY_BAR_CACHE": os.path.join(workdir, "daily_bar_cache.sqlite"),
+        "PRESET_SNAPSHOT_DIR": os.path.join(workdir, "preset_snapshot"),
+        "PRESET_RELOAD_SECONDS": "0",
+        "reference_schemaName": REFERENCE_SCHEMA,
+        "future_expiry_table_Name": EXPIRY_TABLE,
+        "tradepricetable": OUTPUT_SCHEMA,
+        "contract_margin_table": OUTPUT_TABLE,
+    })
+    if args.recordings:
+        os.environ["MARKET_DATA_DIR"] = os.path.abspath(args.recordings)
+
+
+def seed_expiry_table(presets):
+    """Synthetic expiry dates for every roll ticker of the presets, unless the table already exists."""
+    from sqlalchemy import inspect
+
+    from db_engine import create_db_engine
+    from market_replay import synthetic_expiry_table
+
+    engine = create_db_engine([REFERENCE_SCHEMA])
+    if not inspect(engine).has_table(EXPIRY_TABLE, schema=REFERENCE_SCHEMA):
+        expiry = synthetic_expiry_table(presets["rollFlag"].unique(), 1990, date.today().year + 5)
+        expiry.to_sql(EXPIRY_TABLE, engine, schema=REFERENCE_SCHEMA, index=False)
+        print(f"Seeded {REFERENCE_SCHEMA}.{EXPIRY_TABLE} with {len(expiry)} synthetic expiries")
+    engine.dispose()
+
+
+def run_build(extra_args):
+    subprocess.run([sys.executable, "PriceBuilding_v101.py", *extra_args], check=True)
+
+
+def bench_preset_dashboard():
+    import dash_preset
+
+    series = []
+    for group in dash_preset.store.options():
+        for region in dash_preset.store.options(group["value"]):
+            for instrument in dash_preset.store.options(group["value"], region["value"]):
+                for month in dash_preset.store.options(group["value"], region["value"], instrument["value"]):
+                    series.append((group["value"], region["value"], instrument["value"], month["value"]))
+
+    with timed(f"preset dashboard: figures of {len(series)} series"):
+        for key in series:
+            dash_preset.update_figure(*key)
+
+
+def bench_onthefly_dashboard(presets):
+    import ast
+
+    import dash_onthefly
+
+    requests = []
+    for row in presets.to_dict("records"):
+        variables = dict(row)
+        for name in ("tickerList", "contractMonthsList", "yearOffsetList", "weightsList", "convList"):
+            variables[name] = ast.literal_eval(variables[name])
+        requests.append(variables)
+
+    def report(done, total, message=""):
+        pass  # progress is only shown in the app
+
+    with timed(f"on-the-fly: {len(requests)} requests, cold"):
+        for variables in requests:
+            dash_onthefly.compute_spread(variables, report)
+    with timed(f"on-the-fly: {len(requests)} requests, memoized"):
+        for variables in requests:
+            dash_onthefly.compute_spread(variables, report)
+    with timed(f"on-the-fly: {len(requests)} requests, re-weighted"):
+        for variables in requests:
+            dash_onthefly.compute_spread(dict(variables, weightsList=[2 * w for w in variables["weightsList"]]), report)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the preset build and dashboards offline.")
+    parser.add_argument("--mode", choices=["synthetic", "replay"], default="synthetic", help="price source")
+    parser.add_argument("--recordings", help="recording directory for --mode replay (default MARKET_DATA_DIR)")
+    parser.add_argument("--workdir", default="offline_bench", help="SQLite database, caches and snapshot")
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated latency per price request")
+    parser.add_argument("--symbol-latency-ms", type=float, default=0, help="simulated latency per symbol")
+    parser.add_argument("--workers", type=int, default=4, help="presets built in parallel")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    presets = pd.read_csv("PriceAnalyzerIn.csv", header=0)
+    seed_expiry_table(presets)
+
+    with timed(f"PriceBuilding_v101 --full ({len(presets)} presets)"):
+        run_build(["--full", "--workers", str(args.workers)])
+    with timed("PriceBuilding_v101 incremental"):
+        run_build(["--workers", str(args.workers)])
+
+    bench_preset_dashboard()
+    bench_onthefly_dashboard(presets)
+
+    print()
+    for stage, seconds in timings:
+        print(f"{stage:<55} {seconds:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
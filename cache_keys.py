@@ -0,0 +1,10 @@
+#cache_keys.py
+
+import hashlib
+import json
+
+
+def canonical_key(params):
+    """Stable hash of a JSON-serializable parameter dict (key order and list/tuple spelling do not matter)."""
+    text = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
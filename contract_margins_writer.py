@@ -0,0 +1,265 @@
+#contract_margins_writer.py
+
+import time
+
+import pandas as pd
+from sqlalchemy import MetaData, Table, Column, Index, Date, Float, Integer, String, delete, and_
+
+# Column types of the contractMargins table, so the table is not created with inferred TEXT/FLOAT columns
+CONTRACT_MARGINS_COLUMNS = [
+    ("Date", Date),
+    ("Year", String(4)),
+    ("spread", Float),
+    ("LastTrade", Date),
+    ("GroupYear", Integer),
+    ("InstrumentName", String(100)),
+    ("Group", String(50)),
+    ("Region", String(50)),
+    ("Month", String(20)),
+    ("RollFlag", String(20)),
+    ("Desc", String(255)),
+]
+
+# Seasonal curves of each preset series (TradingDay 1-252 per expired year, plus the "Current" year)
+SEASONAL_COLUMNS = [
+    ("InstrumentName", String(100)),
+    ("Group", String(50)),
+    ("Region", String(50)),
+    ("Month", String(20)),
+    ("Year", String(10)),
+    ("TradingDay", Integer),
+    ("Date", Date),
+    ("spread", Float),
+]
+
+# Summary statistics of each preset series, shown on the histogram
+STATS_COLUMNS = [
+    ("InstrumentName", String(100)),
+    ("Group", String(50)),
+    ("Region", String(50)),
+    ("Month", String(20)),
+    ("Latest", Float),
+    ("Mean", Float),
+    ("Median", Float),
+    ("Std", Float),
+    ("Count", Integer),
+    ("AsOf", Date),
+]
+
+# Hash of each preset's PriceAnalyzerIn.csv definition as of the build that stored its rows, so incremental
+# builds can tell which presets were edited since
+DEFINITION_COLUMNS = [
+    ("InstrumentName", String(100)),
+    ("Group", String(50)),
+    ("Region", String(50)),
+    ("Month", String(20)),
+    ("Definition", String(64)),
+]
+
+# Id of the last build that changed the tables, polled by the dashboards that read the tables directly
+BUILD_COLUMNS = [
+    ("BuildId", String(32)),
+]
+
+# A preset series is identified by these columns
+PRESET_COLUMNS = ["InstrumentName", "Group", "Region", "Month"]
+
+# A preset spread year is identified by these columns; incremental loads replace its rows from a Date on
+SERIES_COLUMNS = PRESET_COLUMNS + ["Year"]
+
+# Index of every table, in the order the dashboard narrows a preset down (group, region, instrument, month);
+# serves the upsert deletes, the preset lookups and the build state query. Tables get the columns they have.
+INDEX_COLUMNS = ["Group", "Region", "InstrumentName", "Month", "Year", "Date"]
+
+
+def contract_margins_table(name, schema=None, metadata=None, columns=CONTRACT_MARGINS_COLUMNS, index_name=None):
+    names = [col for col, _ in columns]
+    index_columns = [col for col in INDEX_COLUMNS if col in names]
+    indexes = [Index(index_name or f"ix_{name}_preset", *index_columns)] if index_columns else []
+    return Table(name, metadata or MetaData(), *[Column(col, col_type) for col, col_type in columns], *indexes,
+                 schema=schema)
+
+
+def _create_indexes(connection, table):
+    """Indexes of a table created before they were defined; create() already adds them to new tables."""
+    for index in table.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def _prepare(df, columns=CONTRACT_MARGINS_COLUMNS):
+    """Column order and python types the DB-API drivers expect (datetime.date, str, None for missing)."""
+    df = df.reindex(columns=[col for col, _ in columns])
+    for col, col_type in columns:
+        if col_type is Date:
+            df[col] = pd.to_datetime(df[col]).dt.date
+        elif isinstance(col_type, String):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df.astype(object).where(df.notna(), None)
+
+
+class TableWriter:
+    """
+    Generic writer for the contractMargins tables, works on any SQLAlchemy dialect (used for SQLite/local runs).
+
+    replace() recreates the table with typed columns and loads all rows, upsert() deletes the stored rows of
+    each preset spread year from its first new Date on and appends the new rows, and replace_presets()
+    swaps all rows of the preset series present in the frame, each in one transaction.
+    """
+
+    def __init__(self, engine, name, schema=None, columns=CONTRACT_MARGINS_COLUMNS, chunksize=10000):
+        self.engine = engine
+        self.name = name
+        self.schema = schema
+        self.columns = columns
+        self.chunksize = chunksize
+
+    @property
+    def full_name(self):
+        return f"{self.schema}.{self.name}" if self.schema else self.name
+
+    def _report(self, action, rows, started):
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed > 0 else float("inf")
+        print(f"{action} {rows} rows into {self.full_name} in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+    def _insert(self, connection, table, df):
+        records = _prepare(df, self.columns).to_dict("records")
+        for start in range(0, len(records), self.chunksize):
+            connection.execute(table.insert(), records[start:start + self.chunksize])
+
+    def _table(self):
+        return contract_margins_table(self.name, self.schema, columns=self.columns)
+
+    def replace(self, df):
+        started = time.perf_counter()
+        table = self._table()
+        with self.engine.begin() as connection:
+            table.drop(connection, checkfirst=True)
+            table.create(connection)
+            self._insert(connection, table, df)
+        self._report("Loaded", len(df), started)
+        return len(df)
+
+    def upsert(self, df):
+        started = time.perf_counter()
+        table = self._table()
+        changed = df.groupby(SERIES_COLUMNS)["Date"].min()
+
+        with self.engine.begin() as connection:
+            _create_indexes(connection, table)
+            for key, since in changed.items():
+                conditions = [table.c[col] == value for col, value in zip(SERIES_COLUMNS, key)]
+                connection.execute(delete(table).where(and_(*conditions, table.c.Date >= pd.Timestamp(since).date())))
+            self._insert(connection, table, df)
+        self._report("Upserted", len(df), started)
+        return len(df)
+
+    def replace_presets(self, df, presets=None):
+        """presets: frame of the preset keys to replace, defaults to the ones in df."""
+        started = time.perf_counter()
+        table = self._table()
+        presets = df if presets is None else presets
+        with self.engine.begin() as connection:
+            table.create(connection, checkfirst=True)
+            _create_indexes(connection, table)
+            for key in presets[PRESET_COLUMNS].drop_duplicates().itertuples(index=False, name=None):
+                connection.execute(delete(table).where(and_(*[table.c[col] == value
+                                                              for col, value in zip(PRESET_COLUMNS, key)])))
+            self._insert(connection, table, df)
+        self._report("Replaced", len(df), started)
+        return len(df)
+
+
+class MSSQLTableWriter(TableWriter):
+    """
+    SQL Server writer: rows go through pyodbc's fast_executemany straight from tuples (no per-row SQLAlchemy
+    work), and incremental loads are staged in a temp table and applied with set-based DELETE/INSERT.
+
+    replace() loads a staging table next to the target and swaps it in with sp_rename, so the target keeps
+    its rows if the load fails and readers are only blocked for the swap, not for the whole load.
+    """
+
+    STAGING_SUFFIX = "_staging"
+
+    def _quote(self, name):
+        return self.engine.dialect.identifier_preparer.quote(name)
+
+    def _target(self, name=None):
+        name = name or self.name
+        if self.schema:
+            return f"{self._quote(self.schema)}.{self._quote(name)}"
+        return self._quote(name)
+
+    def _bulk_insert(self, cursor, target, df):
+        columns = ", ".join(self._quote(col) for col, _ in self.columns)
+        params = ", ".join("?" * len(self.columns))
+        rows = list(_prepare(df, self.columns).itertuples(index=False, name=None))
+        cursor.fast_executemany = True
+        for start in range(0, len(rows), self.chunksize):
+            cursor.executemany(f"INSERT INTO {target} ({columns}) VALUES ({params})", rows[start:start + self.chunksize])
+
+    def _run(self, work):
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            work(cursor)
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    def replace(self, df):
+        started = time.perf_counter()
+        staging_name = self.name + self.STAGING_SUFFIX
+        # the index keeps the target's name, it moves with the table on the rename
+        staging = contract_margins_table(staging_name, self.schema, columns=self.columns,
+                                         index_name=f"ix_{self.name}_preset")
+
+        with self.engine.begin() as connection:
+            staging.drop(connection, checkfirst=True)  # left over from a failed run
+            staging.create(connection)
+        try:
+            self._run(lambda cursor: self._bulk_insert(cursor, self._target(staging_name), df))
+        except Exception:
+            with self.engine.begin() as connection:
+                staging.drop(connection, checkfirst=True)
+            raise
+
+        def swap(cursor):
+            cursor.execute(f"DROP TABLE IF EXISTS {self._target()}")
+            cursor.execute("EXEC sp_rename ?, ?", (self._target(staging_name), self.name))
+
+        self._run(swap)
+        self._report("Loaded", len(df), started)
+        return len(df)
+
+    def upsert(self, df):
+        started = time.perf_counter()
+        target = self._target()
+        keys = " AND ".join(f"t.{self._quote(col)} = s.{self._quote(col)}" for col in SERIES_COLUMNS)
+        key_list = ", ".join(self._quote(col) for col in SERIES_COLUMNS)
+        columns = ", ".join(self._quote(col) for col, _ in self.columns)
+        date = self._quote("Date")
+
+        def work(cursor):
+            cursor.execute(f"SELECT TOP 0 {columns} INTO #stage FROM {target}")
+            self._bulk_insert(cursor, "#stage", df)
+            cursor.execute(f"DELETE t FROM {target} t JOIN (SELECT {key_list}, MIN({date}) AS since FROM #stage "
+                           f"GROUP BY {key_list}) s ON {keys} AND t.{date} >= s.since")
+            cursor.execute(f"INSERT INTO {target} ({columns}) SELECT {columns} FROM #stage")
+            cursor.execute("DROP TABLE #stage")
+
+        with self.engine.begin() as connection:
+            _create_indexes(connection, self._table())
+        self._run(work)
+        self._report("Upserted", len(df), started)
+        return len(df)
+
+
+def get_writer(engine, name, schema=None, **kwargs):
+    """Writer for the engine's dialect: bulk staging on SQL Server, the generic writer anywhere else."""
+    if engine.dialect.name == "mssql":
+        return MSSQLTableWriter(engine, name, schema, **kwargs)
+    return TableWriter(engine, name, schema, **kwargs)
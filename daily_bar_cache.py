@@ -0,0 +1,157 @@
+#daily_bar_cache.py
+
+import sqlite3
+import threading
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+
+MONTH_CODES = "FGHJKMNQUVXZ"
+
+
+def _to_date(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def contract_month_end(symbol):
+    """
+    Last day of the contract month encoded at the end of a futures symbol (month code + two digit year,
+    e.g. #BRGBMV25 -> 2025-10-31), or None for symbols that are not a dated contract.
+    """
+    symbol = str(symbol)
+    if len(symbol) < 4 or symbol[-3] not in MONTH_CODES or not symbol[-2:].isdigit():
+        return None
+    yy = int(symbol[-2:])
+    year = 2000 + yy if yy < 50 else 1900 + yy
+    month = MONTH_CODES.index(symbol[-3]) + 1
+    return date(year, month, monthrange(year, month)[1])
+
+
+class DailyBarCache:
+    """
+    Local SQLite cache of daily bars, keyed by (source, symbol, date).
+
+    Rows are stored exactly as the backend returned them (one tab separated line per bar plus the header
+    line per symbol), so a cached read is decoded by the same code as a fresh download.
+
+    For every symbol the cache remembers which date range has been downloaded. A contract whose expiry
+    (by default the end of its contract month, see contract_month_end) lies more than settled_after_days
+    before the end of the last download is served from disk only; for all other symbols just the tail since
+    the last cached bar is downloaded again. Empty answers are only remembered for settled contracts, so a
+    live symbol without bars yet is asked for again on the next request.
+    """
+
+    def __init__(self, path="daily_bar_cache.sqlite", settled_after_days=10, expiry=contract_month_end):
+        """
+        :param expiry: callable(symbol) returning the last date a contract can trade (date), or None for
+                       symbols that do not expire
+        """
+        self.path = path
+        self.settled_after_days = settled_after_days
+        self.expiry = expiry
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "partial_hits": 0, "misses": 0, "rows_fetched": 0}
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS bars (source TEXT, symbol TEXT, date TEXT, line TEXT, "
+                             "PRIMARY KEY (source, symbol, date)) WITHOUT ROWID")
+            self._db.execute("CREATE TABLE IF NOT EXISTS coverage (source TEXT, symbol TEXT, header TEXT, "
+                             "covered_from TEXT, covered_to TEXT, last_bar TEXT, PRIMARY KEY (source, symbol))")
+
+    @property
+    def stats(self):
+        """Hit/miss counters: hits (served from disk), partial_hits (tail/head downloaded), misses."""
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        self._db.close()
+
+    def _coverage(self, source, symbol):
+        with self._lock:
+            row = self._db.execute("SELECT header, covered_from, covered_to, last_bar FROM coverage "
+                                   "WHERE source = ? AND symbol = ?", (source, symbol)).fetchone()
+        if row is None:
+            return None
+        return {"header": row[0], "covered_from": _to_date(row[1]), "covered_to": _to_date(row[2]),
+                "last_bar": _to_date(row[3])}
+
+    def _store(self, source, symbol, header, rows, covered_from, covered_to):
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO bars (source, symbol, date, line) VALUES (?, ?, ?, ?)",
+                                 [(source, symbol, key, line) for key, line in rows])
+            last_bar = self._db.execute("SELECT MAX(date) FROM bars WHERE source = ? AND symbol = ?",
+                                        (source, symbol)).fetchone()[0]
+            self._db.execute("INSERT OR REPLACE INTO coverage (source, symbol, header, covered_from, covered_to, "
+                             "last_bar) VALUES (?, ?, ?, ?, ?, ?)",
+                             (source, symbol, header, covered_from.isoformat(), covered_to.isoformat(), last_bar))
+            self._stats["rows_fetched"] += len(rows)
+
+    def _load(self, source, symbol, start, end):
+        with self._lock:
+            rows = self._db.execute("SELECT line FROM bars WHERE source = ? AND symbol = ? AND date >= ? "
+                                    "AND date <= ? ORDER BY date",
+                                    (source, symbol, start.isoformat(), end.isoformat())).fetchall()
+        return [row[0] for row in rows]
+
+    def is_settled(self, symbol, covered_to):
+        """True if the contract expired more than settled_after_days before covered_to (and before today)."""
+        expiry = self.expiry(symbol)
+        if expiry is None:
+            return False
+        return expiry + timedelta(days=self.settled_after_days) < min(covered_to, date.today())
+
+    def get(self, source, symbol, start, end, fetch):
+        """
+        Return cached daily bars for symbol between start and end (inclusive), downloading only what is missing.
+
+        :param source: backend name, e.g. 'gvws' or 'mv'
+        :param symbol: symbol name (string)
+        :param start: first date of the period (date/datetime)
+        :param end: last date of the period (date/datetime), None means today
+        :param fetch: callable(from_date, to_date) returning (header, [(iso_date, line), ...]) from the backend
+        :return: tuple of header line and list of bar lines in date order
+        """
+        start = _to_date(start)
+        end = _to_date(end) or date.today()
+        coverage = self._coverage(source, symbol)
+
+        if coverage is None:
+            header, rows = fetch(start, end)
+            if rows or self.is_settled(symbol, end):
+                self._store(source, symbol, header, rows, start, end)
+            with self._lock:
+                self._stats["misses"] += 1
+            return header, self._load(source, symbol, start, end)
+
+        header = coverage["header"]
+        covered_from = coverage["covered_from"]
+        covered_to = coverage["covered_to"]
+        fetched = False
+
+        if start < covered_from:
+            header, rows = fetch(start, covered_from - timedelta(days=1))
+            # no bars before the first cached one means the contract was not listed yet
+            if rows or coverage["last_bar"] is not None or self.is_settled(symbol, covered_to):
+                covered_from = start
+                self._store(source, symbol, header, rows, covered_from, covered_to)
+            fetched = True
+
+        if end >= covered_to and not self.is_settled(symbol, covered_to):
+            # re-download the last cached bar as well, it may not have been settled yet
+            tail_start = coverage["last_bar"] or covered_to
+            header, rows = fetch(tail_start, end)
+            if rows or self.is_settled(symbol, end):
+                covered_to = end
+                self._store(source, symbol, header, rows, covered_from, covered_to)
+            fetched = True
+
+        with self._lock:
+            self._stats["partial_hits" if fetched else "hits"] += 1
+        return header, self._load(source, symbol, start, end)
@@ -4,6 +4,7 @@ import subprocess
 import threading
 import psutil
 import os
+import sys
 import time
 
 # Initialize Dash app
@@ -29,7 +30,11 @@ def is_port_open(port):
 def launch_dash_app(script, port, key):
     """Launch a Dash app in a separate process."""
     try:
-        proc = subprocess.Popen(['python', script])
+        if os.getenv("DASH_PRODUCTION") == "1":
+            # multi-worker WSGI server instead of the Flask development server
+            proc = subprocess.Popen([sys.executable, 'serve.py', key, '--port', str(port)])
+        else:
+            proc = subprocess.Popen(['python', script])
         launched_processes[key] = proc
     except Exception as e:
         print(f"Error launching {key}: {e}")
@@ -510,4 +515,4 @@ def handle_launch(n_clicks, selected_app):
 
 # Run launcher
 if __name__ == '__main__':
-    app.run(debug=True, host="127.0.0.1", port=8050, use_reloader=False)
\ No newline at end of file
+    app.run(debug=os.getenv("DASH_DEBUG", "1") == "1", host="127.0.0.1", port=8050, use_reloader=False)
\ No newline at end of file
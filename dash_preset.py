@@ -3,11 +3,12 @@ import plotly.graph_objects as go
 from dash import Dash, html, dcc, Input, Output
 import dash_bootstrap_components as dbc
 import dash_table
-from datetime import datetime
-from sqlalchemy import create_engine
-from urllib import parse
+from db_engine import create_db_engine
 from dotenv import load_dotenv
 import os
+from preset_store import SqlPresetStore, ArrowPresetStore, ReloadingStore, snapshot_build_id
+from table_paging import query_page
+from spread_figures import seasonal_figure, time_series_figure, histogram_figure
 
 # Load environment variables from .env file
 load_dotenv("credential.env")
@@ -15,35 +16,35 @@ load_dotenv("credential.env")
 tradepricetable = os.getenv("tradepricetable")
 contract_margin_table = os.getenv("contract_margin_table")
 
-# Fetch credentials from environment variables
-connection_params = {
-    "server": os.getenv("DB_SERVER"),
-    "database": os.getenv("DB_NAME"),
-    "username": os.getenv("DB_USERNAME"),
-    "password": os.getenv("DB_PASSWORD"),
-}
-
-connecting_string = (
-    f"Driver={{ODBC Driver 18 for SQL Server}};"
-    f"Server={connection_params['server']};"
-    f"Database={connection_params['database']};"
-    f"Uid={connection_params['username']};"
-    f"Pwd={connection_params['password']};"
-    f"Encrypt=yes;"
-    f"TrustServerCertificate=no;"
-    f"Connection Timeout=30;"
-)
-
-params = parse.quote_plus(connecting_string)
-engine = create_engine(f"mssql+pyodbc:///?odbc_connect={params}", fast_executemany=True)
-# Load data from SQL
-query = f"SELECT * FROM {tradepricetable}.{contract_margin_table}" 
-data = pd.read_sql(query, con=engine)
-data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
-data["LastTrade"] = pd.to_datetime(data["LastTrade"], errors="coerce")
+# SQL Server from credential.env, or DB_URL (e.g. sqlite:///offline.sqlite) to run without it
+engine = create_db_engine([tradepricetable])
+if hasattr(os, "register_at_fork"):
+    # forked server workers must open their own database connections, not reuse the parent's pool
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+snapshot_dir = os.getenv("PRESET_SNAPSHOT_DIR", "preset_snapshot")
+
+def load_store():
+    # The Arrow snapshot written by PriceBuilding_v101 is memory-mapped, so all server workers share one copy
+    if snapshot_build_id(snapshot_dir) is not None:
+        return ArrowPresetStore(snapshot_dir, contract_margin_table,
+                                seasonal_name=f"{contract_margin_table}Seasonal", stats_name=f"{contract_margin_table}Stats")
+
+    # Without a snapshot only the Group/Region/InstrumentName/Month hierarchy is read at startup; a series is
+    # queried when it is first selected and the most recently used ones are kept in memory
+    return SqlPresetStore(engine, contract_margin_table, tradepricetable,
+                          max_series=int(os.getenv("PRESET_CACHE_SERIES", "64")),
+                          seasonal_name=f"{contract_margin_table}Seasonal", stats_name=f"{contract_margin_table}Stats",
+                          build_name=f"{contract_margin_table}Build")
+
+# New builds are picked up in the background: the build id of the snapshot (or of the build table) is polled
+# and a fresh store is swapped in when it changes (PRESET_RELOAD_SECONDS=0 disables polling)
+store = ReloadingStore(load_store, lambda current: current.change_marker(),
+                       interval=float(os.getenv("PRESET_RELOAD_SECONDS", "300"))).start()
 
 # Initialize Dash app
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+# WSGI entry point for production servers, see serve.py
+server = app.server
 
 app.layout = dbc.Container([
     html.H2("Seasonal Spread Analysis"),
@@ -63,7 +64,15 @@ app.layout = dbc.Container([
     html.H4("Filtered Data Preview"),
     dash_table.DataTable(
         id='data-preview',
+        page_current=0,
         page_size=10,
+        # paging, sorting and filtering run in update_table so only the visible page is sent to the browser
+        page_action='custom',
+        sort_action='custom',
+        sort_mode='multi',
+        sort_by=[],
+        filter_action='custom',
+        filter_query='',
         style_table={'overflowX': 'auto'},
         style_cell={
             'backgroundColor': 'black',
@@ -84,8 +93,7 @@ app.layout = dbc.Container([
     Input('group-dropdown', 'id')
 )
 def populate_group(_):
-    groups = sorted(data['Group'].dropna().unique())
-    return [{'label': g, 'value': g} for g in groups]
+    return store.options()
 
 # Dropdown: Region
 @app.callback(
@@ -94,8 +102,7 @@ def populate_group(_):
 )
 def update_region(group):
     if group:
-        regions = sorted(data[data['Group'] == group]['Region'].dropna().unique())
-        return [{'label': r, 'value': r} for r in regions]
+        return store.options(group)
     return []
 
 # Dropdown: Instrument
@@ -106,11 +113,7 @@ def update_region(group):
 )
 def update_instrument(region, group):
     if group and region:
-        instruments = sorted(data[
-            (data['Group'] == group) &
-            (data['Region'] == region)
-        ]['InstrumentName'].dropna().unique())
-        return [{'label': i, 'value': i} for i in instruments]
+        return store.options(group, region)
     return []
 
 # Dropdown: Month
@@ -122,12 +125,7 @@ def update_instrument(region, group):
 )
 def update_month(instrument, region, group):
     if group and region and instrument:
-        months = sorted(data[
-            (data['Group'] == group) &
-            (data['Region'] == region) &
-            (data['InstrumentName'] == instrument)
-        ]['Month'].dropna().unique())
-        return [{'label': m, 'value': m} for m in months]
+        return store.options(group, region, instrument)
     return []
 
 # Callback for seasonal chart and histogram
@@ -149,149 +147,21 @@ def update_figure(group, region, instrument, month):
         )
         return empty_fig, empty_fig
 
-    filtered_df = data[
-        (data['Group'] == group) &
-        (data['Region'] == region) &
-        (data['InstrumentName'] == instrument) &
-        (data['Month'] == month)
-    ].copy()
-
-    filtered_df = filtered_df.sort_values("Date")
-    today = pd.Timestamp.today().normalize()
-
-    historical_df = filtered_df[filtered_df['LastTrade'] <= today].copy()
-    current_df = filtered_df[filtered_df['LastTrade'] > today].copy()
-
-    fig = go.Figure()
-    seasonal_data = {}
+    # Rows of the selection, already sorted by Date
+    filtered_df = store.get(group, region, instrument, month)
 
-    for year in historical_df['Year'].unique():
-        year_group = historical_df[historical_df['Year'] == year].copy()
-        last_trade = year_group['LastTrade'].max()
-        year_filtered = year_group[year_group['Date'] <= last_trade].sort_values('Date').tail(252).copy()
-        if len(year_filtered) == 252:
-            year_filtered = year_filtered.reset_index(drop=True)
-            year_filtered['TradingDay'] = range(1, 253)
-            seasonal_data[str(year)] = year_filtered
-
-    if not historical_df.empty and not current_df.empty:
-        last_hist_trade = historical_df['LastTrade'].max()
-        next_month_start = (last_hist_trade + pd.offsets.MonthBegin(1)).normalize()
-        current_filtered = current_df[current_df['Date'] >= next_month_start].sort_values('Date').head(252).copy()
-        if not current_filtered.empty:
-            current_filtered = current_filtered.reset_index(drop=True)
-            current_filtered['TradingDay'] = range(1, len(current_filtered) + 1)
-            seasonal_data["Current"] = current_filtered
+    # Seasonal curves aligned by trading day are precomputed by PriceBuilding_v101 (one curve per Year label,
+    # "Current" for the live contract)
+    seasonal_data = dict(tuple(store.seasonal(group, region, instrument, month).groupby('Year', sort=False)))
 
     if not seasonal_data:
         # Fallback to simple time series if no seasonal data can be plotted
-        fig.add_trace(go.Scatter(
-            x=filtered_df["Date"],
-            y=filtered_df["spread"],
-            mode="lines",
-            name="All Data (Time Series)",
-            line=dict(color="lightblue", width=2)
-        ))
-        fig.update_layout(
-            title="Spread Time Series (No Seasonal Data Available)",
-            xaxis_title="Date",
-            yaxis_title="Spread",
-            margin=dict(l=40, r=40, t=60, b=40),
-            template='plotly_dark'
-        )
+        fig = time_series_figure(filtered_df["Date"], filtered_df["spread"])
     else:
-        for label, df in seasonal_data.items():
-            fig.add_trace(go.Scatter(
-                x=df["TradingDay"],
-                y=df["spread"],
-                mode="lines",
-                name=label,
-                line=dict(color="white" if label == "Current" else None,
-                          width=3 if label == "Current" else 1.5),
-                opacity=1.0 if label == "Current" else 0.6
-            ))
+        fig = seasonal_figure(seasonal_data, current_color="white")
 
-        fig.update_layout(
-            title="Seasonal Spread by Year",
-            xaxis_title="Trading Day (1 to 252)",
-            yaxis_title="Spread",
-            margin=dict(l=40, r=40, t=60, b=40),
-            legend_title="Season",
-            template='plotly_dark'
-        )
-
-    hist_fig = go.Figure()
-    if not filtered_df.empty and 'spread' in filtered_df.columns:
-        spread_values = filtered_df["spread"]
-        
-        # Calculate statistics
-        latest_spread = spread_values.iloc[-1] if not spread_values.empty else None
-        mean_spread = spread_values.mean()
-        median_spread = spread_values.median()
-        std_dev = spread_values.std()
-
-        hist_fig.add_trace(go.Histogram(
-            x=spread_values,
-            marker_color='lightblue',
-            nbinsx=50,
-            name='Spread Distribution'
-        ))
-
-        # Add vertical lines for statistics
-        if latest_spread is not None:
-            hist_fig.add_vline(x=latest_spread, line_dash="dash", line_color="yellow",
-                               annotation_text=f"Latest: {latest_spread:.2f}",
-                               annotation_position="top right", annotation_font_color="yellow")
-        
-        hist_fig.add_vline(x=mean_spread, line_dash="dash", line_color="red",
-                           annotation_text=f"Mean: {mean_spread:.2f}",
-                           annotation_position="top left", annotation_font_color="red")
-        
-        hist_fig.add_vline(x=median_spread, line_dash="dash", line_color="green",
-                           annotation_text=f"Median: {median_spread:.2f}",
-                           annotation_position="top right", annotation_font_color="green")
-        
-        hist_fig.add_vline(x=mean_spread - std_dev, line_dash="dot", line_color="orange",
-                           annotation_text=f"-1 Std Dev: {(mean_spread - std_dev):.2f}",
-                           annotation_position="bottom left", annotation_font_color="orange")
-        hist_fig.add_vline(x=mean_spread + std_dev, line_dash="dot", line_color="orange",
-                           annotation_text=f"+1 Std Dev: {(mean_spread + std_dev):.2f}",
-                           annotation_position="bottom right", annotation_font_color="orange")
-                           
-        hist_fig.add_vline(x=mean_spread - 2 * std_dev, line_dash="dot", line_color="purple",
-                           annotation_text=f"-2 Std Dev: {(mean_spread - 2 * std_dev):.2f}",
-                           annotation_position="bottom left", annotation_font_color="purple")
-        hist_fig.add_vline(x=mean_spread + 2 * std_dev, line_dash="dot", line_color="purple",
-                           annotation_text=f"+2 Std Dev: {(mean_spread + 2 * std_dev):.2f}",
-                           annotation_position="bottom right", annotation_font_color="purple")
-
-        # Add a text box for statistics
-        stats_text = (
-            f"Latest Spread: {latest_spread:.2f}<br>"
-            f"Mean: {mean_spread:.2f}<br>"
-            f"Median: {median_spread:.2f}<br>"
-            f"Std Dev: {std_dev:.2f}"
-        )
-        
-        hist_fig.add_annotation(
-            text=stats_text,
-            xref="paper", yref="paper",
-            x=0.98, y=0.98,  # Position in top right corner of the plot area
-            showarrow=False,
-            align="left",
-            bordercolor="white",
-            borderwidth=1,
-            bgcolor="rgba(0,0,0,0.7)", # Semi-transparent background
-            font=dict(color="white", size=10)
-        )
-
-    hist_fig.update_layout(
-        title="Distribution of Spread (Histogram) with Key Statistics",
-        xaxis_title="Spread",
-        yaxis_title="Frequency",
-        template="plotly_dark",
-        margin=dict(l=40, r=40, t=60, b=40)
-    )
+    # Statistics are precomputed by PriceBuilding_v101, the histogram is binned on the server
+    hist_fig = histogram_figure(filtered_df["spread"], store.stats(group, region, instrument, month) or None)
 
     return fig, hist_fig
 
@@ -299,33 +169,34 @@ def update_figure(group, region, instrument, month):
 @app.callback(
     Output('data-preview', 'data'),
     Output('data-preview', 'columns'),
+    Output('data-preview', 'page_count'),
+    Output('data-preview', 'page_current'),
     Input('group-dropdown', 'value'),
     Input('region-dropdown', 'value'),
     Input('instrument-dropdown', 'value'),
-    Input('month-dropdown', 'value')
+    Input('month-dropdown', 'value'),
+    Input('data-preview', 'page_current'),
+    Input('data-preview', 'page_size'),
+    Input('data-preview', 'sort_by'),
+    Input('data-preview', 'filter_query')
 )
-def update_table(group, region, instrument, month):
+def update_table(group, region, instrument, month, page_current, page_size, sort_by, filter_query):
     # Ensure all dropdowns have a value selected before filtering
     if None in [group, region, instrument, month]:
-        return [], []
-
-    filtered_df = data[
-        (data['Group'] == group) &
-        (data['Region'] == region) &
-        (data['InstrumentName'] == instrument) &
-        (data['Month'] == month)
-    ].copy()
+        return [], [], 1, 0
 
-    filtered_df = filtered_df.sort_values("Date")
+    filtered_df = store.get(group, region, instrument, month).copy()
     filtered_df["LastTrade"] = pd.to_datetime(filtered_df["LastTrade"], errors="coerce")
     filtered_df["Date"] = pd.to_datetime(filtered_df["Date"], errors="coerce")
     filtered_df["Year"] = filtered_df["Date"].dt.year
 
     if filtered_df.empty:
-        return [], []
+        return [], [], 1, 0
 
     columns = [{"name": i, "id": i} for i in filtered_df.columns]
-    return filtered_df.to_dict("records"), columns
+    records, page_count, page_current = query_page(filtered_df, page_current, page_size, sort_by, filter_query)
+    return records, columns, page_count, page_current
 
 if __name__ == '__main__':
-    app.run(debug=True, port=8051)
\ No newline at end of file
+    # Development server; use `python serve.py preset` for multi-worker serving
+    app.run(debug=os.getenv("DASH_DEBUG", "1") == "1", port=8051)
\ No newline at end of file
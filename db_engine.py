@@ -0,0 +1,57 @@
+#db_engine.py
+
+import os
+from urllib import parse
+
+from sqlalchemy import create_engine, event
+
+
+def create_db_engine(schemas=()):
+    """
+    Engine of the SQL Server database configured in credential.env (DB_SERVER, DB_NAME, DB_USERNAME,
+    DB_PASSWORD), or of the SQLAlchemy URL in DB_URL when that is set, e.g. DB_URL=sqlite:///offline.sqlite
+    to build and serve the presets without SQL Server.
+
+    SQLite has no schemas, so every name in schemas is attached as its own database file next to the main
+    one (offline.TradePriceAnalyzer.sqlite), and schema-qualified tables work unchanged.
+    """
+    db_url = os.getenv("DB_URL")
+    if not db_url:
+        connecting_string = (
+            f"Driver={{ODBC Driver 18 for SQL Server}};"
+            f"Server={os.getenv('DB_SERVER')};"
+            f"Database={os.getenv('DB_NAME')};"
+            f"Uid={os.getenv('DB_USERNAME')};"
+            f"Pwd={os.getenv('DB_PASSWORD')};"
+            f"Encrypt=yes;"
+            f"TrustServerCertificate=no;"
+            f"Connection Timeout=30;"
+        )
+        params = parse.quote_plus(connecting_string)
+        return create_engine(f"mssql+pyodbc:///?odbc_connect={params}", fast_executemany=True)
+
+    engine = create_engine(db_url)
+    database = engine.url.database
+    if engine.dialect.name == "sqlite":
+        # pysqlite commits before every DDL statement; let SQLAlchemy issue BEGIN itself, so a writer's
+        # DROP/CREATE/INSERT (e.g. TableWriter.replace) is rolled back as one transaction when the load fails
+        @event.listens_for(engine, "connect")
+        def disable_pysqlite_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def begin(connection):
+            connection.exec_driver_sql("BEGIN")
+
+    if engine.dialect.name == "sqlite" and schemas:
+        stem = os.path.splitext(database)[0] if database and database != ":memory:" else None
+        attachments = {schema: f"{stem}.{schema}.sqlite" if stem else ":memory:" for schema in dict.fromkeys(schemas) if schema}
+
+        @event.listens_for(engine, "connect")
+        def attach_schemas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for schema, path in attachments.items():
+                cursor.execute(f"ATTACH DATABASE ? AS \"{schema}\"", (path,))
+            cursor.close()
+
+    return engine
@@ -1,50 +1,181 @@
 #gcc_sparta_library.py
 
-import win32com.client
-import pythoncom
+import numpy as np
 import pandas as pd
 from datetime import datetime
+import io
+import operator
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+# The MV COM client only exists on Windows; without it the module still imports (e.g. for a custom backend)
+try:
+    import win32com.client
+    import pythoncom
+    COM_AVAILABLE = True
+except ImportError:
+    win32com = pythoncom = None
+    COM_AVAILABLE = False
+
 # Load environment variables from .env file
 load_dotenv("credential.env")
 
-def connect_to_mv_com_server():
-    """Establish connection to MV COM server using credentials from .env file."""
-    try:
-        # Fetch credentials from environment variables
-        server = os.getenv("USERNAME_LOGIN")
-        password = os.getenv("PASSWORD_LOGIN")
+def dispatch_mv_connection():
+    """Default backend of MVConnectionPool: a new ServerConnection, connected with the credentials from .env."""
+    if not COM_AVAILABLE:
+        raise RuntimeError("win32com/pythoncom are not available, the MV COM server cannot be used.")
 
-        if not server or not password:
-            raise ValueError("Credentials are missing in the environment file.")
+    # Fetch credentials from environment variables
+    server = os.getenv("USERNAME_LOGIN")
+    password = os.getenv("PASSWORD_LOGIN")
 
-        pythoncom.CoInitialize()
-        con = win32com.client.Dispatch("Mv.Connectivity.ComClient.ServerConnection")
-        con.Connect(server, password)
-        return con
+    if not server or not password:
+        raise ValueError("Credentials are missing in the environment file.")
+
+    pythoncom.CoInitialize()
+    con = win32com.client.Dispatch("Mv.Connectivity.ComClient.ServerConnection")
+    con.Connect(server, password)
+    return con
+
+def connect_to_mv_com_server():
+    """Establish a new (unpooled) connection to MV COM server using credentials from .env file."""
+    try:
+        return dispatch_mv_connection()
     except Exception as e:
         print(f"Error connecting to MV COM server: {e}")
         return None
 
+def is_connected(con):
+    """Default health check: the connection's IsConnected flag, if the COM object exposes one."""
+    return bool(getattr(con, "IsConnected", True))
+
+# HRESULTs of a com_error raised because the COM server or the connection to it is gone, as opposed to a
+# failed request (unknown symbol, bad arguments) on a working connection
+COM_TRANSPORT_HRESULTS = {
+    0x800706BA,  # RPC_S_SERVER_UNAVAILABLE
+    0x800706BE,  # RPC_S_CALL_FAILED
+    0x800706BF,  # RPC_S_CALL_FAILED_DNE
+    0x80010100,  # RPC_E_SYS_CALL_FAILED
+    0x80010108,  # RPC_E_DISCONNECTED
+    0x800401FD,  # CO_E_OBJNOTCONNECTED
+}
+
+def is_transport_error(error):
+    """True for errors that mean the connection is lost: COM transport HRESULTs and ConnectionError."""
+    if isinstance(error, ConnectionError):
+        return True
+    hresult = getattr(error, "hresult", None)
+    return isinstance(hresult, int) and (hresult & 0xFFFFFFFF) in COM_TRANSPORT_HRESULTS
+
+class MVConnectionPool:
+    """
+    Keeps one connected ServerConnection per thread and hands it out again instead of reconnecting for every
+    request. COM objects belong to the apartment of the thread that created them, hence one per thread rather
+    than a shared set.
+
+    A connection that has been idle for more than check_after seconds is health checked before it is reused
+    and replaced if the check fails. run() also replaces the connection when a call fails because the
+    connection is lost (a transport error, or the health check fails after the error), and retries the call
+    once unless it is a write. Other errors, such as an unknown symbol, are raised on the kept connection.
+
+    :param backend: callable() returning a new connected ServerConnection, dispatch_mv_connection by default
+    :param health_check: callable(con) returning False for a dead connection, is_connected by default
+    """
+
+    def __init__(self, backend=None, health_check=None, check_after=60):
+        self.backend = backend or dispatch_mv_connection
+        self.health_check = health_check or is_connected
+        self.check_after = check_after
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {"connects": 0, "reuses": 0, "reconnects": 0}
+
+    @property
+    def stats(self):
+        """Counters: connects (new connections), reuses (pooled connection handed out), reconnects."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _healthy(self, con):
+        try:
+            return self.health_check(con)
+        except Exception:
+            return False
+
+    def get(self):
+        """The calling thread's connection, connecting (or reconnecting) when there is none or it is unhealthy."""
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            if time.monotonic() - self._local.last_used <= self.check_after or self._healthy(con):
+                self._local.last_used = time.monotonic()
+                self._count("reuses")
+                return con
+            self._count("reconnects")
+            self.discard()
+
+        con = self.backend()
+        if con is None:
+            raise RuntimeError("Failed to connect to MV COM server.")
+        self._count("connects")
+        self._local.con = con
+        self._local.last_used = time.monotonic()
+        return con
+
+    def discard(self):
+        """Drops the calling thread's connection, the next get() connects again."""
+        con = getattr(self._local, "con", None)
+        self._local.con = None
+        disconnect = getattr(con, "Disconnect", None)
+        if disconnect is not None:
+            try:
+                disconnect()
+            except Exception:
+                pass
+
+    def run(self, fn, retry=True):
+        """
+        Calls fn(con) with the pooled connection. If the connection was lost it is replaced, and with retry the
+        call is made once more on the new one; pass retry=False for calls that must not run twice (writes).
+        """
+        con = self.get()
+        try:
+            return fn(con)
+        except Exception as e:
+            if not is_transport_error(e) and self._healthy(con):
+                raise
+            self._count("reconnects")
+            self.discard()
+            if not retry:
+                raise
+            print(f"MV COM connection lost ({e}), reconnecting and retrying.")
+            return fn(self.get())
+
+# Connections shared by all fetch functions that are not given one explicitly
+mv_pool = MVConnectionPool()
+
+def _with_connection(con, fn, retry=True):
+    """fn(con) on the given connection, or on a pooled one (reconnecting when it was lost) when con is None."""
+    if con is not None:
+        return fn(con)
+    return mv_pool.run(fn, retry=retry)
+
 def fetch_daily_data(con, symbol: str, start_date: datetime, end_date: datetime):
-    """Fetch daily data for the given symbol and date range."""
-    try:
-        daily_data_raw = con.GetDailyRange(symbol=symbol, From=start_date, to=end_date)
-        return list(daily_data_raw)
-    except Exception as e:
-        print(f"Error fetching daily data: {e}")
-        return []
+    """
+    Fetch daily data for the given symbol and date range.
+    Errors are raised, so the connection pool can tell a lost connection from a failed request.
+    """
+    return list(con.GetDailyRange(symbol=symbol, From=start_date, to=end_date))
 
 def fetch_option_chain_data(con, symbol: str, strike_num: int):
-    """Fetch option chain data for the given symbol and number of strikes."""
-    try:
-        option_data_raw = con.GetOptionChain(symbol, strike_num)
-        return list(option_data_raw)
-    except Exception as e:
-        print(f"Error fetching option chain data: {e}")
-        return []
+    """Fetch option chain data for the given symbol and number of strikes; errors are raised."""
+    return list(con.GetOptionChain(symbol, strike_num))
 
 def inspect_com_object(obj, depth=0, max_depth=1):
     """
@@ -75,99 +206,99 @@ def inspect_com_object(obj, depth=0, max_depth=1):
     print(f"{indent}-----------------------------------")
 
 
-def daily_data_to_dataframe(daily_data):
-    """Converts list of daily COM data objects to a pandas DataFrame."""
-    data = []
-    for day in daily_data:
+MV_DAILY_COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume", "OpenInterest"]
+
+# COM attribute read for each column of daily_data_to_dataframe
+DAILY_BAR_ATTRIBUTES = ["StringDateTime", "Open", "High", "Low", "Close", "Volume", "OpenInterest"]
+
+# Attributes read from the Call and Put OptionValue objects of each option chain row
+OPTION_VALUE_ATTRIBUTES = [
+    "PriceSymbol", "ImpVol", "TheoVal", "Delta", "Gamma", "Rho",
+    "Theta", "Vega", "Last", "TradeTime", "Bid", "Ask",
+    "OpenInterest", "Volume", "ContractDate", "ExpirationDate", "DTE"
+]
+
+def com_columns(objects, attributes, label="record"):
+    """
+    Reads the given attributes of every COM object into one preallocated object array per attribute.
+
+    Each object is read with a single attrgetter call; only objects missing one of the attributes fall
+    back to getattr per attribute (missing ones give None, as does an object that is None). Objects that
+    raise anything else are reported and left out.
+
+    :return: tuple (dict of attribute -> numpy object array, boolean array of the objects that were read)
+    """
+    n = len(objects)
+    columns = np.empty((len(attributes), n), dtype=object)
+    keep = np.ones(n, dtype=bool)
+    get_all = operator.attrgetter(*attributes)
+    single = len(attributes) == 1
+
+    for k, obj in enumerate(objects):
+        if obj is None:
+            continue
         try:
-            row = {
-                "Date": pd.to_datetime(getattr(day, "StringDateTime", None)),
-                "Open": getattr(day, "Open", None),
-                "High": getattr(day, "High", None),
-                "Low": getattr(day, "Low", None),
-                "Close": getattr(day, "Close", None),
-                "Volume": getattr(day, "Volume", None),
-                "OpenInterest": getattr(day, "OpenInterest", None),
-            }
-            data.append(row)
+            try:
+                values = get_all(obj)
+                if single:
+                    values = (values,)
+            except AttributeError:
+                values = [getattr(obj, attr, None) for attr in attributes]
+            # element by element, so COM objects are stored as they are and never unpacked as sequences
+            for j, value in enumerate(values):
+                columns[j, k] = value
         except Exception as e:
-            print(f"Error processing record: {e}")
-    return pd.DataFrame(data)
+            print(f"Error processing {label} (row {k}): {e}")
+            keep[k] = False
+    return dict(zip(attributes, columns)), keep
+
+def to_datetimes(values):
+    """Parses an array of date strings / COM dates in one call, as timezone-naive timestamps."""
+    try:
+        dates = pd.DatetimeIndex(pd.to_datetime(values))
+    except (ValueError, TypeError):
+        # mixed formats or time zones: parse element-wise formats, normalized through UTC
+        dates = pd.DatetimeIndex(pd.to_datetime(values, format="mixed", errors="coerce", utc=True))
+    return dates.tz_localize(None) if dates.tz is not None else dates
+
+def daily_data_to_dataframe(daily_data):
+    """Converts list of daily COM data objects to a pandas DataFrame."""
+    daily_data = list(daily_data)
+    columns, keep = com_columns(daily_data, DAILY_BAR_ATTRIBUTES)
+
+    data = {column: columns[attr][keep] for column, attr in zip(MV_DAILY_COLUMNS, DAILY_BAR_ATTRIBUTES)}
+    data["Date"] = to_datetimes(data["Date"])
+    return pd.DataFrame(data).infer_objects()
+
+def _days_to_expiry(dte, expiration, now):
+    """DTE where the server left it empty: whole days from now to ExpirationDate, computed for all rows at once."""
+    missing = pd.isna(dte) & pd.notna(expiration)
+    if missing.any():
+        days = (to_datetimes(expiration[missing]) - pd.Timestamp(now)).days
+        dte = dte.copy()
+        dte[missing] = [None if pd.isna(d) else int(d) for d in days]
+    return dte
 
 def option_chain_to_dataframe(option_chain_data):
     """
     Converts list of option chain COM data objects to a pandas DataFrame,
     capturing all relevant fields from the provided image.
     """
-    data = []
-    
-    # Define a set of attributes to try and extract from the OptionValue COM object
-    # These are common attributes for both Call and Put objects in the option chain.
-    option_value_attrs = [
-        "PriceSymbol", "ImpVol", "TheoVal", "Delta", "Gamma", "Rho",
-        "Theta", "Vega", "Last", "TradeTime", "Bid", "Ask",
-        "OpenInterest", "Volume", "ContractDate", "ExpirationDate", "DTE" # Added DTE
-    ]
-
-    for i, opt_row in enumerate(option_chain_data):
-        try:
-            # Get common data for the strike row
-            underlying_price = getattr(opt_row, "Price", None) # This is actually the Strike Price
-            atm_index = getattr(opt_row, "AtmIndex", None)
-            
-            # Extract Call and Put COM objects
-            call_data = getattr(opt_row, "Call", None)
-            put_data = getattr(opt_row, "Put", None)
-
-            # Optional: Inspect the first COM object to help debug and discover attributes
-            # For general use, keep inspect_first in get_mv_data as False
-            # if i == 0 and True: # Set to True for verbose inspection
-            #     print("\n--- Inspecting Option Chain Row COM Object (first row) ---")
-            #     inspect_com_object(opt_row, max_depth=2) # Inspect deeper to find nested objects like Call/Put
-
-            # Initialize row with common data (Underlying_Price from GetQuote will be used)
-            row = {
-                "Strike": underlying_price, # 'Price' in OptionChainRow is the Strike
-                "ATM_Index": atm_index
-            }
-            
-            # Add call option data
-            if call_data:
-                for attr in option_value_attrs:
-                    value = getattr(call_data, attr, None)
-                    if attr == "DTE" and value is None: # Calculate DTE if not directly provided
-                        # Assuming ExpirationDate is a valid attribute
-                        exp_date_com = getattr(call_data, "ExpirationDate", None)
-                        if exp_date_com:
-                            exp_date = pd.to_datetime(exp_date_com)
-                            value = (exp_date - datetime.now()).days
-                    row[f"Call_{attr}"] = value
-            else:
-                # Add None for all call-specific columns if no call data
-                for attr in option_value_attrs:
-                    row[f"Call_{attr}"] = None
-
-            # Add put option data
-            if put_data:
-                for attr in option_value_attrs:
-                    value = getattr(put_data, attr, None)
-                    if attr == "DTE" and value is None: # Calculate DTE if not directly provided
-                        # Assuming ExpirationDate is a valid attribute
-                        exp_date_com = getattr(put_data, "ExpirationDate", None)
-                        if exp_date_com:
-                            exp_date = pd.to_datetime(exp_date_com)
-                            value = (exp_date - datetime.now()).days
-                    row[f"Put_{attr}"] = value
-            else:
-                # Add None for all put-specific columns if no put data
-                for attr in option_value_attrs:
-                    row[f"Put_{attr}"] = None
-
-            data.append(row)
-        except Exception as e:
-            print(f"Error processing option record (row {i}): {e}")
-    
-    df = pd.DataFrame(data)
+    option_chain_data = list(option_chain_data)
+    # "Price" in OptionChainRow is the Strike
+    rows, keep = com_columns(option_chain_data, ["Price", "AtmIndex", "Call", "Put"], label="option record")
+
+    data = {"Strike": rows["Price"][keep], "ATM_Index": rows["AtmIndex"][keep]}
+    now = datetime.now()
+    for side in ("Call", "Put"):
+        # a row without a Call (or Put) object gets None in all of its columns
+        side_objects = [obj if obj else None for obj in rows[side][keep]]
+        values, _ = com_columns(side_objects, OPTION_VALUE_ATTRIBUTES, label=f"{side} option value")
+        values["DTE"] = _days_to_expiry(values["DTE"], values["ExpirationDate"], now)
+        for attr in OPTION_VALUE_ATTRIBUTES:
+            data[f"{side}_{attr}"] = values[attr]
+
+    df = pd.DataFrame(data).infer_objects() if len(data["Strike"]) else pd.DataFrame()
     
     # Add 'Underlying_Price' column based on the image's layout.
     # This value typically comes from a separate quote fetch, not directly in each option chain row.
@@ -211,29 +342,124 @@ def option_chain_to_dataframe(option_chain_data):
     
     return df
 
-def get_mv_data(symbol: str, data_type: str, start_date: datetime = None, end_date: datetime = None, strike_num: int = None, inspect_first: bool = False):
+def _mv_daily_frame(symbol: str, start_date: datetime, end_date: datetime, cache=None, con=None):
+    """Daily bars of one symbol as a DataFrame with MV_DAILY_COLUMNS, empty if the server returned none."""
+    if cache is None:
+        df = daily_data_to_dataframe(_with_connection(
+            con, lambda c: fetch_daily_data(c, symbol, start_date, end_date)))
+        return df if not df.empty else pd.DataFrame(columns=MV_DAILY_COLUMNS)
+
+    def fetch(from_date, to_date):
+        from_dt = datetime.combine(from_date, datetime.min.time())
+        to_dt = datetime.combine(to_date, datetime.max.time().replace(microsecond=0))
+        df = daily_data_to_dataframe(_with_connection(
+            con, lambda c: fetch_daily_data(c, symbol, from_dt, to_dt)))
+        if df.empty:
+            return "\t".join(MV_DAILY_COLUMNS), []
+
+        df = df[MV_DAILY_COLUMNS].dropna(subset=["Date"])
+        df["Date"] = pd.to_datetime(df["Date"])
+        lines = df.to_csv(sep="\t", header=False, index=False, lineterminator="\n").splitlines()
+        return "\t".join(MV_DAILY_COLUMNS), list(zip(df["Date"].dt.strftime("%Y-%m-%d"), lines))
+
+    header, lines = cache.get("mv", symbol, start_date, end_date, fetch)
+    if not lines:
+        return pd.DataFrame(columns=MV_DAILY_COLUMNS)
+    return pd.read_csv(io.StringIO("\n".join([header] + lines)), sep="\t", parse_dates=["Date"])
+
+def _get_mv_daily_cached(symbol: str, start_date: datetime, end_date: datetime, cache, con=None):
+    """Serve daily bars from a DailyBarCache, downloading only the bars missing locally."""
+    df = _mv_daily_frame(symbol, start_date, end_date, cache, con=con)
+    if df.empty:
+        raise ValueError("No daily data returned. This could be due to an invalid symbol or temporary server issue.")
+    return df
+
+MV_DAILY_MANY_COLUMNS = ["symbol"] + MV_DAILY_COLUMNS
+DAILY_STATUS_COLUMNS = ["symbol", "status", "rows", "error"]
+
+def get_mv_daily_many(symbols, start_date: datetime, end_date: datetime, max_workers: int = 4, cache=None,
+                      attempts: int = 3, on_done=None):
+    """
+    Fetch daily bars for many symbols concurrently, each worker thread on its own pooled MV connection.
+
+    symbols: contract symbols; duplicates are fetched once.
+    cache: optional DailyBarCache, as for get_mv_data.
+    attempts: tries per symbol when the request fails (an empty answer is not retried).
+    on_done: optional callable(symbol, status) called from the worker thread as each symbol finishes.
+
+    Returns a tuple (bars, status):
+    bars: long DataFrame with MV_DAILY_MANY_COLUMNS (symbol plus the daily bar columns), symbols in input order.
+    status: DataFrame with DAILY_STATUS_COLUMNS, one row per symbol; status is 'ok', 'empty' or 'error'.
+    """
+    def fetch(symbol):
+        df, error = None, None
+        for attempt in range(attempts):
+            try:
+                df = _mv_daily_frame(symbol, start_date, end_date, cache)
+                break
+            except Exception as e:
+                error = f"{e}"
+                print(f"Attempt {attempt + 1}: Error retrieving {symbol}: {e}")
+                if attempt + 1 < attempts:
+                    time.sleep(1)
+
+        status = "error" if df is None else "empty" if df.empty else "ok"
+        if on_done is not None:
+            on_done(symbol, status)
+        return df, (symbol, status, 0 if df is None else len(df), error if df is None else None)
+
+    symbols = list(dict.fromkeys(symbols))
+    results = [None] * len(symbols)
+    pending = iter(enumerate(symbols))
+    pending_lock = threading.Lock()
+
+    def worker():
+        # each worker keeps its pooled connection for all the symbols it takes, and disconnects it (in its
+        # own thread, as COM requires) once none are left
+        try:
+            while True:
+                with pending_lock:
+                    item = next(pending, None)
+                if item is None:
+                    return
+                results[item[0]] = fetch(item[1])
+        finally:
+            mv_pool.discard()
+
+    workers = max(1, min(max_workers, len(symbols)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mv-daily") as executor:
+        for future in [executor.submit(worker) for _ in range(workers)]:
+            future.result()
+
+    frames = [df.assign(symbol=symbol) for symbol, (df, _) in zip(symbols, results) if df is not None and not df.empty]
+    bars = pd.concat(frames, ignore_index=True)[MV_DAILY_MANY_COLUMNS] if frames else pd.DataFrame(columns=MV_DAILY_MANY_COLUMNS)
+    status = pd.DataFrame([row for _, row in results], columns=DAILY_STATUS_COLUMNS)
+    return bars, status
+
+def get_mv_data(symbol: str, data_type: str, start_date: datetime = None, end_date: datetime = None, strike_num: int = None, inspect_first: bool = False, cache=None, con=None):
     """
     Safely retrieve and process MV data.
     data_type can be 'daily' or 'option_chain'.
     For 'daily', start_date and end_date are required.
     For 'option_chain', strike_num is required.
     inspect_first: If True, performs a verbose inspection of the first COM object.
+    cache: optional DailyBarCache; 'daily' requests are then served from disk where possible.
+    con: optional connected ServerConnection to use instead of the calling thread's pooled one.
     """
-    con = connect_to_mv_com_server()
-    if con is None:
-        raise RuntimeError("Failed to connect to MV COM server.")
+    if cache is not None and data_type == 'daily' and start_date and end_date and not inspect_first:
+        return _get_mv_daily_cached(symbol, start_date, end_date, cache, con=con)
 
     data_raw = []
     try:
         if data_type == 'daily':
             if not start_date or not end_date:
                 raise ValueError("start_date and end_date are required for 'daily' data_type.")
-            data_raw = fetch_daily_data(con, symbol, start_date, end_date)
+            data_raw = _with_connection(con, lambda c: fetch_daily_data(c, symbol, start_date, end_date))
             
         elif data_type == 'option_chain':
             if strike_num is None:
                 raise ValueError("strike_num is required for 'option_chain' data_type.")
-            data_raw = fetch_option_chain_data(con, symbol, strike_num)
+            data_raw = _with_connection(con, lambda c: fetch_option_chain_data(c, symbol, strike_num))
         else:
             raise ValueError("Invalid data_type. Must be 'daily' or 'option_chain'.")
 
@@ -259,7 +485,7 @@ def get_mv_data(symbol: str, data_type: str, start_date: datetime = None, end_da
             # The Underlying_Price column in the option_chain_to_dataframe is a placeholder.
             # We can try to get the actual underlying price here using get_mv_quote.
             try:
-                underlying_quote = get_mv_quote(symbol)
+                underlying_quote = get_mv_quote(symbol, con=con)
                 if underlying_quote and 'Last' in underlying_quote:
                     df['Underlying_Price'] = underlying_quote['Last']
             except Exception as e:
@@ -269,17 +495,14 @@ def get_mv_data(symbol: str, data_type: str, start_date: datetime = None, end_da
     except Exception as e:
         raise RuntimeError(f"Failed to convert {data_type} data to DataFrame: {e}")
 
-def get_mv_quote(symbol: str):
+def get_mv_quote(symbol: str, con=None):
     """
     Get a detailed quote for the specified symbol.
     Includes all the quote attributes available in the VBA version.
+    con: optional connected ServerConnection, the calling thread's pooled one by default.
     """
-    con = connect_to_mv_com_server()
-    if con is None:
-        raise RuntimeError("Failed to connect to MV COM server.")
-    
     try:
-        quote = con.GetQuote(symbol)
+        quote = _with_connection(con, lambda c: c.GetQuote(symbol))
         
         # Create a dictionary containing all quote properties
         quote_data = {
@@ -327,17 +550,14 @@ def get_mv_quote(symbol: str):
     except Exception as e:
         raise RuntimeError(f"Failed to get quote data for {symbol}: {e}")
 
-def fetch_user_defined_formulas():
+def fetch_user_defined_formulas(con=None):
     """
     Fetch user defined formulas as shown in the VBA List_Click() function.
     Returns a DataFrame with the formulas.
+    con: optional connected ServerConnection, the calling thread's pooled one by default.
     """
-    con = connect_to_mv_com_server()
-    if con is None:
-        raise RuntimeError("Failed to connect to MV COM server.")
-    
     try:
-        formulas_raw = con.GetUserDefinedFormulas()
+        formulas_raw = _with_connection(con, lambda c: list(c.GetUserDefinedFormulas()))
         formulas_data = []
         
         for formula in formulas_raw:
@@ -353,17 +573,16 @@ def fetch_user_defined_formulas():
     except Exception as e:
         raise RuntimeError(f"Failed to fetch user defined formulas: {e}")
 
-def save_user_defined_formula(symbol: str, description: str, folder: str, definition: str):
+def save_user_defined_formula(symbol: str, description: str, folder: str, definition: str, con=None):
     """
     Save a user defined formula as shown in the VBA Save_Click() function.
+    con: optional connected ServerConnection, the calling thread's pooled one by default.
     """
-    con = connect_to_mv_com_server()
-    if con is None:
-        raise RuntimeError("Failed to connect to MV COM server.")
-    
     try:
-        result = con.SaveUserDefinedFormula(Symbol=symbol, Description=description, 
-                                           Folder=folder, Definition=definition)
+        # a write is not retried on a new connection, it may have been applied before the connection was lost
+        result = _with_connection(con, lambda c: c.SaveUserDefinedFormula(Symbol=symbol, Description=description,
+                                                                           Folder=folder, Definition=definition),
+                                  retry=False)
         return result
     except Exception as e:
         raise RuntimeError(f"Failed to save user defined formula: {e}")
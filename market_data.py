@@ -0,0 +1,155 @@
+#market_data.py
+
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from GvWSConnection import TimeSeriesFields
+from gcc_sparta_library import get_mv_daily_many
+
+# Columns of every provider's fetch_daily result
+DAILY_COLUMNS = ["symbol", "Date", "close"]
+
+# Files FileProvider reads from a directory
+DATA_FILE_SUFFIXES = (".csv", ".csv.gz", ".parquet")
+
+
+def empty_daily_frame():
+    return pd.DataFrame({"symbol": pd.Series(dtype=object), "Date": pd.Series(dtype="datetime64[ns]"),
+                         "close": pd.Series(dtype=float)})
+
+
+class MarketDataProvider:
+    """
+    A source of daily prices for the contract pipelines (see seasonalFunctions.assemble_contract_data).
+
+    fetch_daily(symbols, start, end) returns one long DataFrame with DAILY_COLUMNS (symbol, Date, close) for
+    all requested symbols; symbols without data are simply absent. Providers fetch the whole list in one
+    call, so they can batch and parallelize it as their backend allows.
+    """
+
+    # Identifies the source in cache keys and log lines
+    name = "provider"
+
+    def fetch_daily(self, symbols, start, end=None, progress=None):
+        """
+        :param symbols: contract symbols
+        :param start: first date (datetime)
+        :param end: last date (datetime), defaults to now
+        :param progress: optional callable(symbol) called as each symbol has been fetched
+        """
+        raise NotImplementedError
+
+
+class GvWSProvider(MarketDataProvider):
+    """
+    Daily prices from the GvWS web service. With a bar cache on the connection, the request goes through
+    get_daily, which the cache serves; otherwise the response is parsed with iter_daily in chunk_size frames
+    while it is received, so the whole response text is never held in memory.
+    """
+
+    name = "gvws"
+
+    def __init__(self, conn, chunk_size=10000):
+        self.conn = conn
+        self.chunk_size = chunk_size
+
+    def fetch_daily(self, symbols, start, end=None, progress=None):
+        symbols = list(symbols)
+        fields = [TimeSeriesFields.symbol, TimeSeriesFields.trade_date, TimeSeriesFields.close]
+        if getattr(self.conn, 'cache', None) is not None:
+            frames = [self.conn.get_daily(symbols, fields, start_date=start, end_date=end, as_frame=True)]
+            if progress is not None:
+                for symbol in symbols:
+                    progress(symbol)
+        else:
+            frames = list(self._stream_daily(symbols, fields, start, end, progress))
+
+        frames = [df for df in frames if df is not None and not df.empty]
+        if not frames:
+            return empty_daily_frame()
+        df = pd.concat(frames, ignore_index=True)
+        return df.rename(columns={'pricesymbol': 'symbol', 'tradedatetimeutc': 'Date'})[DAILY_COLUMNS]
+
+    def _stream_daily(self, symbols, fields, start, end, progress):
+        # the bars of a symbol arrive together, so a symbol is done once the next one starts
+        done = set()
+        for chunk in self.conn.iter_daily(symbols, fields, start_date=start, end_date=end, as_frame=True,
+                                          chunk_size=self.chunk_size):
+            yield chunk
+            if progress is not None and len(chunk):
+                for symbol in chunk[TimeSeriesFields.symbol].unique()[:-1]:
+                    if symbol.upper() not in done:
+                        done.add(symbol.upper())
+                        progress(symbol)
+
+        if progress is not None:
+            for symbol in symbols:
+                if str(symbol).upper() not in done:
+                    progress(symbol)
+
+
+class MVProvider(MarketDataProvider):
+    """Daily prices from the MV COM server, fetched concurrently over pooled connections (get_mv_daily_many)."""
+
+    name = "mv"
+
+    def __init__(self, cache=None, max_workers=4, attempts=3):
+        self.cache = cache
+        self.max_workers = max_workers
+        self.attempts = attempts
+
+    def fetch_daily(self, symbols, start, end=None, progress=None):
+        bars, status = get_mv_daily_many(symbols, start, end or datetime.now(), max_workers=self.max_workers,
+                                         cache=self.cache, attempts=self.attempts,
+                                         on_done=(lambda symbol, _: progress(symbol)) if progress else None)
+        for row in status.itertuples(index=False):
+            if row.status == "empty":
+                print(f"Empty DataFrame for {row.symbol}")
+            elif row.status == "error":
+                print(f"Failed to retrieve data for {row.symbol} after {self.attempts} attempts: {row.error}")
+
+        if bars.empty:
+            return empty_daily_frame()
+        return bars.rename(columns={'Close': 'close'})[DAILY_COLUMNS]
+
+
+class FileProvider(MarketDataProvider):
+    """
+    Daily prices from a local long-format file (CSV, optionally gzipped, or Parquet) with DAILY_COLUMNS,
+    or a directory of such files. The files are read once and kept in memory.
+    """
+
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._data is None:
+                paths = ([os.path.join(self.path, f) for f in sorted(os.listdir(self.path)) if f.endswith(DATA_FILE_SUFFIXES)]
+                         if os.path.isdir(self.path) else [self.path])
+                frames = [pd.read_parquet(p, columns=DAILY_COLUMNS) if p.endswith(".parquet")
+                          else pd.read_csv(p, usecols=DAILY_COLUMNS, parse_dates=["Date"]) for p in paths]
+                data = pd.concat(frames, ignore_index=True) if frames else empty_daily_frame()
+                data["Date"] = pd.to_datetime(data["Date"])
+                # a bar found in several files is taken from the last one (files are read in name order)
+                data = data.drop_duplicates(["symbol", "Date"], keep="last")
+                self._data = data.sort_values(["symbol", "Date"], kind="stable").reset_index(drop=True)
+            return self._data
+
+    def fetch_daily(self, symbols, start, end=None, progress=None):
+        data = self._load()
+        symbols = list(symbols)
+        mask = data["symbol"].isin(symbols) & (data["Date"] >= pd.Timestamp(start))
+        if end is not None:
+            mask &= data["Date"] <= pd.Timestamp(end)
+        if progress is not None:
+            for symbol in symbols:
+                progress(symbol)
+        return data.loc[mask, DAILY_COLUMNS].reset_index(drop=True)
@@ -0,0 +1,197 @@
+#market_replay.py
+
+import itertools
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from market_data import DAILY_COLUMNS, FileProvider, MarketDataProvider, empty_daily_frame
+
+# live (default): the real backends; record: live, and every response is also written to MARKET_DATA_DIR;
+# replay: responses recorded in MARKET_DATA_DIR; synthetic: generated curves, no backend or recording needed
+MARKET_DATA_MODE = os.getenv("MARKET_DATA_MODE", "live").lower()
+MARKET_DATA_DIR = os.getenv("MARKET_DATA_DIR", "market_data_recordings")
+# Simulated backend latency of replay and synthetic mode, per request and per requested symbol
+MARKET_DATA_LATENCY_MS = float(os.getenv("MARKET_DATA_LATENCY_MS", "0"))
+MARKET_DATA_SYMBOL_LATENCY_MS = float(os.getenv("MARKET_DATA_SYMBOL_LATENCY_MS", "0"))
+# Seed of the synthetic curves
+MARKET_DATA_SEED = int(os.getenv("MARKET_DATA_SEED", "0"))
+
+# Modes that run without GvWS credentials or an MV COM server
+OFFLINE_MODES = ("replay", "synthetic")
+
+MONTH_CODES = "FGHJKMNQUVXZ"
+
+
+def _simulate_latency(latency, symbol_latency, symbols):
+    delay = latency + symbol_latency * len(symbols)
+    if delay > 0:
+        time.sleep(delay)
+
+
+class RecordingProvider(MarketDataProvider):
+    """
+    Passes requests through to another provider and writes every response as a gzipped CSV to directory,
+    in the format FileProvider / ReplayProvider read back.
+
+    Recording happens at the provider level, not in GvWSConnection._fetch_data or get_mv_data, so only daily
+    closes fetched through a MarketDataProvider are captured. Direct GvWSConnection and get_mv_data calls
+    (intraday bars, quotes, curves, option chains) are not recorded and cannot be replayed.
+    """
+
+    def __init__(self, provider, directory=MARKET_DATA_DIR):
+        self.provider = provider
+        self.name = provider.name
+        self.directory = directory
+        self._counter = itertools.count()
+        os.makedirs(directory, exist_ok=True)
+
+    def fetch_daily(self, symbols, start, end=None, progress=None):
+        bars = self.provider.fetch_daily(symbols, start, end, progress=progress)
+        # file names sort in recording order, so the latest recording of a bar wins on replay
+        name = f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}-{next(self._counter):06d}-{self.name}.csv.gz"
+        bars[DAILY_COLUMNS].to_csv(os.path.join(self.directory, name), index=False, compression="gzip")
+        return bars
+
+
+class ReplayProvider(FileProvider):
+    """Serves the responses recorded by RecordingProvider, with a simulated backend latency."""
+
+    name = "replay"
+
+    def __init__(self, directory=MARKET_DATA_DIR, latency=0.0, symbol_latency=0.0):
+        super().__init__(directory)
+        self.latency = latency
+        self.symbol_latency = symbol_latency
+
+    def fetch_daily(self, symbols, start, end=None, progress=None):
+        symbols = list(symbols)
+        _simulate_latency(self.latency, self.symbol_latency, symbols)
+        return super().fetch_daily(symbols, start, end, progress=progress)
+
+
+def contract_expiry(month_code, year):
+    """Synthetic last trade date: last business day of the contract month."""
+    return (pd.Timestamp(year, MONTH_CODES.index(month_code) + 1, 1) + pd.offsets.BMonthEnd(0)).normalize()
+
+
+def _contract_year(symbol):
+    yy = int(symbol[-2:])
+    return 2000 + yy if yy < 50 else 1900 + yy
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Deterministic, realistic looking futures curves for any symbol of the form ticker + month code + yy
+    (e.g. #BRGBMV25), so the pipelines can be run and benchmarked without any backend.
+
+    Every ticker has one random-walk spot price (seeded from the ticker name, so all contracts of a ticker
+    and all runs agree). A contract trades for history_years up to its contract_expiry, priced from the spot
+    with a ticker-specific carry over the time to expiry, a seasonal premium by contract month and a little
+    contract-specific noise. Nothing is returned after the as-of date (today by default).
+    """
+
+    name = "synthetic"
+
+    def __init__(self, seed=0, history_years=3, as_of=None, latency=0.0, symbol_latency=0.0):
+        self.seed = seed
+        self.history_years = history_years
+        self.as_of = pd.Timestamp(as_of or datetime.now()).normalize()
+        self.latency = latency
+        self.symbol_latency = symbol_latency
+        self._dates = pd.bdate_range("1990-01-01", self.as_of)
+        self._spots = {}
+        self._lock = threading.Lock()
+
+    def _rng(self, text):
+        return np.random.default_rng([self.seed, zlib.crc32(text.encode("utf-8"))])
+
+    def _spot(self, ticker):
+        with self._lock:
+            spot = self._spots.get(ticker)
+            if spot is None:
+                rng = self._rng(ticker)
+                level = rng.uniform(40, 700)
+                vol = rng.uniform(0.01, 0.025)
+                spot = level * np.exp(np.cumsum(rng.normal(0, vol, len(self._dates))))
+                self._spots[ticker] = spot
+            return spot
+
+    def contract_prices(self, symbol):
+        """All bars of one contract as a DAILY_COLUMNS frame (empty for symbols that are not a contract)."""
+        ticker, month_code = symbol[:-3], symbol[-3]
+        if month_code not in MONTH_CODES or not symbol[-2:].isdigit():
+            return empty_daily_frame()
+
+        expiry = contract_expiry(month_code, _contract_year(symbol))
+        first = expiry - pd.DateOffset(years=self.history_years)
+        lo, hi = self._dates.searchsorted(first), self._dates.searchsorted(expiry, side="right")
+        if lo >= hi:
+            return empty_daily_frame()
+
+        dates = self._dates[lo:hi]
+        ticker_rng = self._rng(ticker)
+        carry = ticker_rng.uniform(-0.08, 0.08)
+        amplitude, phase = ticker_rng.uniform(0.0, 0.08), ticker_rng.random()
+        seasonal = amplitude * np.sin(2 * np.pi * (MONTH_CODES.index(month_code) / 12 + phase))
+        years_to_expiry = (expiry - dates).days.to_numpy() / 365.25
+        noise = self._rng(symbol).normal(0, 0.003, len(dates))
+
+        close = self._spot(ticker)[lo:hi] * np.exp(carry * years_to_expiry + seasonal + noise)
+        return pd.DataFrame({"symbol": symbol, "Date": dates, "close": np.round(close, 3)})
+
+    def fetch_daily(self, symbols, start, end=None, progress=None):
+        symbols = list(dict.fromkeys(symbols))
+        _simulate_latency(self.latency, self.symbol_latency, symbols)
+
+        frames = []
+        for symbol in symbols:
+            bars = self.contract_prices(symbol)
+            mask = bars["Date"] >= pd.Timestamp(start)
+            if end is not None:
+                mask &= bars["Date"] <= pd.Timestamp(end)
+            frames.append(bars[mask])
+            if progress is not None:
+                progress(symbol)
+        return pd.concat(frames, ignore_index=True) if frames else empty_daily_frame()
+
+
+def synthetic_expiry_table(tickers, first_year, last_year):
+    """
+    Future expiry reference rows (Ticker, MonthCode, LastTrade as MM/DD/YYYY) matching SyntheticProvider's
+    contract_expiry, for the expiry table PriceBuilding_v101.py reads.
+    """
+    rows = [(ticker, code, contract_expiry(code, year).strftime("%m/%d/%Y"))
+            for ticker in tickers for year in range(first_year, last_year + 1) for code in MONTH_CODES]
+    return pd.DataFrame(rows, columns=["Ticker", "MonthCode", "LastTrade"])
+
+
+_offline_providers = {}
+_offline_lock = threading.Lock()
+
+
+def configure_provider(provider, mode=None):
+    """
+    The provider to use for a live provider in the configured MARKET_DATA_MODE. Replay and synthetic
+    providers are shared by all callers, so recordings are loaded and curves generated only once.
+    """
+    mode = (mode or MARKET_DATA_MODE).lower()
+    if mode == "live":
+        return provider
+    if mode == "record":
+        return RecordingProvider(provider, MARKET_DATA_DIR)
+    if mode not in OFFLINE_MODES:
+        raise ValueError(f"Unknown MARKET_DATA_MODE {mode!r}, expected live, record, replay or synthetic.")
+
+    with _offline_lock:
+        if mode not in _offline_providers:
+            latency, symbol_latency = MARKET_DATA_LATENCY_MS / 1000, MARKET_DATA_SYMBOL_LATENCY_MS / 1000
+            _offline_providers[mode] = (ReplayProvider(MARKET_DATA_DIR, latency, symbol_latency) if mode == "replay"
+                                        else SyntheticProvider(seed=MARKET_DATA_SEED, latency=latency,
+                                                              symbol_latency=symbol_latency))
+        return _offline_providers[mode]
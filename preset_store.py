@@ -0,0 +1,386 @@
+#preset_store.py
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import select, table, column, text, and_, func, inspect
+
+# Dropdown hierarchy of the dashboards, a selection of all four levels is one preset series
+HIERARCHY = ["Group", "Region", "InstrumentName", "Month"]
+
+SERIES_COLUMNS = ["Date", "Year", "spread", "LastTrade"] + HIERARCHY
+SEASONAL_COLUMNS = ["Year", "TradingDay", "Date", "spread"] + HIERARCHY
+STATS_COLUMNS = ["Latest", "Mean", "Median", "Std", "Count", "AsOf"] + HIERARCHY
+
+# Repeated text columns stored dictionary-encoded in the Arrow snapshot
+CATEGORICAL_COLUMNS = HIERARCHY + ["Year", "RollFlag", "Desc"]
+
+# File in the snapshot directory naming the build whose .arrow files are current
+SNAPSHOT_POINTER = "CURRENT"
+
+
+def _options(values):
+    return [{'label': v, 'value': v} for v in sorted(v for v in values if pd.notna(v))]
+
+
+def _hierarchy_options(keys):
+    """Option lists of every dropdown level, keyed by the selection of the levels above it."""
+    children = {}
+    for key in keys:
+        for level in range(len(HIERARCHY)):
+            children.setdefault(tuple(key[:level]), set()).add(key[level])
+    return {parent: _options(values) for parent, values in children.items()}
+
+
+class SqlPresetStore:
+    """
+    Preset data of the dashboards, read from the database on demand: only the distinct hierarchy is
+    queried at startup, and a series (with its seasonal curves and statistics) is loaded with parameterized
+    queries the first time it is selected. The last max_series series are kept in memory (least recently
+    used are dropped first).
+    """
+
+    def __init__(self, engine, name, schema=None, max_series=64, seasonal_name=None, stats_name=None,
+                 build_name=None):
+        self.engine = engine
+        self.max_series = max_series
+        self.schema = schema
+        self.build_name = build_name
+        self._table = table(name, *[column(c) for c in HIERARCHY + ["Date"]], schema=schema)
+        self._seasonal_table = self._optional_table(seasonal_name, schema, ["Date"])
+        self._stats_table = self._optional_table(stats_name, schema, [])
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+
+        hierarchy_query = select(*[self._table.c[c] for c in HIERARCHY]).distinct()
+        with engine.connect() as connection:
+            keys = [tuple(row) for row in connection.execute(hierarchy_query)]
+        self._keys = set(keys)
+        self._options = _hierarchy_options(keys)
+
+    def _optional_table(self, name, schema, extra_columns):
+        # tables written by older builds may not have the precomputed seasonal/statistics tables yet
+        if name is None or not inspect(self.engine).has_table(name, schema=schema):
+            return None
+        return table(name, *[column(c) for c in HIERARCHY + extra_columns], schema=schema)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def options(self, *parents):
+        """
+        Dropdown options of the level below the given selection, e.g. options() for groups,
+        options(group) for regions, options(group, region) for instruments.
+        """
+        return self._options.get(tuple(parents), [])
+
+    def change_marker(self):
+        """
+        Id of the last build, which the builder records in the build_name table whenever it changes the tables.
+        Tables written before that table existed fall back to the row count and latest Date of the table.
+        """
+        if self.build_name and inspect(self.engine).has_table(self.build_name, schema=self.schema):
+            build = table(self.build_name, column("BuildId"), schema=self.schema)
+            query = select(func.max(build.c.BuildId))
+        else:
+            query = select(func.count(), func.max(self._table.c.Date)).select_from(self._table)
+        with self.engine.connect() as connection:
+            return tuple(connection.execute(query).one())
+
+    def _select(self, source, key, columns):
+        if source is None:
+            return pd.DataFrame(columns=columns)
+        conditions = [source.c[c] == value for c, value in zip(HIERARCHY, key)]
+        query = select(text("*")).select_from(source).where(and_(*conditions))
+        if "Date" in source.c:
+            query = query.order_by(source.c.Date)
+        return pd.read_sql(query, con=self.engine)
+
+    def _load(self, key):
+        frame = self._select(self._table, key, SERIES_COLUMNS)
+        frame["Date"] = pd.to_datetime(frame["Date"], errors="coerce")
+        frame["LastTrade"] = pd.to_datetime(frame["LastTrade"], errors="coerce")
+
+        seasonal = self._select(self._seasonal_table, key, SEASONAL_COLUMNS)
+        seasonal["Date"] = pd.to_datetime(seasonal["Date"], errors="coerce")
+        stats = self._select(self._stats_table, key, STATS_COLUMNS)
+        return {"rows": frame.sort_values("Date", kind="stable").reset_index(drop=True),
+                "seasonal": seasonal.sort_values("Date", kind="stable").reset_index(drop=True),
+                "stats": stats.iloc[0].to_dict() if not stats.empty else {}}
+
+    def _entry(self, key):
+        with self._lock:
+            if key in self._series:
+                self._series.move_to_end(key)
+                return self._series[key]
+
+        if key not in self._keys:
+            return {"rows": pd.DataFrame(columns=SERIES_COLUMNS), "seasonal": pd.DataFrame(columns=SEASONAL_COLUMNS),
+                    "stats": {}}
+
+        entry = self._load(key)
+        with self._lock:
+            self._series[key] = entry
+            self._series.move_to_end(key)
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        return entry
+
+    def get(self, group, region, instrument, month):
+        """Date-sorted rows of one preset series (shared, callers must copy before modifying)."""
+        return self._entry((group, region, instrument, month))["rows"]
+
+    def seasonal(self, group, region, instrument, month):
+        """Precomputed seasonal curves (Year, TradingDay, Date, spread) of one preset series, ordered by Date."""
+        return self._entry((group, region, instrument, month))["seasonal"]
+
+    def stats(self, group, region, instrument, month):
+        """Precomputed summary statistics (Latest, Mean, Median, Std, Count, AsOf) of one preset series."""
+        return self._entry((group, region, instrument, month))["stats"]
+
+
+def write_snapshot(frames, directory):
+    """
+    Writes tables as Arrow IPC files the dashboards memory-map, one file per table.
+
+    Rows are sorted by preset and Date so every series is one contiguous block, and the repeated text
+    columns are dictionary-encoded. Each build gets new file names and the CURRENT pointer is switched last,
+    so a dashboard never sees a half-written snapshot (and files still mapped by a dashboard on Windows are
+    never overwritten).
+
+    :param frames: dictionary of table name -> DataFrame
+    :param directory: snapshot directory
+    :return: build id of the snapshot
+    """
+    os.makedirs(directory, exist_ok=True)
+    build_id = pd.Timestamp.now().strftime("%Y%m%d%H%M%S%f")
+
+    for name, frame in frames.items():
+        sort_columns = [c for c in HIERARCHY + ["Date"] if c in frame.columns]
+        frame = frame.sort_values(sort_columns, kind="stable") if sort_columns else frame
+        arrow_table = pa.Table.from_pandas(frame, preserve_index=False).combine_chunks()
+        for col in CATEGORICAL_COLUMNS:
+            if col in arrow_table.column_names:
+                index = arrow_table.column_names.index(col)
+                arrow_table = arrow_table.set_column(index, col, pc.dictionary_encode(arrow_table[col].cast(pa.string())))
+
+        with pa.OSFile(os.path.join(directory, f"{name}-{build_id}.arrow"), "wb") as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+
+    pointer = os.path.join(directory, SNAPSHOT_POINTER)
+    with open(pointer + ".tmp", "w") as f:
+        f.write(build_id)
+    os.replace(pointer + ".tmp", pointer)
+
+    # older builds, unless a dashboard still has them mapped (Windows keeps those files locked)
+    for file_name in os.listdir(directory):
+        if file_name.endswith(".arrow") and not file_name.endswith(f"-{build_id}.arrow"):
+            try:
+                os.remove(os.path.join(directory, file_name))
+            except OSError:
+                pass
+    return build_id
+
+
+def update_snapshot(frames, directory, presets):
+    """
+    Writes a new snapshot from the current one with the rows of some presets replaced, so an incremental build
+    does not have to read the whole tables back.
+
+    :param frames: dictionary of table name -> DataFrame with all rows of the presets (a preset with no rows
+                   in a frame is dropped from that table)
+    :param presets: DataFrame of the preset keys (HIERARCHY columns) to replace
+    :return: build id of the new snapshot, None if there is no current snapshot with these tables
+    """
+    build_id = snapshot_build_id(directory)
+    if build_id is None:
+        return None
+    paths = {name: os.path.join(directory, f"{name}-{build_id}.arrow") for name in frames}
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+
+    replaced = pd.MultiIndex.from_frame(presets[HIERARCHY].astype(str))
+    merged = {}
+    for name, frame in frames.items():
+        # read into memory, not mapped: the file is deleted once the new snapshot is current
+        with pa.OSFile(paths[name], "rb") as source:
+            current = ArrowPresetStore._to_pandas(pa.ipc.open_file(source).read_all())
+        if not current.empty:
+            current = current[~pd.MultiIndex.from_frame(current[HIERARCHY].astype(str)).isin(replaced)]
+        merged[name] = pd.concat([current, frame], ignore_index=True) if not frame.empty else current
+    return write_snapshot(merged, directory)
+
+
+def snapshot_build_id(directory):
+    """Build id of the current snapshot in directory, None if there is none."""
+    try:
+        with open(os.path.join(directory, SNAPSHOT_POINTER)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+class ArrowPresetStore:
+    """
+    Same interface as SqlPresetStore, backed by the memory-mapped Arrow snapshot written by PriceBuilding_v101.
+
+    The files are mapped, not read: all dashboard processes share the same pages through the OS cache and
+    startup only scans the dictionary-encoded key columns to find where each series starts. A selection is
+    converted to pandas when it is requested.
+    """
+
+    def __init__(self, directory, name, seasonal_name=None, stats_name=None):
+        self.directory = directory
+        self.build_id = snapshot_build_id(directory)
+        if self.build_id is None:
+            raise FileNotFoundError(f"No preset snapshot in {directory}")
+
+        self._table = self._open(name)
+        self._series = self._index(self._table)
+        self._seasonal_table = self._open(seasonal_name)
+        self._seasonal = self._index(self._seasonal_table)
+
+        self._stats = {}
+        stats_table = self._open(stats_name)
+        if stats_table is not None:
+            for record in self._to_pandas(stats_table).to_dict("records"):
+                self._stats[tuple(record[c] for c in HIERARCHY)] = record
+
+        self._options = _hierarchy_options(self._series)
+
+    def _open(self, name):
+        path = os.path.join(self.directory, f"{name}-{self.build_id}.arrow") if name else None
+        if path is None or not os.path.exists(path):
+            return None
+        return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+    @staticmethod
+    def _index(arrow_table):
+        """Row range (start, length) of every series; rows are sorted by preset, so series are contiguous."""
+        if arrow_table is None or arrow_table.num_rows == 0:
+            return {}
+        keys = arrow_table.select(HIERARCHY).to_pandas()
+        codes = np.column_stack([keys[c].cat.codes.to_numpy() for c in HIERARCHY])
+        starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]).any(axis=1)])
+        lengths = np.diff(np.r_[starts, len(codes)])
+        key_rows = keys.iloc[starts].astype(object).itertuples(index=False, name=None)
+        return {key: (int(start), int(length)) for key, start, length in zip(key_rows, starts, lengths)}
+
+    @staticmethod
+    def _to_pandas(arrow_table):
+        frame = arrow_table.to_pandas()
+        # categoricals are only a storage format, callbacks compare and sort these columns as text
+        for col in frame.columns:
+            if isinstance(frame[col].dtype, pd.CategoricalDtype):
+                frame[col] = frame[col].astype(object)
+        return frame
+
+    def __len__(self):
+        return len(self._series)
+
+    def change_marker(self):
+        return snapshot_build_id(self.directory)
+
+    def options(self, *parents):
+        """
+        Dropdown options of the level below the given selection, e.g. options() for groups,
+        options(group) for regions, options(group, region) for instruments.
+        """
+        return self._options.get(tuple(parents), [])
+
+    def get(self, group, region, instrument, month):
+        """Date-sorted rows of one preset series."""
+        rows = self._series.get((group, region, instrument, month))
+        if rows is None:
+            return pd.DataFrame(columns=SERIES_COLUMNS)
+        return self._to_pandas(self._table.slice(*rows))
+
+    def seasonal(self, group, region, instrument, month):
+        """Precomputed seasonal curves (Year, TradingDay, Date, spread) of one preset series, ordered by Date."""
+        rows = self._seasonal.get((group, region, instrument, month))
+        if rows is None:
+            return pd.DataFrame(columns=SEASONAL_COLUMNS)
+        return self._to_pandas(self._seasonal_table.slice(*rows))
+
+    def stats(self, group, region, instrument, month):
+        """Precomputed summary statistics (Latest, Mean, Median, Std, Count, AsOf) of one preset series."""
+        return self._stats.get((group, region, instrument, month), {})
+
+
+class ReloadingStore:
+    """
+    Keeps a store up to date with the database without restarting the dashboard.
+
+    A daemon thread calls marker() every interval seconds; when its value changes, a new store is built with
+    factory() and swapped in with a single reference assignment. Callbacks that already hold the old store
+    finish on it, and it is released as soon as they return.
+    """
+
+    def __init__(self, factory, marker, interval=300):
+        self.factory = factory
+        self.marker = marker
+        self.interval = interval
+        self._store = factory()
+        self._marker = marker(self._store)
+        self._thread = None
+        self._stop = threading.Event()
+        self._fork_hook = False
+
+    @property
+    def store(self):
+        return self._store
+
+    def options(self, *parents):
+        return self._store.options(*parents)
+
+    def get(self, group, region, instrument, month):
+        return self._store.get(group, region, instrument, month)
+
+    def seasonal(self, group, region, instrument, month):
+        return self._store.seasonal(group, region, instrument, month)
+
+    def stats(self, group, region, instrument, month):
+        return self._store.stats(group, region, instrument, month)
+
+    def refresh(self):
+        """Reload if the data changed since the last check, returns True if a new store was swapped in."""
+        marker = self.marker(self._store)
+        if marker == self._marker:
+            return False
+        self._store = self.factory()
+        self._marker = marker
+        print(f"Preset data reloaded ({marker})")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # keep serving the current data, try again on the next interval
+                print(f"Preset data reload failed: {e}")
+
+    def start(self):
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="preset-reload", daemon=True)
+            self._thread.start()
+            if hasattr(os, "register_at_fork") and not self._fork_hook:
+                # threads do not survive fork (e.g. gunicorn workers of a preloaded app), start one per worker;
+                # the hook is inherited by the children, so it is registered once
+                os.register_at_fork(after_in_child=self._restart_in_child)
+                self._fork_hook = True
+        return self
+
+    def _restart_in_child(self):
+        self._thread = None
+        self._stop = threading.Event()
+        self.start()
+
+    def stop(self):
+        self._stop.set()
@@ -1,11 +1,14 @@
 from GvWSConnection import *
 from datetime import datetime as dt
 import pandas as pd
-from datetime import timedelta, datetime as dt
-import sys
-from gcc_sparta_library import get_mv_data
+import numpy as np
+from daily_bar_cache import DailyBarCache
+from market_data import MarketDataProvider, GvWSProvider, MVProvider, empty_daily_frame
+from market_replay import configure_provider
+from cache_keys import canonical_key
 from dotenv import load_dotenv
 import os
+import threading
 
 # Load environment variables from .env file
 load_dotenv("credential.env")
@@ -13,7 +16,15 @@ load_dotenv("credential.env")
 GvWSUSERNAME = os.getenv("GvWSUSERNAME")
 GvWSPASSWORD = os.getenv("GvWSPASSWORD")
 
-conn = GvWSConnection(GvWSUSERNAME, GvWSPASSWORD)
+# Settled daily bars are kept on disk, so expired contracts are not downloaded again on every run
+daily_cache = DailyBarCache(os.getenv("DAILY_BAR_CACHE", "daily_bar_cache.sqlite"))
+
+conn = GvWSConnection(GvWSUSERNAME, GvWSPASSWORD, cache=daily_cache)
+
+# Price sources of the pipelines; MARKET_DATA_MODE can record them, or replace them by recordings or
+# synthetic curves (see market_replay.py)
+gvws_provider = configure_provider(GvWSProvider(conn))
+mv_provider = configure_provider(MVProvider(cache=daily_cache))
 
 def generateYearList(contractMonthsList, yearOffsetList):
     if len(contractMonthsList) != len(yearOffsetList):
@@ -67,149 +78,111 @@ def contractMonths(expireIn,contractRollIn,ContractMonthIn):
 
 
 # Modified generate_contract_data function
-def generate_contract_data(tickerList, contractMonthsList, yearList, weightsList, convList, yearsBack, conn): # Renamed 'ticker' to 'tickerList' for clarity
-    contract_data = {}
-
-    # Calculate the past date (yearsBack + 2 years)
-    past_date = dt.today().replace(year=dt.today().year - (yearsBack + 2))
-
-    # Format it as 'MM/DD/YYYY'
-    startDate = past_date.strftime('%m/%d/%Y')
-
-    expireList = None  # Initialize expireList
-
-    # Iterate through the lists based on index to ensure correct pairing
-    for i in range(len(tickerList)): # Iterate using range(len(tickerList))
-        t = tickerList[i] # Current ticker symbol
-        contractMonth = contractMonthsList[i] # Current contract month code
-        startYear = int(yearList[i]) # Current start year
-        weight = weightsList[i] # Current weight
-        conv = convList[i] # Current conversion factor
-
-        # Create a unique key for each leg by combining ticker and contract month
-        unique_key = f"{t}{contractMonth}"
-
-        # Generate list of contracts going back 'yearsBack' years
-        contractList = [f"{t}{contractMonth}{str(startYear - y).zfill(2)}" for y in range(yearsBack)]
-        
-        # Retrieve daily prices
-        d1 = conn.get_daily(contractList, start_date=dt.strptime(startDate, '%m/%d/%Y'))
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(d1)
-        
-        # Rename columns properly
-        df.rename(columns={'pricesymbol': 'symbol', 'tradedatetimeutc': 'Date'}, inplace=True)
-        
-        # Select only the required columns
-        df = df.loc[:, ['symbol', 'Date', 'close']]
-        
-        # Compute weighted price
-        df['WeightedPrice'] = df['close'] * conv * weight # Use individual conv and weight
-        
-        # Store data in dictionary using the unique key
-        contract_data[unique_key] = { # Use unique_key here
-            'Prices df': df,
-            "ContractList": contractList,
-            "Weights": weight, # Use individual weight
-            "Conversion": conv # Use individual conv
-        }
-
-        # If it's the first leg (not just the first ticker), populate expireList
-        # This part of expireList generation needs to be reconsidered if expireList is expected to be a comprehensive list of *all* contract expiry month/year suffixes,
-        # otherwise, it will only contain suffixes from the first leg's contracts.
-        if i == 0:
-            expireList = [c[-3:] for c in contractList] # Example: ['F25', 'F24', ...]
-
-    return contract_data, expireList
-
-def generate_contract_data_sparta(ticker, contractMonthsList, yearList, weights, conv, yearsBack):
+def assemble_contract_data(provider, tickerList, contractMonthsList, yearList, weightsList, convList, yearsBack,
+                           progress=None, leg_cache=None):
     """
-    Generates contract data for a list of tickers, fetching daily prices using get_mv_data.
-    Retries fetching up to 3 times if data is not returned.
+    Builds the contract data of a spread from any MarketDataProvider: the contracts of all legs are fetched
+    with one fetch_daily call, then split per leg and weighted.
 
-    :param ticker: List of ticker symbols (e.g., ['SPX', 'NDX']).
+    :param provider: MarketDataProvider (see market_data.py) the daily prices come from.
+    :param tickerList: List of ticker symbols, one per leg.
     :param contractMonthsList: List of contract months corresponding to each ticker.
     :param yearList: List of starting years for contracts corresponding to each ticker.
-    :param weights: List of weights corresponding to each ticker.
-    :param conv: List of conversion factors corresponding to each ticker.
+    :param weightsList: List of weights corresponding to each ticker.
+    :param convList: List of conversion factors corresponding to each ticker.
     :param yearsBack: Number of years to go back for contract data.
+    :param progress: Optional callable(done, total, message) called after each contract is fetched.
+    :param leg_cache: Optional cache with get(key)/put(key, value) (e.g. spread_jobs.TTLCache) of raw leg
+                      prices; weights and conversion are applied after the lookup, so a re-weighted spread
+                      reuses them.
     :return: A tuple containing:
-             - contract_data (dict): A dictionary where keys are tickers and values are
-                                     dictionaries containing 'Prices df', 'ContractList',
+             - contract_data (dict): keys are ticker + contract month, values are dictionaries containing
+                                     'Prices df' (symbol, Date, close, WeightedPrice), 'ContractList',
                                      'Weights', and 'Conversion'.
-             - expireList (list): A list of the last 3 characters of each contract from the first ticker.
+             - expireList (list): A list of the last 3 characters of each contract of the first leg.
     """
+    start_date = dt.combine(dt.today().replace(year=dt.today().year - (yearsBack + 2)).date(), dt.min.time())
+    end_date = dt.now()
+    total_contracts = len(tickerList) * yearsBack
+
+    # Generate list of contracts going back 'yearsBack' years for every leg
+    legs = []
+    for i, t in enumerate(tickerList):
+        contractList = [f"{t}{contractMonthsList[i]}{str(int(yearList[i]) - y).zfill(2)}" for y in range(yearsBack)]
+        leg_key = canonical_key({'provider': provider.name, 'contracts': contractList, 'asOf': end_date.date()})
+        legs.append((contractList, leg_key, leg_cache.get(leg_key) if leg_cache is not None else None))
+
+    fetched = sum(len(contractList) for contractList, _, prices in legs if prices is not None)
+    if fetched and progress is not None:
+        progress(fetched, total_contracts, "Using cached prices")
+
+    # One batched request for the contracts of all legs that are not cached
+    symbols = [symbol for contractList, _, prices in legs if prices is None for symbol in contractList]
+    if symbols:
+        # providers may report from their worker threads (MVProvider does)
+        fetched_lock = threading.Lock()
+
+        def contract_fetched(symbol):
+            nonlocal fetched
+            with fetched_lock:
+                fetched += 1
+                if progress is not None:
+                    progress(fetched, total_contracts, f"Fetched {symbol}")
+
+        bars = provider.fetch_daily(symbols, start_date, end_date, progress=contract_fetched)
+        by_symbol = dict(tuple(bars.groupby('symbol', sort=False)))
+
     contract_data = {}
     expireList = None
+    for i, (contractList, leg_key, prices) in enumerate(legs):
+        t = tickerList[i]
+        if prices is None:
+            parts = [by_symbol[symbol] for symbol in contractList if symbol in by_symbol]
+            if parts:
+                prices = pd.concat(parts, ignore_index=True)
+                if leg_cache is not None:
+                    leg_cache.put(leg_key, prices)
+            else:
+                # The leg is kept (empty), so no spread is built from the remaining legs alone
+                print(f"No daily data retrieved for any contracts of ticker {t}.")
+                prices = empty_daily_frame()
+
+        # Compute weighted price
+        df = prices.copy()
+        df['WeightedPrice'] = df['close'] * convList[i] * weightsList[i]
 
-    past_date = dt.today().replace(year=dt.today().year - (yearsBack + 2))
-    start_date_obj = past_date
-    end_date_obj = dt.now()
-
-    for i, t in enumerate(ticker):
-        contractMonth = contractMonthsList[i]
-        startYear = int(yearList[i])
-        contractList = [f"{t}{contractMonth}{str(startYear - y).zfill(2)}" for y in range(yearsBack)] # Changed to zfill(2) to ensure two digits
-
-        all_contract_dfs = []
-        for contract_symbol in contractList:
-            success = False
-            for attempt in range(3):
-                try:
-                    contract_df = get_mv_data(
-                        symbol=contract_symbol,
-                        data_type='daily',
-                        start_date=start_date_obj,
-                        end_date=end_date_obj
-                    )
-
-                    if contract_df is not None and not contract_df.empty:
-                        contract_df = contract_df.copy()
-                        contract_df['symbol'] = contract_symbol
-                        all_contract_dfs.append(contract_df)
-                        print(f"Successfully retrieved daily data for contract: {contract_symbol}")
-                        success = True
-                        break  # exit retry loop
-                    else:
-                        print(f"Attempt {attempt + 1}: Empty DataFrame for {contract_symbol}")
-                except Exception as e:
-                    print(f"Attempt {attempt + 1}: Error retrieving {contract_symbol}: {e}")
-                import time # Import time module
-                time.sleep(1)  # optional: wait between retries
-
-            if not success:
-                print(f"Failed to retrieve data for {contract_symbol} after 3 attempts.")
-
-        if not all_contract_dfs:
-            print(f"No daily data retrieved for any contracts of ticker {t}. Skipping this ticker.")
-            continue
-
-        df = pd.concat(all_contract_dfs, ignore_index=True)
-        df.columns = [col.lower() for col in df.columns]
-        df.rename(columns={'date': 'Date', 'close': 'close'}, inplace=True)
-
-        required_cols = ['symbol', 'Date', 'close']
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            print(f"Warning: Missing columns {missing_cols} in DataFrame for {t}. Skipping this ticker.")
-            continue
-
-        df['WeightedPrice'] = df['close'] * conv[i] * weights[i]
-
-        contract_data[t] = {
+        # A unique key for each leg, so two legs on the same ticker do not overwrite each other
+        contract_data[f"{t}{contractMonthsList[i]}"] = {
             'Prices df': df,
             "ContractList": contractList,
-            "Weights": weights[i],
-            "Conversion": conv[i]
+            "Weights": weightsList[i],
+            "Conversion": convList[i]
         }
 
+        # If it's the first leg, populate expireList (e.g. ['F25', 'F24', ...])
         if i == 0:
             expireList = [c[-3:] for c in contractList]
 
     return contract_data, expireList
 
+def generate_contract_data(tickerList, contractMonthsList, yearList, weightsList, convList, yearsBack, conn, progress=None):
+    """
+    Contract data from GvWS (see assemble_contract_data). conn is a GvWSConnection, or any MarketDataProvider.
+    """
+    provider = conn if isinstance(conn, MarketDataProvider) else GvWSProvider(conn)
+    return assemble_contract_data(provider, tickerList, contractMonthsList, yearList, weightsList, convList,
+                                  yearsBack, progress=progress)
 
+def generate_contract_data_sparta(ticker, contractMonthsList, yearList, weights, conv, yearsBack, progress=None,
+                                  leg_cache=None, provider=None):
+    """
+    Contract data from the MV COM server (see assemble_contract_data), fetched concurrently over pooled
+    connections with failed requests retried up to 3 times.
+
+    :param provider: optional MarketDataProvider to use instead of the MV server.
+    """
+    return assemble_contract_data(provider or mv_provider, ticker, contractMonthsList, yearList, weights, conv,
+                                  yearsBack, progress=progress, leg_cache=leg_cache)
 
 def validate_contract_data(contract_data):
     contract_lengths = {ticker: len(data['ContractList']) for ticker, data in contract_data.items()}
@@ -234,4 +207,131 @@ def validate_contract_data(contract_data):
         for ticker in missing_data:
             print(f"{ticker}: Missing {['Weights' if 'Weights' not in contract_data[ticker] else 'Conversion'][0]}")
     else:
-        print("\u2705 All tickers have Weights and Conversion.")
\ No newline at end of file
+        print("\u2705 All tickers have Weights and Conversion.")
+
+def _spread_year(contract):
+    # Year from contract suffix (e.g., Z25 -> 2025, Z98 -> 1998)
+    year_suffix = int(contract[-2:])
+    return 2000 + year_suffix if year_suffix < 50 else 1900 + year_suffix
+
+
+def build_spreads(contract_data, year_to_last_trade):
+    """
+    Computes the spread of every contract year in one pass.
+
+    All legs' weighted prices are reshaped once into a (contract index, Date) x leg frame; a row is kept when
+    every leg that has a contract at that index has a price on that date, and the spread is the row sum.
+    A contract year where one leg has no prices at all is therefore dropped; the earlier per-contract loop
+    skipped that leg and stored a spread of the remaining legs.
+
+    :param contract_data: dictionary returned by generate_contract_data / generate_contract_data_sparta.
+    :param year_to_last_trade: dictionary of spread year (int) -> LastTrade date; years not in it are dropped.
+    :return: DataFrame with columns Date, Year (string), spread, LastTrade ordered by contract then Date.
+    """
+    columns = ['Date', 'Year', 'spread', 'LastTrade']
+    legs = list(contract_data.values())
+    num_contracts = max((len(data["ContractList"]) for data in legs), default=0)
+    if num_contracts == 0:
+        return pd.DataFrame(columns=columns)
+
+    # Tag every price row with its leg and the position of its contract in that leg's ContractList
+    parts = []
+    for leg_no, data in enumerate(legs):
+        prices = data["Prices df"]
+        contract_index = prices['symbol'].map({c: i for i, c in enumerate(data["ContractList"])})
+        parts.append(pd.DataFrame({'contract_no': contract_index, 'leg': leg_no, 'Date': prices['Date'],
+                                   'WeightedPrice': prices['WeightedPrice']}))
+    long_df = pd.concat(parts, ignore_index=True).dropna(subset=['contract_no'])
+    long_df['contract_no'] = long_df['contract_no'].astype(int)
+    long_df['Date'] = pd.to_datetime(long_df['Date'])
+
+    wide = long_df.groupby(['contract_no', 'Date', 'leg'], sort=True)['WeightedPrice'].last().unstack('leg')
+
+    # Number of legs with a contract at each index, and the spread year from the first of them
+    legs_needed = np.zeros(num_contracts, dtype=int)
+    index_year = np.zeros(num_contracts, dtype=int)
+    for i in range(num_contracts):
+        contracts = [data["ContractList"][i] for data in legs if i < len(data["ContractList"])]
+        legs_needed[i] = len(contracts)
+        index_year[i] = _spread_year(contracts[0])
+
+    # When two indexes give the same year the later one wins, as the spread_dict loops did
+    year_index = {year: i for i, year in enumerate(index_year) if year in year_to_last_trade}
+
+    values = wide.to_numpy()
+    row_index = wide.index.get_level_values('contract_no').to_numpy()
+    keep = (np.isin(row_index, list(year_index.values()))
+            & (np.count_nonzero(~np.isnan(values), axis=1) == legs_needed[row_index]))
+
+    years = index_year[row_index[keep]]
+    spreads = pd.DataFrame({
+        'Date': wide.index.get_level_values('Date')[keep],
+        'Year': years.astype(str),
+        'spread': np.nansum(values[keep], axis=1),
+        'LastTrade': pd.to_datetime(pd.Series(years).map(year_to_last_trade)).to_numpy(),
+    })
+    return spreads[columns]
+
+
+def seasonal_curves(series, today=None, trading_days=252):
+    """
+    Aligns one preset series by trading day, as plotted on the seasonal chart.
+
+    Every expired year (LastTrade <= today) with a full window contributes its last trading_days bars up to
+    LastTrade; the live contract contributes up to trading_days bars from the month after the latest expired
+    LastTrade, labelled "Current".
+
+    :param series: rows of one preset series (Date, Year, spread, LastTrade), sorted by Date.
+    :param today: as-of date, defaults to today.
+    :return: DataFrame with columns Year, TradingDay, Date, spread.
+    """
+    columns = ['Year', 'TradingDay', 'Date', 'spread']
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+
+    historical_df = series[series['LastTrade'] <= today]
+    current_df = series[series['LastTrade'] > today]
+
+    curves = []
+    for year, year_group in historical_df.groupby('Year', sort=False):
+        year_filtered = year_group[year_group['Date'] <= year_group['LastTrade'].max()].tail(trading_days)
+        if len(year_filtered) == trading_days:
+            curves.append(year_filtered[['Date', 'spread']].assign(Year=str(year), TradingDay=np.arange(1, trading_days + 1)))
+
+    if not historical_df.empty and not current_df.empty:
+        next_month_start = (historical_df['LastTrade'].max() + pd.offsets.MonthBegin(1)).normalize()
+        current_filtered = current_df[current_df['Date'] >= next_month_start].head(trading_days)
+        if not current_filtered.empty:
+            curves.append(current_filtered[['Date', 'spread']].assign(
+                Year="Current", TradingDay=np.arange(1, len(current_filtered) + 1)))
+
+    if not curves:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(curves, ignore_index=True)[columns]
+
+
+def build_seasonal_tables(spreads, today=None):
+    """
+    Seasonal curves and summary statistics of every preset series in a contractMargins frame.
+
+    :return: tuple (seasonal, stats) of DataFrames keyed by InstrumentName, Group, Region, Month.
+    """
+    keys = ['InstrumentName', 'Group', 'Region', 'Month']
+    as_of = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    seasonal, stats = [], []
+
+    groups = spreads.groupby(keys, sort=False) if not spreads.empty else []
+    for key, series in groups:
+        series = series.sort_values('Date', kind='stable')
+        curves = seasonal_curves(series, as_of)
+        for col, value in zip(keys, key):
+            curves[col] = value
+        seasonal.append(curves)
+
+        spread_values = series['spread']
+        stats.append(dict(zip(keys, key), Latest=spread_values.iloc[-1], Mean=spread_values.mean(),
+                          Median=spread_values.median(), Std=spread_values.std(), Count=len(spread_values),
+                          AsOf=as_of))
+
+    seasonal_df = pd.concat(seasonal, ignore_index=True) if seasonal else pd.DataFrame(columns=keys)
+    stats_df = pd.DataFrame(stats, columns=keys + ['Latest', 'Mean', 'Median', 'Std', 'Count', 'AsOf'])
+    return seasonal_df, stats_df
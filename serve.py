@@ -0,0 +1,67 @@
+#serve.py
+
+import argparse
+import importlib
+import os
+import sys
+
+# Dash apps that can be served, with their default ports (same as in dash_launcher.py)
+APPS = {
+    'launcher': {'module': 'dash_launcher', 'port': 8050},
+    'preset': {'module': 'dash_preset', 'port': 8051},
+    # background jobs are kept in the memory of the serving process, so it must not be split over processes
+    'on_the_fly': {'module': 'dash_onthefly', 'port': 8052, 'single_process': True},
+}
+
+
+def serve_gunicorn(module_name, host, port, workers, threads):
+    """
+    Multi-process serving on Linux/macOS. The app module is imported once in the master process before the
+    workers are forked (preload_app), so data loaded at import time is shared copy-on-write by all workers.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class DashApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{host}:{port}")
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('preload_app', True)
+            self.cfg.set('timeout', 120)
+
+        def load(self):
+            return importlib.import_module(module_name).server
+
+    DashApplication().run()
+
+
+def serve_waitress(module_name, host, port, workers, threads):
+    """Windows has no fork, so the app runs in one process with a thread pool of workers * threads."""
+    from waitress import serve
+
+    serve(importlib.import_module(module_name).server, host=host, port=port, threads=workers * threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a Dash app with a production WSGI server.")
+    parser.add_argument("app", choices=sorted(APPS), help="app to serve")
+    parser.add_argument("--host", default=os.getenv("DASH_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=None, help="defaults to the app's usual port")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("DASH_WORKERS", "4")),
+                        help="worker processes (thread pool multiplier on Windows)")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("DASH_THREADS", "4")),
+                        help="threads per worker")
+    args = parser.parse_args()
+
+    app = APPS[args.app]
+    port = args.port or app['port']
+    workers, threads = args.workers, args.threads
+    if app.get('single_process'):
+        workers, threads = 1, workers * threads
+    serve = serve_waitress if sys.platform == "win32" else serve_gunicorn
+    print(f"Serving {app['module']} on http://{args.host}:{port} ({workers} workers x {threads} threads)")
+    serve(app['module'], args.host, port, workers, threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+#spread_figures.py
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Long time series are reduced to about this many points before they are sent to the browser
+MAX_TIME_SERIES_POINTS = 2000
+
+LAYOUT_MARGIN = dict(l=40, r=40, t=60, b=40)
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of threshold points that keep the visual shape
+    of the line (peaks and troughs survive, unlike plain decimation).
+
+    :param x: numeric x values (e.g. datetime64 as int64), ascending
+    :param y: y values
+    :param threshold: number of points to keep
+    :return: numpy array of the selected indices, first and last point included
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # bucket edges for the n - 2 inner points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # average of the next bucket (the last point for the final bucket)
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def _values(series, dtype=np.float64):
+    # numpy arrays are serialized by plotly as base64 typed arrays instead of JSON number lists; prices stay
+    # float64, float32 would round them (e.g. 1234.567 to 1234.5670166)
+    return np.asarray(series, dtype=dtype)
+
+
+def seasonal_figure(seasonal_data, current_color="white"):
+    """
+    One line per season against TradingDay.
+
+    :param seasonal_data: dict of label -> DataFrame with TradingDay and spread, "Current" is highlighted
+    """
+    fig = go.Figure()
+    for label, df in seasonal_data.items():
+        fig.add_trace(go.Scatter(
+            x=_values(df["TradingDay"], np.int16),
+            y=_values(df["spread"]),
+            mode="lines",
+            name=label,
+            line=dict(color=current_color if label == "Current" else None,
+                      width=3 if label == "Current" else 1.5),
+            opacity=1.0 if label == "Current" else 0.6
+        ))
+
+    fig.update_layout(
+        title="Seasonal Spread by Year",
+        xaxis_title="Trading Day (1 to 252)",
+        yaxis_title="Spread",
+        margin=LAYOUT_MARGIN,
+        legend_title="Season",
+        template='plotly_dark'
+    )
+    return fig
+
+
+def time_series_figure(dates, spreads, max_points=MAX_TIME_SERIES_POINTS):
+    """Spread against Date, downsampled with LTTB when the series is longer than max_points."""
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    spreads = _values(spreads)
+    keep = lttb(dates.astype(np.int64), spreads, max_points)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=dates[keep],
+        y=spreads[keep],
+        mode="lines",
+        name="All Data (Time Series)",
+        line=dict(color="lightblue", width=2)
+    ))
+    fig.update_layout(
+        title="Spread Time Series (No Seasonal Data Available)",
+        xaxis_title="Date",
+        yaxis_title="Spread",
+        margin=LAYOUT_MARGIN,
+        template='plotly_dark'
+    )
+    return fig
+
+
+def spread_stats(spread_values):
+    """Latest, Mean, Median and Std of a date-sorted spread series."""
+    spread_values = np.asarray(spread_values, dtype=np.float64)
+    return {"Latest": spread_values[-1], "Mean": spread_values.mean(), "Median": np.median(spread_values),
+            "Std": spread_values.std(ddof=1) if len(spread_values) > 1 else np.nan}
+
+
+def histogram_figure(spread_values, stats=None, nbins=50):
+    """
+    Distribution of the spread with the key statistics as vertical lines.
+
+    The histogram is binned here with NumPy, so only bin centers and counts are sent instead of the raw series.
+
+    :param spread_values: spread series (date-sorted, so the last value is the latest)
+    :param stats: dict with Latest, Mean, Median, Std; computed from spread_values if not given
+    """
+    hist_fig = go.Figure()
+    spread_values = np.asarray(spread_values, dtype=np.float64)
+    spread_values = spread_values[~np.isnan(spread_values)]
+
+    if len(spread_values):
+        stats = stats or spread_stats(spread_values)
+        latest_spread = stats["Latest"]
+        mean_spread = stats["Mean"]
+        median_spread = stats["Median"]
+        std_dev = stats["Std"]
+
+        counts, edges = np.histogram(spread_values, bins=nbins)
+        hist_fig.add_trace(go.Bar(
+            x=_values((edges[:-1] + edges[1:]) / 2),
+            y=_values(counts, np.int32),
+            width=_values(np.diff(edges)),
+            marker_color='lightblue',
+            name='Spread Distribution'
+        ))
+        hist_fig.update_layout(bargap=0)
+
+        # Add vertical lines for statistics
+        if latest_spread is not None:
+            hist_fig.add_vline(x=latest_spread, line_dash="dash", line_color="yellow",
+                               annotation_text=f"Latest: {latest_spread:.2f}",
+                               annotation_position="top right", annotation_font_color="yellow")
+
+        hist_fig.add_vline(x=mean_spread, line_dash="dash", line_color="red",
+                           annotation_text=f"Mean: {mean_spread:.2f}",
+                           annotation_position="top left", annotation_font_color="red")
+
+        hist_fig.add_vline(x=median_spread, line_dash="dash", line_color="green",
+                           annotation_text=f"Median: {median_spread:.2f}",
+                           annotation_position="top right", annotation_font_color="green")
+
+        hist_fig.add_vline(x=mean_spread - std_dev, line_dash="dot", line_color="orange",
+                           annotation_text=f"-1 Std Dev: {(mean_spread - std_dev):.2f}",
+                           annotation_position="bottom left", annotation_font_color="orange")
+        hist_fig.add_vline(x=mean_spread + std_dev, line_dash="dot", line_color="orange",
+                           annotation_text=f"+1 Std Dev: {(mean_spread + std_dev):.2f}",
+                           annotation_position="bottom right", annotation_font_color="orange")
+
+        hist_fig.add_vline(x=mean_spread - 2 * std_dev, line_dash="dot", line_color="purple",
+                           annotation_text=f"-2 Std Dev: {(mean_spread - 2 * std_dev):.2f}",
+                           annotation_position="bottom left", annotation_font_color="purple")
+        hist_fig.add_vline(x=mean_spread + 2 * std_dev, line_dash="dot", line_color="purple",
+                           annotation_text=f"+2 Std Dev: {(mean_spread + 2 * std_dev):.2f}",
+                           annotation_position="bottom right", annotation_font_color="purple")
+
+        # Add a text box for statistics
+        stats_text = (
+            f"Latest Spread: {latest_spread:.2f}<br>"
+            f"Mean: {mean_spread:.2f}<br>"
+            f"Median: {median_spread:.2f}<br>"
+            f"Std Dev: {std_dev:.2f}"
+        )
+
+        hist_fig.add_annotation(
+            text=stats_text,
+            xref="paper", yref="paper",
+            x=0.98, y=0.98,  # Position in top right corner of the plot area
+            showarrow=False,
+            align="left",
+            bordercolor="white",
+            borderwidth=1,
+            bgcolor="rgba(0,0,0,0.7)",  # Semi-transparent background
+            font=dict(color="white", size=10)
+        )
+
+    hist_fig.update_layout(
+        title="Distribution of Spread (Histogram) with Key Statistics",
+        xaxis_title="Spread",
+        yaxis_title="Frequency",
+        template="plotly_dark",
+        margin=LAYOUT_MARGIN
+    )
+    return hist_fig
@@ -0,0 +1,156 @@
+#spread_jobs.py
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_keys import canonical_key
+
+
+class Job:
+    """One submitted computation. progress is (done, total, message), result is set once status is 'done'."""
+
+    def __init__(self, key, params):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.params = params
+        self.status = "queued"
+        self.progress = (0, 0, "Queued")
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+
+    @property
+    def running(self):
+        return self.status in ("queued", "running")
+
+    def report(self, done, total, message=""):
+        self.progress = (done, total, message)
+
+
+class JobManager:
+    """
+    Runs long computations on a local thread pool so the callback that submits them returns immediately.
+
+    submit() returns a job id that the UI polls with get(). Submitting the same parameters while a job for
+    them is still queued or running returns that job's id instead of starting a second one. Finished jobs are
+    kept (the keep_finished most recently finished) so their results can be displayed again.
+
+    Jobs live in the memory of the server process, so an app using it must be served by a single process
+    (threads are fine).
+    """
+
+    def __init__(self, max_workers=2, keep_finished=50):
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spread-job")
+        self._jobs = OrderedDict()
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def submit(self, params, fn):
+        """
+        :param params: JSON-serializable parameters, also used to detect duplicate submissions
+        :param fn: callable(params, report) returning the result; report(done, total, message) updates progress
+        :return: job id
+        """
+        key = canonical_key(params)
+        with self._lock:
+            job_id = self._running.get(key)
+            if job_id is not None:
+                return job_id
+
+            job = Job(key, params)
+            self._jobs[job.id] = job
+            self._running[key] = job.id
+
+        self._executor.submit(self._run, job, fn)
+        return job.id
+
+    def _run(self, job, fn):
+        job.status = "running"
+        try:
+            job.result = fn(job.params, job.report)
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{e}"
+            job.status = "error"
+            traceback.print_exc()
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._running.pop(job.key, None)
+                # pruned in the order jobs finished, so a long job is not dropped before its result is read
+                if job.id in self._jobs:
+                    self._jobs.move_to_end(job.id)
+                self._prune()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.running]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def add_finished(self, params, result):
+        """Registers an already available result (e.g. from a cache) as a finished job and returns its id."""
+        job = Job(canonical_key(params), params)
+        job.result = result
+        job.status = "done"
+        job.progress = (1, 1, "Done")
+        job.finished = time.time()
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job.id
+
+    def get(self, job_id):
+        """The job, or None if the id is unknown or its result has been dropped."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries also expire ttl seconds after they were stored.
+
+    Holds at most max_size entries; the least recently used one is dropped when a new key is added to a
+    full cache.
+
+    :param clock: callable() returning seconds, time.monotonic by default
+    """
+
+    def __init__(self, max_size=32, ttl=900, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @property
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+    def get(self, key):
+        """The stored value, or None if the key is unknown or has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
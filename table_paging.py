@@ -0,0 +1,81 @@
+#table_paging.py
+
+import math
+import operator as op
+
+import pandas as pd
+
+COMPARISONS = {"ge": op.ge, "le": op.le, "lt": op.lt, "gt": op.gt, "ne": op.ne, "eq": op.eq}
+
+# DataTable filter_query operators, longest first so '>=' is matched before '>'
+FILTER_OPERATORS = [
+    ("ge ", ">="), ("le ", "<="), ("lt ", "<"), ("gt ", ">"), ("ne ", "!="), ("eq ", "="),
+    ("contains ", None), ("datestartswith ", None),
+]
+
+
+def _split_filter_part(filter_part):
+    """Parses one '{column} op value' clause of a DataTable filter_query into (column, operator, value)."""
+    filter_part = filter_part.strip()
+    if not filter_part.startswith('{') or '}' not in filter_part:
+        return None, None, None
+    # the operator is the token right after {column}, so a value such as "Range spread" never matches 'ge '
+    name, rest = filter_part[1:].split('}', 1)
+    rest = rest.lstrip()
+    for names, symbol in FILTER_OPERATORS:
+        for operator in (names, symbol):
+            if operator and rest.startswith(operator):
+                value_part = rest[len(operator):].strip()
+                if value_part and value_part[0] == value_part[-1] and value_part[0] in ("'", '"', '`'):
+                    value = value_part[1:-1].replace('\\' + value_part[0], value_part[0])
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+                return name, names.strip(), value
+    return None, None, None
+
+
+def _filter(df, filter_query):
+    for filter_part in filter_query.split(' && '):
+        col_name, operator, value = _split_filter_part(filter_part)
+        if col_name not in df.columns:
+            continue
+
+        column = df[col_name]
+        if operator in ("contains", "datestartswith"):
+            text = column.dt.strftime('%Y-%m-%d') if pd.api.types.is_datetime64_any_dtype(column) else column.astype(str)
+            mask = text.str.startswith(str(value)) if operator == "datestartswith" else text.str.contains(str(value), regex=False)
+        else:
+            if pd.api.types.is_datetime64_any_dtype(column):
+                value = pd.to_datetime(str(value), errors="coerce")
+            elif pd.api.types.is_numeric_dtype(column) and isinstance(value, str):
+                value = pd.to_numeric(value, errors="coerce")
+            elif not pd.api.types.is_numeric_dtype(column):
+                # text columns hold e.g. Year as '2024', which the filter parses as 2024.0
+                value = str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+            mask = COMPARISONS[operator](column, value)
+        df = df[mask]
+    return df
+
+
+def query_page(df, page_current, page_size, sort_by=None, filter_query=None):
+    """
+    Filters, sorts and slices df for a DataTable with page_action/sort_action/filter_action='custom', so only
+    the visible page is serialized to the browser.
+
+    :return: tuple of (records of the page, page_count, page_current), page_current clamped to the last page
+    """
+    if filter_query:
+        df = _filter(df, filter_query)
+
+    if sort_by:
+        df = df.sort_values([s['column_id'] for s in sort_by],
+                            ascending=[s['direction'] == 'asc' for s in sort_by], kind='stable')
+
+    page_count = max(1, math.ceil(len(df) / page_size))
+    # a new selection can be shorter than the page the table is on
+    page_current = min(page_current or 0, page_count - 1)
+    start = page_current * page_size
+    return df.iloc[start:start + page_size].to_dict('records'), page_count, page_current
@@ -0,0 +1,112 @@
+import datetime
+import os
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+# seasonalFunctions opens the daily bar cache when it is imported; keep the tests from creating the file
+os.environ.setdefault("DAILY_BAR_CACHE", ":memory:")
+
+DAILY_DATES = ["01/02/2024", "01/03/2024", "01/04/2024"]
+
+
+def requested_dates(path):
+    """chartstartdate/chartstopdate of a request path as dates, None where the request has none."""
+    found = [re.search(name + r"=(\d{4}/\d{2}/\d{2})", path) for name in ("chartstartdate", "chartstopdate")]
+    return tuple(datetime.datetime.strptime(m.group(1), "%Y/%m/%d").date() if m else None for m in found)
+
+
+def daily_body(symbols, start=None, stop=None):
+    """Bars of every weekday from start to stop, or of DAILY_DATES when the request has no date range."""
+    days = DAILY_DATES
+    if start is not None and stop is not None:
+        days = [day.strftime("%m/%d/%Y") for day in pd.bdate_range(start, stop)]
+    lines = ["pricesymbol\ttradedatetimeutc\topen\tclose\tvolume"]
+    for n, symbol in enumerate(symbols):
+        for k, day in enumerate(days):
+            lines.append(f"{symbol}\t{day}\t{80 + n + k / 4}\t{80.5 + n + k / 4}\t{1000 * (k + 1)}")
+    return "\n".join(lines) + "\n"
+
+
+def quote_body(symbols):
+    lines = ["pricesymbol\ttradedatetimeutc\tlast\tvolume"]
+    lines += [f"{symbol}\t01/04/2024 03:30:00 PM\t{90 + n}\t{500 + n}" for n, symbol in enumerate(symbols)]
+    return "\n".join(lines) + "\n"
+
+
+class StubGvWS:
+    """
+    Local stand-in for the GvWS web service. Every GET is answered with the next scripted response
+    (status, body, delay) or, once the script is used up, with daily bars / quotes of the requested symbols.
+    Each request is recorded with the client port it came from, so tests can tell reused connections apart.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.script = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url_base(self):
+        return "http://127.0.0.1:{}/gvsi/query/htsv/".format(self._server.server_address[1])
+
+    @property
+    def client_ports(self):
+        return [port for _, port, _ in self.requests]
+
+    def respond(self, handler):
+        path = urllib.parse.unquote(handler.path)
+        with self._lock:
+            self.requests.append((path, handler.client_address[1], handler.headers.get("Authorization")))
+            if self.script:
+                return self.script.pop(0)
+
+        symbols = re.findall(r'pricesymbol="([^"]+)"', path)
+        body = quote_body(symbols) if "/GetQuotes/" in path else daily_body(symbols, *requested_dates(path))
+        return 200, body, 0
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status, body, delay = self.server.stub.respond(self)
+        if delay:
+            time.sleep(delay)
+
+        data = body.encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (timeout tests)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def gvws():
+    stub = StubGvWS()
+    stub.start()
+    yield stub
+    stub.stop()
@@ -0,0 +1,135 @@
+import asyncio
+import datetime
+
+import pandas as pd
+import pytest
+
+from AsyncGvWSConnection import AsyncGvWSConnection
+from GvWSConnection import GvException, GvWSConnection, TimeSeriesFields
+
+START = datetime.date(2024, 1, 2)
+END = datetime.date(2024, 1, 4)
+FIELDS = [TimeSeriesFields.symbol, TimeSeriesFields.trade_date, TimeSeriesFields.close]
+
+
+def connect(cls, stub, **kwargs):
+    kwargs.setdefault("backoff_factor", 0)
+    conn = cls("user", "secret", **kwargs)
+    conn._url_base = stub.url_base
+    return conn
+
+
+def run_async(stub, work, **kwargs):
+    async def main():
+        async with connect(AsyncGvWSConnection, stub, **kwargs) as conn:
+            return await work(conn)
+
+    return asyncio.run(main())
+
+
+def rows(result):
+    return [dict(row) for row in result]
+
+
+def test_get_daily_matches_sync_client(gvws):
+    symbols = ["S{}".format(n) for n in range(5)]
+    with connect(GvWSConnection, gvws, max_symbols_per_request=2) as conn:
+        expected = conn.get_daily(symbols, list(FIELDS), start_date=START, end_date=END)
+        expected_frame = conn.get_daily(symbols, list(FIELDS), start_date=START, end_date=END, as_frame=True)
+        expected_grouped = conn.get_daily(symbols, list(FIELDS), grouped=True, start_date=START, end_date=END)
+
+    async def work(conn):
+        return await asyncio.gather(
+            conn.get_daily(symbols, list(FIELDS), start_date=START, end_date=END),
+            conn.get_daily(symbols, list(FIELDS), start_date=START, end_date=END, as_frame=True),
+            conn.get_daily(symbols, list(FIELDS), grouped=True, start_date=START, end_date=END))
+
+    actual, actual_frame, actual_grouped = run_async(gvws, work, max_symbols_per_request=2)
+
+    assert rows(actual) == rows(expected)
+    assert {auth for _, _, auth in gvws.requests} == {"Basic dXNlcjpzZWNyZXQ="}  # user:secret
+    pd.testing.assert_frame_equal(actual_frame, expected_frame)
+    assert {k: rows(v) for k, v in actual_grouped.items()} == {k: rows(v) for k, v in expected_grouped.items()}
+
+
+def test_get_quote_matches_sync_client(gvws):
+    with connect(GvWSConnection, gvws) as conn:
+        expected = conn.get_quote(["AAA", "BBB"])
+
+    actual = run_async(gvws, lambda conn: conn.get_quote(["AAA", "BBB"]))
+
+    assert rows(actual) == rows(expected)
+
+
+def test_iter_daily_matches_sync_client(gvws):
+    with connect(GvWSConnection, gvws) as conn:
+        expected = list(conn.iter_daily(["AAA", "BBB"], list(FIELDS), start_date=START, end_date=END))
+        expected_chunks = list(conn.iter_daily(["AAA", "BBB"], list(FIELDS), start_date=START, end_date=END,
+                                               as_frame=True, chunk_size=4))
+
+    async def work(conn):
+        streamed = [row async for row in conn.iter_daily(["AAA", "BBB"], list(FIELDS),
+                                                         start_date=START, end_date=END)]
+        chunks = [chunk async for chunk in conn.iter_daily(["AAA", "BBB"], list(FIELDS), start_date=START,
+                                                           end_date=END, as_frame=True, chunk_size=4)]
+        return streamed, chunks
+
+    streamed, chunks = run_async(gvws, work)
+
+    assert rows(streamed) == rows(expected)
+    assert len(chunks) == len(expected_chunks)
+    for chunk, expected_chunk in zip(chunks, expected_chunks):
+        pd.testing.assert_frame_equal(chunk, expected_chunk)
+
+
+def test_5xx_responses_are_retried(gvws):
+    gvws.script = [(503, "busy", 0), (502, "bad gateway", 0)]
+
+    result = run_async(gvws, lambda conn: conn.get_quote("AAA"), max_retries=3)
+
+    assert len(gvws.requests) == 3
+    assert result[0].symbol == "AAA"
+
+
+def test_errors_match_sync_client(gvws):
+    gvws.script = [(503, "busy", 0)] * 2 + [(400, "unknown symbol", 0)]
+
+    with pytest.raises(GvException, match="busy"):
+        run_async(gvws, lambda conn: conn.get_quote("AAA"), max_retries=1)
+    with pytest.raises(GvException, match="unknown symbol"):
+        run_async(gvws, lambda conn: conn.get_quote("AAA"), max_retries=3)
+
+    assert len(gvws.requests) == 3
+
+
+def test_read_timeout_raises(gvws):
+    gvws.script = [(200, "late", 2)]
+
+    with pytest.raises(GvException, match="Request failed"):
+        run_async(gvws, lambda conn: conn.get_quote("AAA"), timeout=(1, 0.2), max_retries=0)
+
+
+def test_concurrency_is_limited(gvws):
+    gvws.script = [(200, "pricesymbol\tlast\nAAA\t1\n", 0.1)] * 6
+
+    async def work(conn):
+        return await asyncio.gather(*(conn.get_quote("AAA") for _ in range(6)))
+
+    run_async(gvws, work, max_concurrency=2)
+
+    assert len(set(gvws.client_ports)) == 2
+
+
+def test_connection_can_be_used_from_several_event_loops(gvws):
+    conn = connect(AsyncGvWSConnection, gvws, max_concurrency=1)
+
+    async def work():
+        async with conn:
+            results = await asyncio.gather(*(conn.get_quote("AAA") for _ in range(3)))
+        return [rows(result) for result in results]
+
+    first = asyncio.run(work())
+    second = asyncio.run(work())
+
+    assert first == second
+    assert len(gvws.requests) == 6
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from seasonalFunctions import build_spreads
+
+YEARS = [25, 24, 23, 22]
+
+
+def join_loop_spreads(contract_data, year_to_last_trade):
+    """The per-contract outer-join loop build_spreads replaced, as PriceBuilding_v101 ran it."""
+    legs = list(contract_data.values())
+    spread_dict = {}
+    for i, first_contract in enumerate(legs[0]["ContractList"]):
+        spread_year = 2000 + int(first_contract[-2:])
+        combined_df = pd.DataFrame()
+        for data in legs:
+            if i < len(data["ContractList"]):
+                contract = data["ContractList"][i]
+                temp_df = data["Prices df"][data["Prices df"]["symbol"] == contract][["Date", "WeightedPrice"]].copy()
+                temp_df["Date"] = pd.to_datetime(temp_df["Date"])
+                temp_df = temp_df.set_index("Date").rename(columns={"WeightedPrice": contract})
+                combined_df = temp_df if combined_df.empty else combined_df.join(temp_df, how="outer")
+        combined_df = combined_df.dropna()
+        combined_df["spread"] = combined_df.sum(axis=1, skipna=True)
+        spread_dict[spread_year] = combined_df
+
+    frames = []
+    for year, df in spread_dict.items():
+        if year in year_to_last_trade and not df.empty:
+            frames.append(pd.DataFrame({"Date": df.index, "Year": str(year), "spread": df["spread"].to_numpy(),
+                                        "LastTrade": year_to_last_trade[year]}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def synthetic_preset(tickers, weights, missing=()):
+    """
+    Contract data of a Z spread over YEARS, each leg with random gaps in its bars.
+
+    :param missing: (leg number, year) pairs whose contract has no prices at all
+    """
+    rng = np.random.default_rng(7)
+    contract_data = {}
+    for leg, (ticker, weight) in enumerate(zip(tickers, weights)):
+        contracts = [f"{ticker}Z{year}" for year in YEARS]
+        parts = []
+        for contract, year in zip(contracts, YEARS):
+            if (leg, year) in missing:
+                continue
+            dates = pd.bdate_range(end=f"20{year}-11-25", periods=300)
+            dates = dates[rng.random(len(dates)) > 0.1]
+            close = 70 + rng.normal(0, 1, len(dates)).cumsum()
+            parts.append(pd.DataFrame({"symbol": contract, "Date": dates, "close": close}))
+        prices = pd.concat(parts, ignore_index=True)
+        prices["WeightedPrice"] = prices["close"] * weight
+        contract_data[f"{ticker}Z"] = {"Prices df": prices, "ContractList": contracts, "Weights": weight,
+                                       "Conversion": 1}
+    return contract_data
+
+
+LAST_TRADE = {2000 + year: pd.Timestamp(f"20{year}-11-28") for year in YEARS}
+
+
+@pytest.mark.parametrize("tickers, weights", [
+    (["AA", "BB"], [1, -1]),
+    (["AA", "BB", "CC"], [1, -2, 1]),
+])
+def test_build_spreads_matches_the_join_loop(tickers, weights):
+    contract_data = synthetic_preset(tickers, weights)
+    # a year without a LastTrade is dropped by both
+    year_to_last_trade = {year: last for year, last in LAST_TRADE.items() if year != 2022}
+
+    expected = join_loop_spreads(contract_data, year_to_last_trade)
+    spreads = build_spreads(contract_data, year_to_last_trade)
+
+    assert set(spreads["Year"]) == {"2025", "2024", "2023"}
+    pd.testing.assert_frame_equal(spreads.reset_index(drop=True), expected, check_dtype=False)
+
+
+def test_build_spreads_drops_years_with_a_leg_without_prices():
+    # the first leg has no 2023 prices: the join loop started from the second leg and stored a BB + CC spread
+    contract_data = synthetic_preset(["AA", "BB", "CC"], [1, -2, 1], missing=[(0, 23)])
+
+    expected = join_loop_spreads(contract_data, LAST_TRADE)
+    spreads = build_spreads(contract_data, LAST_TRADE)
+
+    assert "2023" in set(expected["Year"])
+    assert "2023" not in set(spreads["Year"])
+    pd.testing.assert_frame_equal(spreads.reset_index(drop=True),
+                                  expected[expected["Year"] != "2023"].reset_index(drop=True), check_dtype=False)
@@ -0,0 +1,114 @@
+import pandas as pd
+import pytest
+from sqlalchemy import inspect
+
+from contract_margins_writer import MSSQLTableWriter, TableWriter, _prepare
+from db_engine import create_db_engine
+
+SCHEMA = "TradePriceAnalyzer"
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_URL", f"sqlite:///{tmp_path / 'offline.sqlite'}")
+    engine = create_db_engine([SCHEMA])
+    yield engine
+    engine.dispose()
+
+
+def series(instrument, year, dates, spread, month="Z"):
+    dates = pd.to_datetime(dates)
+    return pd.DataFrame({"Date": dates, "Year": str(year), "spread": spread, "LastTrade": pd.Timestamp(f"{year}-11-28"),
+                         "GroupYear": year, "InstrumentName": instrument, "Group": "Crude", "Region": "NWE",
+                         "Month": month, "RollFlag": "CL", "Desc": f"{instrument} spread"})
+
+
+def stored(engine, name="contractMargins"):
+    frame = pd.read_sql(f'SELECT * FROM "{SCHEMA}"."{name}"', engine)
+    frame["Date"] = pd.to_datetime(frame["Date"])
+    return frame.sort_values(["InstrumentName", "Year", "Date"]).reset_index(drop=True)
+
+
+def rows(frame):
+    return [(r.InstrumentName, r.Year, r.Date.strftime("%Y-%m-%d"), r.spread) for r in frame.itertuples()]
+
+
+DATES = ["2024-01-02", "2024-01-03", "2024-01-04"]
+
+
+def test_upsert_overwrites_from_the_first_new_date(engine):
+    writer = TableWriter(engine, "contractMargins", SCHEMA)
+    writer.replace(pd.concat([series("A", 2024, DATES, [1.0, 2.0, 3.0]), series("A", 2025, DATES, [4.0, 5.0, 6.0]),
+                              series("B", 2024, DATES, [7.0, 8.0, 9.0])]))
+
+    writer.upsert(series("A", 2024, ["2024-01-03", "2024-01-05"], [20.0, 40.0]))
+
+    assert rows(stored(engine)) == [
+        ("A", "2024", "2024-01-02", 1.0), ("A", "2024", "2024-01-03", 20.0), ("A", "2024", "2024-01-05", 40.0),
+        ("A", "2025", "2024-01-02", 4.0), ("A", "2025", "2024-01-03", 5.0), ("A", "2025", "2024-01-04", 6.0),
+        ("B", "2024", "2024-01-02", 7.0), ("B", "2024", "2024-01-03", 8.0), ("B", "2024", "2024-01-04", 9.0),
+    ]
+
+
+def test_upsert_creates_the_preset_index(engine):
+    writer = TableWriter(engine, "contractMargins", SCHEMA)
+    series("A", 2024, DATES, 1.0).to_sql("contractMargins", engine, schema=SCHEMA, index=False)
+
+    writer.upsert(series("A", 2024, DATES[2:], 3.0))
+
+    assert [ix["name"] for ix in inspect(engine).get_indexes("contractMargins", schema=SCHEMA)] == \
+        ["ix_contractMargins_preset"]
+
+
+def test_replace_presets_only_removes_the_listed_presets(engine):
+    writer = TableWriter(engine, "contractMargins", SCHEMA)
+    writer.replace(pd.concat([series("A", 2024, DATES, 1.0), series("B", 2024, DATES, 2.0),
+                              series("C", 2024, DATES, 3.0), series("A", 2024, DATES, 4.0, month="H")]))
+
+    presets = pd.DataFrame({"InstrumentName": ["A", "B"], "Group": "Crude", "Region": "NWE", "Month": "Z"})
+    writer.replace_presets(series("A", 2024, DATES[:1], 10.0), presets=presets)
+
+    frame = stored(engine)
+    assert sorted(set(zip(frame["InstrumentName"], frame["Month"]))) == [("A", "H"), ("A", "Z"), ("C", "Z")]
+    assert frame[(frame["InstrumentName"] == "A") & (frame["Month"] == "Z")]["spread"].tolist() == [10.0]
+    assert frame[frame["InstrumentName"] == "C"]["spread"].tolist() == [3.0] * 3
+
+
+def failing_after_first_rows(load):
+    """Wraps a load method so it writes the first row of the frame and then fails."""
+    def wrapper(*args):
+        *head, df = args
+        load(*head, df.iloc[:1])
+        raise RuntimeError("load failed")
+    return wrapper
+
+
+def test_replace_keeps_the_table_when_the_load_fails(engine, monkeypatch):
+    writer = TableWriter(engine, "contractMargins", SCHEMA)
+    writer.replace(series("A", 2024, DATES, 1.0))
+
+    monkeypatch.setattr(writer, "_insert", failing_after_first_rows(writer._insert))
+    with pytest.raises(RuntimeError, match="load failed"):
+        writer.replace(series("B", 2024, DATES, 2.0))
+
+    assert rows(stored(engine)) == [("A", "2024", day, 1.0) for day in DATES]
+
+
+def test_mssql_replace_keeps_the_table_when_the_staging_load_fails(engine, monkeypatch):
+    # a table without the preset index: SQLite names indexes per database, SQL Server per table, and the
+    # staging table is created with the index name of the target
+    series("A", 2024, DATES, 1.0).to_sql("contractMargins", engine, schema=SCHEMA, index=False)
+    writer = MSSQLTableWriter(engine, "contractMargins", SCHEMA)
+
+    def insert(cursor, target, df):
+        # _bulk_insert without pyodbc's fast_executemany, which sqlite3 cursors do not have
+        columns = ", ".join(writer._quote(col) for col, _ in writer.columns)
+        cursor.executemany(f"INSERT INTO {target} ({columns}) VALUES ({', '.join('?' * len(writer.columns))})",
+                           list(_prepare(df, writer.columns).itertuples(index=False, name=None)))
+
+    monkeypatch.setattr(writer, "_bulk_insert", failing_after_first_rows(insert))
+    with pytest.raises(RuntimeError, match="load failed"):
+        writer.replace(series("B", 2024, DATES, 2.0))
+
+    assert rows(stored(engine)) == [("A", "2024", day, 1.0) for day in DATES]
+    assert not inspect(engine).has_table("contractMargins_staging", schema=SCHEMA)
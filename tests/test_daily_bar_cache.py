@@ -0,0 +1,107 @@
+import datetime
+
+import pytest
+
+from conftest import requested_dates
+from daily_bar_cache import DailyBarCache
+from GvWSConnection import GvWSConnection
+
+FIELDS = ["pricesymbol", "tradedatetimeutc", "close"]
+EMPTY_BODY = "pricesymbol\ttradedatetimeutc\topen\tclose\tvolume\n"
+
+SETTLED = "AAAZ20"  # Dec 2020 contract
+LIVE = "AAAZ49"     # Dec 2049 contract
+
+
+def d(text):
+    return datetime.date.fromisoformat(text)
+
+
+@pytest.fixture
+def cache():
+    cache = DailyBarCache(":memory:")
+    yield cache
+    cache.close()
+
+
+def connect(stub, cache):
+    conn = GvWSConnection("user", "secret", cache=cache, backoff_factor=0)
+    conn._url_base = stub.url_base
+    return conn
+
+
+def fetched_ranges(stub):
+    return [requested_dates(path) for path, _, _ in stub.requests]
+
+
+def dates(rows):
+    return [row.tradedatetimeutc.date() for row in rows]
+
+
+def test_cached_range_is_served_from_disk(gvws, cache):
+    with connect(gvws, cache) as conn:
+        first = conn.get_daily(SETTLED, FIELDS, start_date=d("2020-12-01"), end_date=d("2021-01-31"))
+        second = conn.get_daily(SETTLED, FIELDS, start_date=d("2020-12-07"), end_date=d("2020-12-11"))
+
+    assert fetched_ranges(gvws) == [(d("2020-12-01"), d("2021-01-31"))]
+    assert dates(second) == [d("2020-12-07"), d("2020-12-08"), d("2020-12-09"), d("2020-12-10"), d("2020-12-11")]
+    assert [row.close for row in second] == [row.close for row in first[4:9]]
+    assert cache.stats == {"hits": 1, "partial_hits": 0, "misses": 1, "rows_fetched": len(first)}
+
+
+def test_earlier_start_fetches_only_the_head(gvws, cache):
+    with connect(gvws, cache) as conn:
+        conn.get_daily(SETTLED, FIELDS, start_date=d("2020-12-14"), end_date=d("2021-01-31"))
+        rows = conn.get_daily(SETTLED, FIELDS, start_date=d("2020-12-01"), end_date=d("2021-01-31"))
+
+    assert fetched_ranges(gvws) == [(d("2020-12-14"), d("2021-01-31")), (d("2020-12-01"), d("2020-12-13"))]
+    assert dates(rows)[0] == d("2020-12-01")
+    assert dates(rows)[-1] == d("2021-01-29")
+    assert cache.stats["partial_hits"] == 1
+    assert cache.stats["rows_fetched"] == len(rows)
+
+
+def test_live_contract_fetches_only_the_tail(gvws, cache):
+    with connect(gvws, cache) as conn:
+        conn.get_daily(LIVE, FIELDS, start_date=d("2024-01-02"), end_date=d("2024-01-10"))
+        rows = conn.get_daily(LIVE, FIELDS, start_date=d("2024-01-02"), end_date=d("2024-01-17"))
+
+    # the last cached bar (Jan 10) is downloaded again, it may have changed
+    assert fetched_ranges(gvws) == [(d("2024-01-02"), d("2024-01-10")), (d("2024-01-10"), d("2024-01-17"))]
+    assert len(dates(rows)) == len(set(dates(rows))) == 12
+    assert cache.stats == {"hits": 0, "partial_hits": 1, "misses": 1, "rows_fetched": 7 + 6}
+
+
+def test_settled_contract_is_not_fetched_again(gvws, cache):
+    with connect(gvws, cache) as conn:
+        conn.get_daily(SETTLED, FIELDS, start_date=d("2020-12-01"), end_date=d("2021-01-31"))
+        conn.get_daily(SETTLED, FIELDS, start_date=d("2020-12-01"), end_date=d("2021-06-30"))
+        conn.get_daily(LIVE, FIELDS, start_date=d("2024-01-02"), end_date=d("2024-01-10"))
+        conn.get_daily(LIVE, FIELDS, start_date=d("2024-01-02"), end_date=d("2024-01-10"))
+
+    assert fetched_ranges(gvws) == [(d("2020-12-01"), d("2021-01-31")), (d("2024-01-02"), d("2024-01-10")),
+                                    (d("2024-01-10"), d("2024-01-10"))]
+    assert cache.stats["hits"] == 1
+    assert cache.stats["partial_hits"] == 1
+
+
+def test_empty_answers_are_only_kept_for_settled_contracts(gvws, cache):
+    gvws.script = [(200, EMPTY_BODY, 0)] * 3
+    with connect(gvws, cache) as conn:
+        for symbol in (LIVE, LIVE, SETTLED, SETTLED):
+            rows = conn.get_daily(symbol, FIELDS, start_date=d("2021-02-01"), end_date=d("2021-02-26"))
+            assert [row.tradedatetimeutc for row in rows] == [None]  # the usual empty response row
+
+    assert len(gvws.requests) == 3
+    assert cache.stats == {"hits": 1, "partial_hits": 0, "misses": 3, "rows_fetched": 0}
+
+
+def test_empty_symbol_list(gvws, cache):
+    with connect(gvws, cache) as conn:
+        assert conn.get_daily([], FIELDS, start_date=d("2024-01-02")) == []
+        assert conn.get_daily([], FIELDS, grouped=True, start_date=d("2024-01-02")) == {}
+        frame = conn.get_daily([], FIELDS, start_date=d("2024-01-02"), as_frame=True)
+
+    assert list(frame.columns) == FIELDS
+    assert frame.empty
+    assert gvws.requests == []
@@ -0,0 +1,137 @@
+import datetime
+import time
+
+import pytest
+
+from GvWSConnection import GvException, GvWSConnection, TimeSeriesFields
+
+START = datetime.date(2024, 1, 2)
+END = datetime.date(2024, 1, 4)
+
+
+def connect(stub, **kwargs):
+    kwargs.setdefault("backoff_factor", 0)
+    conn = GvWSConnection("user", "secret", **kwargs)
+    conn._url_base = stub.url_base
+    return conn
+
+
+def test_get_daily_parses_rows(gvws):
+    with connect(gvws) as conn:
+        rows = conn.get_daily(["AAA", "BBB"], ["pricesymbol", "tradedatetimeutc", "close"],
+                              start_date=START, end_date=END)
+
+    assert [row.symbol for row in rows] == ["AAA"] * 3 + ["BBB"] * 3
+    assert rows[0].close == 80.5
+    assert rows[0].tradedatetimeutc == datetime.datetime(2024, 1, 2)
+    assert gvws.requests[0][2].startswith("Basic ")
+
+
+def test_get_daily_as_frame_matches_rows(gvws):
+    fields = [TimeSeriesFields.symbol, TimeSeriesFields.trade_date, TimeSeriesFields.close]
+    with connect(gvws) as conn:
+        rows = conn.get_daily(["AAA", "BBB"], fields, start_date=START, end_date=END)
+        frame = conn.get_daily(["AAA", "BBB"], fields, start_date=START, end_date=END, as_frame=True)
+
+    assert frame["pricesymbol"].tolist() == [row.symbol for row in rows]
+    assert frame["close"].tolist() == [row.close for row in rows]
+
+
+def test_keep_alive_reuses_the_pooled_connection(gvws):
+    with connect(gvws) as conn:
+        for _ in range(5):
+            conn.get_quote("AAA")
+
+    assert len(gvws.requests) == 5
+    assert len(set(gvws.client_ports)) == 1
+
+
+def test_without_keep_alive_every_request_connects(gvws):
+    with connect(gvws, keep_alive=False) as conn:
+        for _ in range(3):
+            conn.get_quote("AAA")
+
+    assert len(set(gvws.client_ports)) == 3
+
+
+def test_split_requests_are_merged_in_request_order(gvws):
+    symbols = ["S{}".format(n) for n in range(7)]
+    with connect(gvws, max_symbols_per_request=2, max_workers=4) as conn:
+        rows = conn.get_daily(symbols, ["pricesymbol", "close"], start_date=START, end_date=END)
+
+    assert len(gvws.requests) == 4
+    assert [row.symbol for row in rows[::3]] == symbols
+
+
+def test_5xx_responses_are_retried(gvws):
+    gvws.script = [(503, "busy", 0), (502, "bad gateway", 0)]
+    with connect(gvws, max_retries=3) as conn:
+        rows = conn.get_quote("AAA")
+
+    assert len(gvws.requests) == 3
+    assert rows[0].symbol == "AAA"
+
+
+def test_gives_up_after_max_retries(gvws):
+    gvws.script = [(503, "busy", 0)] * 3
+    with connect(gvws, max_retries=1) as conn:
+        with pytest.raises(GvException, match="busy"):
+            conn.get_quote("AAA")
+
+    assert len(gvws.requests) == 2
+
+
+def test_client_errors_are_not_retried(gvws):
+    gvws.script = [(400, "unknown symbol", 0)]
+    with connect(gvws, max_retries=3) as conn:
+        with pytest.raises(GvException, match="unknown symbol"):
+            conn.get_quote("AAA")
+
+    assert len(gvws.requests) == 1
+
+
+def test_read_timeout_raises(gvws):
+    gvws.script = [(200, "late", 2)]
+    started = time.monotonic()
+    with connect(gvws, timeout=(1, 0.2), max_retries=0) as conn:
+        with pytest.raises(GvException, match="Request failed"):
+            conn.get_quote("AAA")
+
+    assert time.monotonic() - started < 1.5
+
+
+def test_read_timeout_is_retried(gvws):
+    gvws.script = [(200, "late", 1)]
+    with connect(gvws, timeout=(1, 0.2), max_retries=1) as conn:
+        rows = conn.get_quote("AAA")
+
+    assert len(gvws.requests) == 2
+    assert rows[0].symbol == "AAA"
+
+
+def test_iter_daily_streams_the_same_rows(gvws):
+    fields = ["pricesymbol", "tradedatetimeutc", "close"]
+    with connect(gvws) as conn:
+        rows = conn.get_daily(["AAA", "BBB"], fields, start_date=START, end_date=END)
+        streamed = list(conn.iter_daily(["AAA", "BBB"], fields, start_date=START, end_date=END))
+        chunks = list(conn.iter_daily(["AAA", "BBB"], fields, start_date=START, end_date=END,
+                                      as_frame=True, chunk_size=4))
+
+    assert [dict(row) for row in streamed] == [dict(row) for row in rows]
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+
+
+def test_split_date_windows_keep_each_symbols_bars_together(gvws):
+    start, end = datetime.date(2024, 1, 1), datetime.date(2024, 1, 31)
+    with connect(gvws, max_symbols_per_request=None, max_days_per_request=None) as conn:
+        single = conn.get_daily(["AAA", "BBB"], ("close",), start_date=start, end_date=end)
+    with connect(gvws, max_days_per_request=7, max_workers=4) as conn:
+        rows = conn.get_daily(["AAA", "BBB"], ("close",), start_date=start, end_date=end)
+        frame = conn.get_daily(["AAA", "BBB"], ("close",), start_date=start, end_date=end, as_frame=True)
+
+    assert len(gvws.requests) == 1 + 2 * 5
+    assert [row.symbol for row in rows] == ["AAA"] * 23 + ["BBB"] * 23
+    assert [(row.symbol, row.tradedatetimeutc) for row in rows] == \
+        [(row.symbol, row.tradedatetimeutc) for row in single]
+    assert list(zip(frame["pricesymbol"], frame["tradedatetimeutc"])) == \
+        [(row.symbol, row.tradedatetimeutc) for row in single]
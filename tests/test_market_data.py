@@ -0,0 +1,40 @@
+import datetime
+
+from daily_bar_cache import DailyBarCache
+from GvWSConnection import GvWSConnection
+from market_data import DAILY_COLUMNS, GvWSProvider
+
+START = datetime.date(2024, 1, 2)
+END = datetime.date(2024, 1, 31)
+
+
+def connect(stub, **kwargs):
+    conn = GvWSConnection("user", "secret", backoff_factor=0, **kwargs)
+    conn._url_base = stub.url_base
+    return conn
+
+
+def test_gvws_provider_streams_the_response_in_chunks(gvws):
+    done = []
+    with connect(gvws, max_symbols_per_request=2) as conn:
+        bars = GvWSProvider(conn, chunk_size=5).fetch_daily(["AAA", "BBB", "CCC"], START, END, progress=done.append)
+
+    assert list(bars.columns) == DAILY_COLUMNS
+    assert bars["symbol"].tolist() == ["AAA"] * 22 + ["BBB"] * 22 + ["CCC"] * 22
+    assert bars.groupby("symbol")["Date"].apply(lambda dates: dates.is_monotonic_increasing).all()
+    assert done == ["AAA", "BBB", "CCC"]
+    assert len(gvws.requests) == 2
+
+
+def test_gvws_provider_reads_through_the_bar_cache(gvws):
+    cache = DailyBarCache(":memory:")
+    with connect(gvws) as conn, connect(gvws, cache=cache) as cached:
+        streamed = GvWSProvider(conn).fetch_daily(["AAA", "BBB"], START, END)
+        first = GvWSProvider(cached).fetch_daily(["AAA", "BBB"], START, END)
+        second = GvWSProvider(cached).fetch_daily(["AAA", "BBB"], START, END)
+    cache.close()
+
+    assert first[["symbol", "Date"]].equals(streamed[["symbol", "Date"]])
+    assert second[["symbol", "Date"]].equals(streamed[["symbol", "Date"]])
+    # live contracts: the second read only downloads the last cached bar again
+    assert cache.stats["partial_hits"] == 2
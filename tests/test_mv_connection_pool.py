@@ -0,0 +1,164 @@
+import threading
+
+import pandas as pd
+import pytest
+
+import gcc_sparta_library
+from gcc_sparta_library import MVConnectionPool, get_mv_daily_many
+
+
+class FakeComError(Exception):
+    """Stands in for pywintypes.com_error, which carries the HRESULT as a signed int."""
+
+    def __init__(self, hresult):
+        super().__init__(f"com_error {hresult:#x}")
+        self.hresult = hresult
+
+
+RPC_S_SERVER_UNAVAILABLE = 0x800706BA - (1 << 32)
+DISP_E_EXCEPTION = 0x80020009 - (1 << 32)
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.IsConnected = True
+        self.disconnected = False
+
+    def Disconnect(self):
+        self.disconnected = True
+
+
+class FakeBackend:
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        con = FakeConnection(len(self.connections))
+        self.connections.append(con)
+        return con
+
+
+@pytest.fixture
+def backend():
+    return FakeBackend()
+
+
+def test_a_thread_reuses_its_connection(backend):
+    pool = MVConnectionPool(backend=backend)
+
+    first = pool.run(lambda con: con)
+    second = pool.run(lambda con: con)
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.run(lambda con: con)))
+    thread.start()
+    thread.join()
+
+    assert first is second
+    assert other[0] is not first
+    assert len(backend.connections) == 2
+    assert pool.stats == {"connects": 2, "reuses": 1, "reconnects": 0}
+
+
+def test_transport_error_reconnects_and_retries_once(backend):
+    pool = MVConnectionPool(backend=backend)
+    calls = []
+
+    def fetch(con):
+        calls.append(con.number)
+        if con.number == 0:
+            raise FakeComError(RPC_S_SERVER_UNAVAILABLE)
+        return "bars"
+
+    assert pool.run(fetch) == "bars"
+    assert calls == [0, 1]
+    assert backend.connections[0].disconnected
+    assert pool.stats["reconnects"] == 1
+
+
+def test_transport_error_on_the_retry_is_raised(backend):
+    pool = MVConnectionPool(backend=backend)
+    calls = []
+
+    def fetch(con):
+        calls.append(con.number)
+        raise FakeComError(RPC_S_SERVER_UNAVAILABLE)
+
+    with pytest.raises(FakeComError):
+        pool.run(fetch)
+    assert calls == [0, 1]
+
+
+def test_writes_are_not_replayed(backend):
+    pool = MVConnectionPool(backend=backend)
+    calls = []
+
+    def save(con):
+        calls.append(con.number)
+        raise FakeComError(RPC_S_SERVER_UNAVAILABLE)
+
+    with pytest.raises(FakeComError):
+        pool.run(save, retry=False)
+    assert calls == [0]
+    # the lost connection is still replaced for the next call
+    assert backend.connections[0].disconnected
+    assert pool.run(lambda con: con.number) == 1
+
+
+def test_request_errors_keep_the_connection(backend):
+    pool = MVConnectionPool(backend=backend)
+    calls = []
+
+    def fetch(con):
+        calls.append(con.number)
+        raise FakeComError(DISP_E_EXCEPTION)  # e.g. an unknown symbol
+
+    with pytest.raises(FakeComError):
+        pool.run(fetch)
+    assert calls == [0]
+    assert not backend.connections[0].disconnected
+    assert pool.run(lambda con: con.number) == 0
+
+
+def test_failing_health_check_evicts_the_connection(backend):
+    pool = MVConnectionPool(backend=backend, health_check=lambda con: con.IsConnected, check_after=0)
+
+    assert pool.run(lambda con: con.number) == 0
+    backend.connections[0].IsConnected = False
+
+    assert pool.run(lambda con: con.number) == 1
+    assert backend.connections[0].disconnected
+    assert pool.stats == {"connects": 2, "reuses": 0, "reconnects": 1}
+
+
+def test_error_on_a_dead_connection_reconnects(backend):
+    pool = MVConnectionPool(backend=backend, health_check=lambda con: con.IsConnected)
+
+    def fetch(con):
+        if con.number == 0:
+            con.IsConnected = False
+            raise RuntimeError("call failed")
+        return "bars"
+
+    assert pool.run(fetch) == "bars"
+    assert backend.connections[0].disconnected
+
+
+def test_daily_many_workers_disconnect_when_the_batch_is_done(backend, monkeypatch):
+    pool = MVConnectionPool(backend=backend)
+    monkeypatch.setattr(gcc_sparta_library, "mv_pool", pool)
+
+    def daily_frame(symbol, start_date, end_date, cache):
+        number = gcc_sparta_library._with_connection(None, lambda con: con.number)
+        return pd.DataFrame([[start_date, 80.0, 81.0, 79.0, 80.5, 1000, number]],
+                            columns=gcc_sparta_library.MV_DAILY_COLUMNS)
+
+    monkeypatch.setattr(gcc_sparta_library, "_mv_daily_frame", daily_frame)
+    symbols = [f"CLZ{year}" for year in range(10, 30)]
+    bars, status = get_mv_daily_many(symbols, "2024-01-02", "2024-01-31", max_workers=3)
+
+    assert bars["symbol"].tolist() == symbols
+    assert status["status"].tolist() == ["ok"] * 20
+    assert pool.stats["connects"] == len(backend.connections) <= 3
+    assert all(con.disconnected for con in backend.connections)
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("mv-daily")]
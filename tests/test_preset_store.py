@@ -0,0 +1,210 @@
+import time
+
+import pandas as pd
+import pytest
+from sqlalchemy import event
+
+from contract_margins_writer import BUILD_COLUMNS, SEASONAL_COLUMNS, STATS_COLUMNS, TableWriter
+from db_engine import create_db_engine
+from preset_store import ArrowPresetStore, ReloadingStore, SqlPresetStore, update_snapshot, write_snapshot
+
+SCHEMA = "TradePriceAnalyzer"
+PRESETS = [("Crude", "NWE", "A", "Z"), ("Crude", "NWE", "B", "Z"), ("Crude", "USGC", "C", "H")]
+
+
+def preset_rows(group, region, instrument, month, spread=1.0):
+    dates = pd.bdate_range("2024-01-02", periods=3)
+    return pd.DataFrame({"Date": dates, "Year": "2024", "spread": spread + pd.RangeIndex(3),
+                         "LastTrade": pd.Timestamp("2024-11-28"), "GroupYear": 2024, "InstrumentName": instrument,
+                         "Group": group, "Region": region, "Month": month, "RollFlag": "CL", "Desc": instrument})
+
+
+def seasonal_rows(group, region, instrument, month):
+    return pd.DataFrame({"InstrumentName": instrument, "Group": group, "Region": region, "Month": month,
+                         "Year": "2023", "TradingDay": [1, 2], "Date": pd.bdate_range("2023-01-02", periods=2),
+                         "spread": [0.5, 0.6]})
+
+
+def stats_row(group, region, instrument, month, latest):
+    return {"InstrumentName": instrument, "Group": group, "Region": region, "Month": month, "Latest": latest,
+            "Mean": 2.0, "Median": 2.0, "Std": 1.0, "Count": 3, "AsOf": pd.Timestamp("2024-01-04")}
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_URL", f"sqlite:///{tmp_path / 'offline.sqlite'}")
+    engine = create_db_engine([SCHEMA])
+    TableWriter(engine, "contractMargins", SCHEMA).replace(
+        pd.concat([preset_rows(*key, spread=n) for n, key in enumerate(PRESETS)]))
+    TableWriter(engine, "contractMarginsSeasonal", SCHEMA, columns=SEASONAL_COLUMNS).replace(
+        pd.concat([seasonal_rows(*key) for key in PRESETS]))
+    TableWriter(engine, "contractMarginsStats", SCHEMA, columns=STATS_COLUMNS).replace(
+        pd.DataFrame([stats_row(*key, latest=n) for n, key in enumerate(PRESETS)]))
+    yield engine
+    engine.dispose()
+
+
+def count_series_queries(engine):
+    queries = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if '"contractMargins"' in statement:
+            queries.append(parameters)
+
+    return queries
+
+
+def sql_store(engine, **kwargs):
+    return SqlPresetStore(engine, "contractMargins", SCHEMA, seasonal_name="contractMarginsSeasonal",
+                          stats_name="contractMarginsStats", **kwargs)
+
+
+def test_sql_store_reads_only_the_hierarchy_at_startup(engine):
+    queries = count_series_queries(engine)
+    store = sql_store(engine)
+
+    assert len(queries) == 1
+    assert len(store) == 3
+    assert store.options() == [{"label": "Crude", "value": "Crude"}]
+    assert [o["value"] for o in store.options("Crude")] == ["NWE", "USGC"]
+    assert [o["value"] for o in store.options("Crude", "NWE")] == ["A", "B"]
+
+
+def test_sql_store_loads_a_series_once(engine):
+    store = sql_store(engine)
+    queries = count_series_queries(engine)
+
+    rows = store.get(*PRESETS[1])
+    assert store.get(*PRESETS[1]) is rows
+    assert store.seasonal(*PRESETS[1])["spread"].tolist() == [0.5, 0.6]
+    assert store.stats(*PRESETS[1])["Latest"] == 1.0
+
+    assert len(queries) == 1
+    assert rows["spread"].tolist() == [1.0, 2.0, 3.0]
+    assert rows["Date"].is_monotonic_increasing
+
+
+def test_sql_store_drops_the_least_recently_used_series(engine):
+    store = sql_store(engine, max_series=2)
+    queries = count_series_queries(engine)
+
+    store.get(*PRESETS[0])
+    store.get(*PRESETS[1])
+    store.get(*PRESETS[0])  # A is now the most recently used
+    store.get(*PRESETS[2])  # evicts B
+    assert len(queries) == 3
+
+    store.get(*PRESETS[0])
+    assert len(queries) == 3
+    store.get(*PRESETS[1])
+    assert len(queries) == 4
+
+
+def test_sql_store_unknown_series_is_empty_without_a_query(engine):
+    store = sql_store(engine)
+    queries = count_series_queries(engine)
+
+    assert store.get("Crude", "NWE", "X", "Z").empty
+    assert store.stats("Crude", "NWE", "X", "Z") == {}
+    assert queries == []
+
+
+def snapshot_frames(spread=0.0, presets=PRESETS):
+    # rows deliberately out of preset and Date order, write_snapshot sorts them
+    rows = pd.concat([preset_rows(*key, spread=spread + n) for n, key in enumerate(presets)])
+    return {"contractMargins": rows.sample(frac=1, random_state=3),
+            "contractMarginsSeasonal": pd.concat([seasonal_rows(*key) for key in reversed(presets)]),
+            "contractMarginsStats": pd.DataFrame([stats_row(*key, latest=spread + n) for n, key in enumerate(presets)])}
+
+
+def arrow_store(directory):
+    return ArrowPresetStore(directory, "contractMargins", seasonal_name="contractMarginsSeasonal",
+                            stats_name="contractMarginsStats")
+
+
+def test_arrow_store_looks_up_each_series_by_row_range(tmp_path):
+    write_snapshot(snapshot_frames(), tmp_path)
+    store = arrow_store(tmp_path)
+
+    assert len(store) == 3
+    assert [o["value"] for o in store.options("Crude", "NWE")] == ["A", "B"]
+    for n, key in enumerate(PRESETS):
+        rows = store.get(*key)
+        assert rows["InstrumentName"].tolist() == [key[2]] * 3
+        assert rows["spread"].tolist() == [n, n + 1.0, n + 2.0]
+        assert rows["Date"].is_monotonic_increasing
+        assert rows["Year"].tolist() == ["2024"] * 3  # plain text, not categorical
+        assert store.seasonal(*key)["TradingDay"].tolist() == [1, 2]
+        assert store.stats(*key)["Latest"] == n
+
+    assert store.get("Crude", "NWE", "X", "Z").empty
+    assert store.seasonal("Crude", "NWE", "X", "Z").empty
+    assert store.stats("Crude", "NWE", "X", "Z") == {}
+
+
+def test_reloading_store_swaps_in_a_new_snapshot(tmp_path):
+    write_snapshot(snapshot_frames(), tmp_path)
+    reloading = ReloadingStore(lambda: arrow_store(tmp_path), lambda current: current.change_marker(), interval=0)
+    old = reloading.store
+
+    assert not reloading.refresh()
+
+    write_snapshot(snapshot_frames(spread=10.0, presets=PRESETS[:2]), tmp_path)
+    assert reloading.refresh()
+    assert reloading.store is not old
+    assert reloading.get(*PRESETS[0])["spread"].tolist() == [10.0, 11.0, 12.0]
+    assert reloading.get(*PRESETS[2]).empty
+    # callbacks still holding the old store finish on its data
+    assert old.get(*PRESETS[2])["spread"].tolist() == [2.0, 3.0, 4.0]
+    assert not reloading.refresh()
+
+
+def test_reloading_store_polls_in_the_background(tmp_path):
+    write_snapshot(snapshot_frames(), tmp_path)
+    reloading = ReloadingStore(lambda: arrow_store(tmp_path), lambda current: current.change_marker(),
+                               interval=0.02).start()
+    try:
+        build_id = write_snapshot(snapshot_frames(spread=10.0), tmp_path)
+        deadline = time.monotonic() + 5
+        while reloading.store.build_id != build_id and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        reloading.stop()
+
+    assert reloading.store.build_id == build_id
+    assert reloading.stats(*PRESETS[0])["Latest"] == 10.0
+
+
+def test_sql_store_reloads_when_the_build_id_changes(engine):
+    build_writer = TableWriter(engine, "contractMarginsBuild", SCHEMA, columns=BUILD_COLUMNS)
+    build_writer.replace(pd.DataFrame({"BuildId": ["20240104000000000000"]}))
+    reloading = ReloadingStore(lambda: sql_store(engine, build_name="contractMarginsBuild"),
+                               lambda current: current.change_marker(), interval=0)
+    assert reloading.get(*PRESETS[0])["spread"].tolist() == [0.0, 1.0, 2.0]
+
+    # rows written without a new build id (a build still running) are not picked up yet
+    TableWriter(engine, "contractMargins", SCHEMA).replace_presets(preset_rows(*PRESETS[0], spread=5.0))
+    assert not reloading.refresh()
+
+    build_writer.replace(pd.DataFrame({"BuildId": ["20240105000000000000"]}))
+    assert reloading.refresh()
+    assert reloading.get(*PRESETS[0])["spread"].tolist() == [5.0, 6.0, 7.0]
+
+
+def test_update_snapshot_replaces_only_the_given_presets(tmp_path):
+    presets = pd.DataFrame([PRESETS[0], PRESETS[2]], columns=["Group", "Region", "InstrumentName", "Month"])
+    assert update_snapshot(snapshot_frames(), tmp_path, presets) is None  # nothing to update yet
+
+    write_snapshot(snapshot_frames(), tmp_path)
+    changed = {name: frame[frame["InstrumentName"] == "A"] for name, frame in snapshot_frames(spread=10.0).items()}
+    build_id = update_snapshot(changed, tmp_path, presets)  # A changed, C removed
+
+    store = arrow_store(tmp_path)
+    assert store.build_id == build_id
+    assert len(store) == 2
+    assert store.get(*PRESETS[0])["spread"].tolist() == [10.0, 11.0, 12.0]
+    assert store.stats(*PRESETS[0])["Latest"] == 10.0
+    assert store.get(*PRESETS[1])["spread"].tolist() == [1.0, 2.0, 3.0]
+    assert store.get(*PRESETS[2]).empty
+    assert store.seasonal(*PRESETS[2]).empty
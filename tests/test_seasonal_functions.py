@@ -0,0 +1,35 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from market_data import MarketDataProvider
+from seasonalFunctions import assemble_contract_data
+
+
+class ThreadedProvider(MarketDataProvider):
+    """Reports every symbol from a worker thread, as MVProvider does."""
+
+    name = "threaded"
+
+    def fetch_daily(self, symbols, start, end=None, progress=None):
+        start_line = threading.Barrier(8)
+
+        def fetch(symbol):
+            start_line.wait()
+            progress(symbol)
+            return pd.DataFrame({"symbol": symbol, "Date": pd.bdate_range("2024-01-02", periods=3), "close": 80.0})
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return pd.concat(list(executor.map(fetch, symbols)), ignore_index=True)
+
+
+def test_progress_counts_every_contract_once():
+    reported = []
+    contract_data, expire_list = assemble_contract_data(
+        ThreadedProvider(), ["CL", "HO"], ["Z", "Z"], [24, 24], [1, -1], [1, 42], 8,
+        progress=lambda done, total, message: reported.append((done, total)))
+
+    assert reported == [(n, 16) for n in range(1, 17)]
+    assert sorted(contract_data) == ["CLZ", "HOZ"]
+    assert expire_list[0] == "Z24"
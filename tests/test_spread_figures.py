@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+from spread_figures import seasonal_figure, time_series_figure
+
+
+def test_spreads_are_sent_at_full_precision():
+    spreads = [1234.567, -0.123456789, 98765.4321]
+    seasonal = seasonal_figure({"Current": pd.DataFrame({"TradingDay": [1, 2, 3], "spread": spreads})})
+    series = time_series_figure(pd.bdate_range("2024-01-02", periods=3), spreads)
+
+    for fig in (seasonal, series):
+        y = fig.data[0].y
+        assert y.dtype == np.float64
+        assert y.tolist() == spreads
+    assert seasonal.data[0].x.dtype == np.int16
@@ -0,0 +1,150 @@
+import threading
+import time
+
+from spread_jobs import JobManager, TTLCache
+
+
+def wait(manager, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while manager.get(job_id).running:
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.01)
+    return manager.get(job_id)
+
+
+class Blocking:
+    """Job function that reports progress and waits until released, counting its calls."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, params, report):
+        self.calls.append(params)
+        report(1, 2, "halfway")
+        assert self.release.wait(5)
+        return sum(params["weights"])
+
+
+def test_same_parameters_share_the_running_job():
+    manager = JobManager(max_workers=2)
+    fn = Blocking()
+
+    first = manager.submit({"tickers": ["A", "B"], "weights": [1, -1]}, fn)
+    again = manager.submit({"weights": [1, -1], "tickers": ["A", "B"]}, fn)
+    other = manager.submit({"tickers": ["A", "B"], "weights": [1, -2]}, fn)
+    fn.release.set()
+
+    assert again == first
+    assert other != first
+    assert wait(manager, first).result == 0
+    assert wait(manager, other).result == -1
+    assert len(fn.calls) == 2
+
+
+def test_finished_jobs_are_not_shared():
+    manager = JobManager()
+    fn = Blocking()
+    fn.release.set()
+
+    first = manager.submit({"weights": [1]}, fn)
+    wait(manager, first)
+    second = manager.submit({"weights": [1]}, fn)
+
+    assert second != first
+    assert wait(manager, second).status == "done"
+    assert len(fn.calls) == 2
+
+
+def test_progress_and_errors_are_reported():
+    manager = JobManager()
+    fn = Blocking()
+    job_id = manager.submit({"weights": [1, 2]}, fn)
+
+    deadline = time.monotonic() + 5
+    while manager.get(job_id).progress != (1, 2, "halfway") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert manager.get(job_id).status == "running"
+    fn.release.set()
+    job = wait(manager, job_id)
+    assert (job.status, job.result, job.error) == ("done", 3, None)
+
+    def fail(params, report):
+        raise ValueError("no prices for CLZ25")
+
+    failed = wait(manager, manager.submit({"weights": [3]}, fail))
+    assert (failed.status, failed.error) == ("error", "no prices for CLZ25")
+    assert failed.finished is not None
+
+
+def test_add_finished_registers_a_done_job():
+    manager = JobManager()
+
+    job = manager.get(manager.add_finished({"weights": [1]}, "cached figure"))
+
+    assert (job.status, job.result, job.progress) == ("done", "cached figure", (1, 1, "Done"))
+    assert not job.running
+
+
+def test_only_the_most_recent_finished_jobs_are_kept():
+    manager = JobManager(keep_finished=2)
+    fn = Blocking()
+    running = manager.submit({"weights": [0]}, fn)
+
+    finished = [manager.add_finished({"weights": [n]}, n) for n in range(1, 4)]
+
+    assert manager.get(finished[0]) is None
+    assert [manager.get(job_id).result for job_id in finished[1:]] == [2, 3]
+    assert manager.get(running).running  # running jobs are never pruned
+
+    fn.release.set()
+    wait(manager, running)
+    assert manager.get(finished[1]) is None
+    assert manager.get(running).result == 0
+
+
+def test_unknown_job_id():
+    assert JobManager().get("no-such-job") is None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_entries_expire():
+    clock = FakeClock()
+    cache = TTLCache(ttl=60, clock=clock)
+    cache.put("CLZ25", "prices")
+
+    clock.now += 60
+    assert cache.get("CLZ25") == "prices"
+    clock.now += 1
+    assert cache.get("CLZ25") is None
+    assert cache.stats == {"hits": 1, "misses": 1, "size": 0}
+
+
+def test_ttl_cache_put_restarts_the_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl=60, clock=clock)
+    cache.put("CLZ25", "old")
+    clock.now += 50
+    cache.put("CLZ25", "new")
+    clock.now += 50
+
+    assert cache.get("CLZ25") == "new"
+
+
+def test_ttl_cache_drops_the_least_recently_used_entry():
+    cache = TTLCache(max_size=2, clock=FakeClock())
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # b is now the least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats["size"] == 2
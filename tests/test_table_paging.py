@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from table_paging import _split_filter_part, query_page
+
+
+@pytest.mark.parametrize("filter_part, expected", [
+    ('{Desc} contains "Range spread"', ("Desc", "contains", "Range spread")),
+    ('{Desc} eq "Gasoline less than crude"', ("Desc", "eq", "Gasoline less than crude")),
+    ("{spread} >= 2.5", ("spread", "ge", 2.5)),
+    ("{spread} > 2.5", ("spread", "gt", 2.5)),
+    ("{Year} ne 2024", ("Year", "ne", 2024.0)),
+    ("{Date} datestartswith 2024-01", ("Date", "datestartswith", "2024-01")),
+])
+def test_split_filter_part_reads_the_operator_after_the_column(filter_part, expected):
+    assert _split_filter_part(filter_part) == expected
+
+
+def test_split_filter_part_without_a_column():
+    assert _split_filter_part('contains "ge "') == (None, None, None)
+
+
+def test_query_page_filters_on_values_containing_operator_names():
+    df = pd.DataFrame({"Desc": ["Range spread", "Crack spread", "Range gt spread"], "spread": [1.0, 2.0, 3.0]})
+
+    records, page_count, page_current = query_page(df, 0, 10, filter_query='{Desc} contains "Range" && {spread} < 3')
+
+    assert records == [{"Desc": "Range spread", "spread": 1.0}]
+    assert (page_count, page_current) == (1, 0)
+
+
+def test_query_page_clamps_page_current_to_the_last_page():
+    df = pd.DataFrame({"spread": [float(n) for n in range(25)]})
+
+    records, page_count, page_current = query_page(df, 7, 10)
+
+    assert (page_count, page_current) == (3, 2)
+    assert [r["spread"] for r in records] == [20.0, 21.0, 22.0, 23.0, 24.0]